@@ -1,5 +1,12 @@
 import requests
 import json
+from functools import lru_cache
+
+
+@lru_cache(maxsize=256)
+def split_path(field):
+    """字段路径只拆分一次（同一路径重复断言时直接复用）"""
+    return tuple(field.split('.'))
 
 
 class APITest:
@@ -51,15 +58,18 @@ class APITest:
         :param field: 字段路径，如 "data.userId" 或 "code"
         :param expected_value: 期望值，不传则只验证字段存在
         """
-        try:
-            json_data = response.json()
-        except:
-            raise AssertionError("响应不是JSON格式")
+        # 同一响应只解析一次JSON
+        json_data = getattr(response, "_parsed_json", None)
+        if json_data is None:
+            try:
+                json_data = response.json()
+            except:
+                raise AssertionError("响应不是JSON格式")
+            response._parsed_json = json_data
 
         # 支持多层路径，如 "data.userId"
-        keys = field.split('.')
         value = json_data
-        for key in keys:
+        for key in split_path(field):
             assert key in value, f"字段 '{field}' 不存在"
             value = value[key]
 
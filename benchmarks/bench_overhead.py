@@ -0,0 +1,242 @@
+"""框架开销基准测试（对本地替身服务执行，不访问真实环境）
+
+用法（项目根目录执行）：
+    python -m benchmarks.bench_overhead                       # 与基线对比，超出阈值退出码为1
+    python -m benchmarks.bench_overhead --update-baseline     # 记录/更新基线
+    python -m benchmarks.bench_overhead --rows 100,1000 --threshold 0.3
+
+测量项：
+    collect.<行数>.*   合成用例表的冷读取（openpyxl解析）、热读取（缓存命中）、依赖图排序耗时，以及峰值内存
+    case.*             单条用例各环节开销：请求封装（send_request相对裸requests多出的耗时）、用例编译、断言
+    e2e.*              用pytest对替身服务完整执行一遍合成用例，每条用例的平均耗时（含Allure、日志、夹具）
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from config.env_config import (BASE_DIR, ENV_CASE_FILE, ENV_HISTORY_PATH, ENV_LOG_DIR, ENV_REPORT_DIR,
+                               ENV_TOKEN_CACHE_PATH, ENV_TRACE_DIR)
+#无需修改：框架开销基准测试
+
+BENCH_DIR = os.path.join(BASE_DIR, "benchmarks")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+RESULT_PATH = os.path.join(BASE_DIR, "reports", "benchmark.json")
+WORKBOOK_DIR = os.path.join(BASE_DIR, ".cache", "bench")
+HEADERS = ("case_name", "module", "level", "method", "url", "params", "json",
+           "expect_code", "expect_key", "expect_value", "db_sql", "db_expect")
+DEFAULT_ROWS = "100,1000,10000,100000"
+# 低于该差值（ms/MB）的变化视为噪声，不算退化
+NOISE_FLOOR = 0.5
+# 耗时较短的项重复测量取最小值（排除偶发抖动）
+REPEAT = 5
+
+
+def build_workbook(rows):
+    """生成合成用例表（已存在则复用），返回文件路径"""
+    path = os.path.join(WORKBOOK_DIR, f"cases-{rows}.xlsx")
+    if os.path.exists(path):
+        return path
+    import openpyxl
+    os.makedirs(WORKBOOK_DIR, exist_ok=True)
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("Sheet1")
+    sheet.append(HEADERS)
+    for i in range(rows):
+        post = i % 3 == 0
+        sheet.append((f"基准用例{i}", f"模块{i % 20}", "normal", "POST" if post else "GET", f"/bench/{i % 50}",
+                      "{}" if post else json.dumps({"page": i % 10, "size": 20}),
+                      json.dumps({"id": i, "name": f"user{i}", "tags": ["a", "b"]}) if post else "{}",
+                      200, "code", 0, None, None))
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    workbook.save(tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def peak_memory_mb():
+    """当前进程的峰值内存（MB），Windows上不支持时返回None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS单位是字节，Linux是KB
+    return round(peak / (1024 * 1024) if platform.system() == "Darwin" else peak / 1024, 1)
+
+
+def collect_worker(path):
+    """子进程中执行：测量一个用例表的读取耗时和峰值内存（独立进程，峰值内存互不影响）"""
+    import core.excel_reader as excel_reader_module
+    from core.case_flow import CaseGraph
+    from core.case_history import CaseHistory
+    from core.excel_reader import ExcelReader
+
+    reader = ExcelReader(path)
+    cache_path = reader._cache_path("Sheet1")
+    excel_reader_module.CASE_CACHE = True
+    # 冷读取（删掉缓存后解析Excel）：大表只测一次
+    cold = float("inf")
+    for _ in range(REPEAT if os.path.getsize(path) < 1024 * 1024 else 1):
+        if os.path.exists(cache_path):
+            os.remove(cache_path)
+        start = time.perf_counter()
+        cases = reader.get_cases()
+        cold = min(cold, time.perf_counter() - start)
+    warm = graph = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        cases = reader.get_cases()
+        warm = min(warm, time.perf_counter() - start)
+        start = time.perf_counter()
+        CaseHistory(enabled=False).prioritize(CaseGraph(cases))
+        graph = min(graph, time.perf_counter() - start)
+    print(json.dumps({"cold_ms": cold * 1000, "warm_ms": warm * 1000, "graph_ms": graph * 1000,
+                      "peak_mb": peak_memory_mb()}))
+
+
+def bench_collect(rows):
+    """各行数用例表的读取耗时和峰值内存"""
+    metrics = {}
+    for count in rows:
+        path = build_workbook(count)
+        output = subprocess.run([sys.executable, "-m", "benchmarks.bench_overhead", "--collect-worker", path],
+                                cwd=BASE_DIR, capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        for name, value in result.items():
+            if value is not None:
+                metrics[f"collect.{count}.{name}"] = round(value, 2)
+        print(f"用例表{count}行：冷读取{result['cold_ms']:.0f}ms，缓存{result['warm_ms']:.0f}ms，"
+              f"依赖图{result['graph_ms']:.0f}ms，峰值内存{result['peak_mb']}MB")
+    return metrics
+
+
+def _per_call(func, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    return (time.perf_counter() - start) / number * 1000
+
+
+def bench_case(number=300):
+    """单条用例各环节的开销（ms/次）"""
+    from core.assert_utils import assert_utils
+    from core.case_model import compile_case
+    from core.http_client import HttpClient
+    from core.logger import log
+    from core.stub_server import StubServer
+
+    row = {"case_name": "基准用例", "method": "POST", "url": "/bench/0", "params": {},
+           "json": {"id": 1, "name": "user1", "tags": ["a", "b"]}, "expect_code": 200,
+           "expect_key": "code", "expect_value": 0}
+    case = compile_case(row)
+    server = StubServer(fixtures=None, cases=[case], port=0).start()
+    try:
+        client = HttpClient(base_url=server.base_url)
+        full_url = server.base_url + case.url
+        raw = min(_per_call(lambda: client.session.post(full_url, json=case.json), number) for _ in range(3))
+        wrapped = min(_per_call(lambda: client.send_request("POST", case.url, None, case.json, "基准用例"), number)
+                      for _ in range(3))
+        response = client.send_request("POST", case.url, None, case.json)
+        # 断言日志与请求日志同样计入开销（日志输出本身就是被测对象之一）
+        assert_ms = _per_call(lambda: (assert_utils.assert_code(response, 200),
+                                       assert_utils.assert_json(response, "code", 0)), number)
+        compile_ms = _per_call(lambda: compile_case(row), number * 10)
+        log_ms = _per_call(lambda: log.info("【基准】{} {}", case.method, case.url), number)
+    finally:
+        server.stop()
+    metrics = {"case.request_overhead_ms": max(wrapped - raw, 0.0), "case.compile_ms": compile_ms,
+               "case.assert_ms": assert_ms, "case.log_line_ms": log_ms}
+    metrics = {name: round(value, 4) for name, value in metrics.items()}
+    print(f"单条用例：请求封装{metrics['case.request_overhead_ms']:.3f}ms（裸requests {raw:.3f}ms），"
+          f"用例编译{compile_ms:.4f}ms，断言{assert_ms:.3f}ms，单行日志{log_ms:.4f}ms")
+    return metrics
+
+
+def bench_e2e(rows):
+    """pytest完整执行合成用例（--stub），返回每条用例平均耗时"""
+    path = build_workbook(rows)
+    # 执行历史、日志、Token缓存、耗时报告、追踪日志和Allure结果都写到临时目录，不影响真实的历史排序和报告
+    with tempfile.TemporaryDirectory(prefix="bench-e2e-") as output_dir:
+        env = dict(os.environ, **{ENV_CASE_FILE: path,
+                                  ENV_HISTORY_PATH: os.path.join(output_dir, "history.sqlite3"),
+                                  ENV_LOG_DIR: os.path.join(output_dir, "logs"),
+                                  ENV_TOKEN_CACHE_PATH: os.path.join(output_dir, "tokens.json"),
+                                  ENV_REPORT_DIR: os.path.join(output_dir, "reports"),
+                                  ENV_TRACE_DIR: os.path.join(output_dir, "trace")})
+        start = time.perf_counter()
+        # 替身服务不加载接口声明（零延迟），耗时即框架开销+本机往返
+        process = subprocess.run([sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", "--stub",
+                                  "--stub-fixtures=", f"--alluredir={os.path.join(output_dir, 'allure-results')}"],
+                                 cwd=BASE_DIR, env=env, capture_output=True, text=True)
+        elapsed = time.perf_counter() - start
+    if process.returncode != 0:
+        print(process.stdout[-2000:])
+        raise Exception(f"端到端基准执行失败，退出码：{process.returncode}")
+    metrics = {f"e2e.{rows}.per_case_ms": round(elapsed / rows * 1000, 3),
+               f"e2e.{rows}.total_s": round(elapsed, 2)}
+    print(f"端到端{rows}条用例：总耗时{elapsed:.2f}秒，每条{metrics[f'e2e.{rows}.per_case_ms']}ms")
+    return metrics
+
+
+def compare(metrics, baseline, threshold):
+    """与基线对比，返回退化项列表[(指标, 基线, 本次, 变化比例)]"""
+    regressions = []
+    print(f"\n{'指标':<36} {'基线':>12} {'本次':>12} {'变化':>8}")
+    for name, value in sorted(metrics.items()):
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<36} {'-':>12} {value:>12} {'新增':>8}")
+            continue
+        change = (value - base) / base if base else 0.0
+        regressed = value > base * (1 + threshold) and value - base > NOISE_FLOOR
+        print(f"{name:<36} {base:>12} {value:>12} {change:>+8.1%}{'  ← 退化' if regressed else ''}")
+        if regressed:
+            regressions.append((name, base, value, change))
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="框架开销基准测试")
+    parser.add_argument("--rows", default=DEFAULT_ROWS, help="合成用例表行数（逗号分隔）")
+    parser.add_argument("--e2e-rows", type=int, default=500, help="端到端执行的用例数（0：跳过）")
+    parser.add_argument("--threshold", type=float, default=0.2, help="相对基线变慢超过该比例时判定为退化")
+    parser.add_argument("--update-baseline", action="store_true", help="把本次结果保存为基线")
+    parser.add_argument("--collect-worker", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.collect_worker:
+        return collect_worker(args.collect_worker)
+    metrics = {}
+    metrics.update(bench_collect([int(rows) for rows in args.rows.split(",") if rows.strip()]))
+    metrics.update(bench_case())
+    if args.e2e_rows:
+        metrics.update(bench_e2e(args.e2e_rows))
+
+    os.makedirs(os.path.dirname(RESULT_PATH), exist_ok=True)
+    with open(RESULT_PATH, "w", encoding="utf-8") as f:
+        json.dump({"python": platform.python_version(), "platform": platform.platform(), "metrics": metrics},
+                  f, ensure_ascii=False, indent=2)
+    if args.update_baseline or not os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH, "w", encoding="utf-8") as f:
+            json.dump(metrics, f, ensure_ascii=False, indent=2)
+        print(f"\n基线已保存：{BASELINE_PATH}")
+        return 0
+    with open(BASELINE_PATH, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = compare(metrics, baseline, args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)}项指标相对基线变慢超过{args.threshold:.0%}")
+        return 1
+    print(f"\n✅ 无退化（阈值{args.threshold:.0%}）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
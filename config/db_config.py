@@ -1,3 +1,4 @@
+import os
 # ===================== 需修改的配置（有数据库断言才改） =====================
 DB_CONFIG = {
     "host": "127.0.0.1",    # 公司数据库地址
@@ -7,4 +8,12 @@ DB_CONFIG = {
     "db": "company_db",     # 数据库名
     "charset": "utf8mb4"
 }
-# ==========================================================================
\ No newline at end of file
+# ==========================================================================
+
+# 连接池与批量校验配置（一般无需改）
+DB_ADAPTER = "mysql"        # 数据库类型：mysql（公司库）/ sqlite（本地替身，调试用）
+SQLITE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "test_data", "db_stub.sqlite3")
+DB_POOL_SIZE = 5            # 连接池最大连接数
+DB_IDLE_CHECK = 60          # 连接空闲超过多少秒，复用前先探活
+DB_ASSERT_DEFERRED = False  # 延迟校验：执行用例时只登记，运行结束时分批合并查询
+DB_BATCH_SIZE = 50          # 延迟校验每次合并查询的语句条数
@@ -23,9 +23,124 @@ TOKEN_PREFIX = "Bearer "               # Token前缀（无则留空，例：Bear
 # 3. 基础配置
 TIMEOUT = 10                           # 请求超时时间（秒）
 LOG_LEVEL = "INFO"                     # 日志级别（INFO/DEBUG/ERROR）
+CASE_CACHE = True                      # 是否缓存解析后的Excel用例（文件未修改时跳过Excel解析）
+CASE_FILES = "api_cases.xlsx"          # 用例文件（相对test_data目录）：支持xlsx/yaml/csv/jsonl，逗号分隔多个，可用通配符如"cases/**/*.yaml"
+
+# 4. 异步执行配置
+ASYNC_MODE = False                     # 是否开启异步并发执行（True：并发预先发送请求，用例只做断言）
+ASYNC_CONCURRENCY = 20                 # 异步模式最大并发数
+
+# 5. 多进程分片执行配置
+SHARD_WORKERS = 1                      # 默认工作进程数（1：不分片；run.py --workers 可覆盖）
+
+# 6. 连接池配置（所有HttpClient实例共用一个连接池）
+POOL_CONNECTIONS = 10                  # 缓存的主机连接池个数（按域名区分）
+POOL_MAXSIZE = 20                      # 每个主机最多保留的连接数（建议不小于异步并发数）
+POOL_BLOCK = False                     # 连接用尽时是否阻塞等待（False：临时新建连接，用完丢弃）
+POOL_MAX_RETRIES = 0                   # 建立连接失败时的重试次数
+KEEP_ALIVE = True                      # 是否复用长连接（False：每个请求结束后断开）
+
+# 7. 请求/响应日志策略
+LOG_BODY_MAX = 2048                    # 日志中请求参数/响应正文最多记录的字符数，超出截断
+LOG_BODY_LIMITS = {}                   # 按接口路径单独设置上限，例：{"/admin/order/list": 512}
+LOG_HASH_THRESHOLD = 64 * 1024         # 成功响应正文超过该字节数只记录长度和哈希（二进制正文始终如此）
+LOG_SUCCESS_SAMPLE = 1.0               # 成功响应正文的采样比例（0~1），失败响应始终完整记录
+
+# 8. 耗时统计
+LATENCY_BUDGET_MS = None               # 默认耗时预算（毫秒），用例表latency_budget_ms列优先；None：不检查
+
+# 9. 录制/回放（离线调试，run.py --cassette 可覆盖）
+CASSETTE_MODE = "off"                  # off：正常请求；record：请求并录制；replay：从录制文件回放
+CASSETTE_STRICT = False                # 回放未命中时：True直接失败；False改为真实请求
+CASSETTE_NAME = "default"              # 录制文件名（test_data/cassettes/<名称>.sqlite3）
+
+# 10. 本地替身服务（run.py --stub 启动；pytest --stub 时用例改为请求替身服务）
+STUB_HOST = "127.0.0.1"                # 替身服务监听地址
+STUB_PORT = 18080                      # 替身服务端口（pytest --stub 时自动分配空闲端口）
+STUB_FIXTURES = os.path.join(BASE_DIR, "test_data", "stub_fixtures.yaml")  # 接口替身声明文件
+
+# 11. Token缓存（按域名+登录账号缓存到本地，未过期时跳过登录）
+TOKEN_CACHE = True                     # 是否缓存Token（False：每次运行都重新登录）
+TOKEN_CACHE_PATH = os.path.join(BASE_DIR, ".cache", "tokens.json")  # Token缓存文件
+TOKEN_TTL = 7200                       # 登录响应和Token本身都没有过期时间时，按该秒数过期
+TOKEN_EXPIRE_MARGIN = 60               # 提前多少秒视为过期（避免用到即将过期的Token）
+
+# 12. 测试报告
+REPORT_ENGINE = "auto"                 # auto：装了Allure命令行用Allure，否则用内置报告；allure/native：指定；off：不生成
+
+# 13. 执行历史（记录每条用例的耗时和结果，用于失败优先和按耗时分片）
+HISTORY_ENABLED = True                 # 是否记录执行历史
+HISTORY_PATH = os.path.join(BASE_DIR, "reports", "history.sqlite3")  # 历史记录文件
+HISTORY_KEEP = 20                      # 每条用例保留最近多少次记录
+HISTORY_FAIL_WINDOW = 3                # 最近多少次内失败过就算"最近失败"
+FAILED_FIRST = True                    # 最近失败的用例（连同它所在的链路）优先执行
+
+# 14. 失败重试与熔断（按接口路径区分）
+RETRY_TIMES = 2                        # 连接失败/超时/RETRY_STATUS状态码时的重试次数（只重试幂等方法）
+RETRY_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")  # 幂等方法
+RETRY_STATUS = (429, 502, 503, 504)    # 需要重试的状态码
+RETRY_BACKOFF = 0.5                    # 退避基数（秒）：第n次重试前随机等待0~RETRY_BACKOFF*2^n秒
+RETRY_BACKOFF_MAX = 8                  # 单次等待上限（秒，含Retry-After）
+RETRY_OVERRIDES = {}                   # 按接口单独配置重试次数，例：{"/admin/order/create": {"times": 1}}
+BREAKER_ENABLED = True                 # 是否开启熔断（接口连续失败后直接失败，不再等超时）
+BREAKER_THRESHOLD = 3                  # 连续失败多少次后熔断（连接失败/超时/5xx）
+BREAKER_COOLDOWN = 30                  # 熔断多少秒后放行一个探测请求
+BREAKER_EXEMPT = (LOGIN_URL,)          # 不熔断的接口路径（登录有自己的重试，熔断后所有用例都会误报"接口熔断中"）
+
+# 15. 流式响应（Excel的stream列开启，导出/下载等大报文接口使用）
+STREAM_CHUNK_SIZE = 64 * 1024          # 每次读取的字节数
+STREAM_MEMORY_MAX = 8 * 1024 * 1024    # 需要保留完整正文时，超过该字节数转存到临时文件
+STREAM_HEAD_BYTES = 2048               # 日志中记录的正文开头字节数
+
+# 16. 请求/响应压缩（Excel的compress列优先：gzip/deflate/true/false）
+COMPRESS_REQUEST = False               # 是否默认压缩JSON请求正文（需服务端支持Content-Encoding）
+COMPRESS_ENDPOINTS = {}                # 按接口路径开启/关闭，例：{"/admin/order/batchImport": "gzip", "/admin/x": None}
+COMPRESS_ENCODING = "gzip"             # 开启压缩时默认的压缩方式（gzip/deflate）
+COMPRESS_LEVEL = 6                     # 压缩级别（1最快~9最小）
+COMPRESS_MIN_BYTES = 1024              # 正文小于该字节数时不压缩（压缩收益抵不上开销）
+ACCEPT_ENCODING = "gzip, deflate"      # 声明可接收的响应压缩方式（identity：要求服务端不压缩）
+
+# 17. 结构化追踪日志（每个请求/用例结果一行JSON，按运行分目录，每个进程写独立文件）
+TRACE_ENABLED = True                   # 是否记录追踪日志
+TRACE_DIR = os.path.join(BASE_DIR, "logs", "trace")  # 追踪日志目录（logs/trace/<运行ID>/）
+TRACE_BATCH = 200                      # 缓存多少条记录后批量写入
+TRACE_FLUSH_INTERVAL = 2.0             # 距上次写入超过该秒数时也写入（避免进程异常退出丢太多记录）
+TRACE_ROTATE_MB = 20                   # 单个文件超过该大小（MB）后压缩成.gz并换新文件
+TRACE_INDEX_TOP = 50                   # 索引中保留最慢的请求条数（查询最慢/失败请求时只读索引）
+TRACE_KEEP_RUNS = 20                   # 保留最近多少次运行的追踪日志
+
+# 18. 多环境对比（run.py --envs 测试环境,预发布环境：同一批用例并发请求多个环境，对比状态码和耗时）
+ENVIRONMENTS = {                       # 环境名称: 域名（--envs 列出的第一个环境作为对比基准）
+    "测试环境": "https://fas-api.flextv9.com",
+    "预发布环境": "http://pre.api.xxx.com",
+    # "生产环境": "http://prod.api.xxx.com",  # 谨慎：用例会真实请求生产环境
+}
+COMPARE_SLOWER_RATIO = 1.5             # 接口p95耗时超过基准环境该倍数时标记为变慢
+
+# 19. 响应结构校验（Excel的expect_schema列填JSON Schema文件名，整个响应按Schema校验）
+SCHEMA_DIR = os.path.join(BASE_DIR, "test_data", "schemas")  # Schema文件目录（.json/.yaml，列中填相对路径）
+SCHEMA_ENGINE = "auto"                 # auto：用jsonschema（requirements已包含），未安装时退回内置校验（只支持常用关键字，遇到其他关键字校验失败）；jsonschema/builtin：指定
+SCHEMA_MAX_ERRORS = 10                 # 校验失败时最多列出的不符合项
+
+# 20. 监听模式（run.py --watch：进程常驻，保持会话/Token/连接，用例文件保存后只执行新增和修改的用例）
+WATCH_INTERVAL = 0.2                   # 检查用例文件是否修改的间隔（秒）
+WATCH_RUN_ALL = True                   # 启动时是否先完整执行一遍（链路变量就绪，之后只执行变更的用例）
 # ===============================================================
 
 # 固定配置（无需改）
 DEFAULT_HEADERS = {
     "Content-Type": "application/json;charset=UTF-8"
-}
\ No newline at end of file
+}
+
+# 多进程分片执行时父进程传给工作进程的环境变量名（无需改）
+ENV_TOKEN = "API_AUTO_TOKEN"           # 父进程登录得到的Token
+ENV_WORKER = "API_AUTO_WORKER"         # 工作进程编号
+ENV_SHARD_PLAN = "API_AUTO_SHARD_PLAN" # 分片计划文件路径
+ENV_CASSETTE = "API_AUTO_CASSETTE"     # 录制/回放模式（覆盖CASSETTE_MODE）
+ENV_RUN_ID = "API_AUTO_RUN_ID"         # 运行ID（追踪日志按它分目录，工作进程与父进程共用）
+ENV_CASE_FILE = "API_AUTO_CASE_FILE"   # 用例文件（覆盖CASE_FILES，基准测试用合成用例表）
+ENV_HISTORY_PATH = "API_AUTO_HISTORY_PATH"  # 执行历史文件（覆盖HISTORY_PATH，基准测试写到临时目录，下同）
+ENV_LOG_DIR = "API_AUTO_LOG_DIR"       # 日志目录（覆盖logs/）
+ENV_TOKEN_CACHE_PATH = "API_AUTO_TOKEN_CACHE_PATH"  # Token缓存文件（覆盖TOKEN_CACHE_PATH）
+ENV_REPORT_DIR = "API_AUTO_REPORT_DIR" # 耗时报告目录（覆盖reports/）
+ENV_TRACE_DIR = "API_AUTO_TRACE_DIR"   # 追踪日志目录（覆盖TRACE_DIR）
@@ -1,45 +1,181 @@
+import json
+import os
+import allure
 import pytest
-import time
 from core.logger import log
-from core.http_client import HttpClient
-from config.env_config import LOGIN_URL, LOGIN_PARAMS, BASE_URL
+from core.http_client import http_client
+from core.auth import TokenManager, apply_token
+from core.http_pool import pool_stats
+from core.cassette import cassette
+from core.assert_utils import assert_utils
+from core.db_pool import db_pool
+from core.latency import latency_recorder, write_allure_environment, transfer_totals
+from core.case_history import case_history
+from core.case_model import Case
+from core.trace import trace_sink, current_case
+from core.resilience import resilience
+from core.schema_assert import schema_registry
+from core.shard_runner import write_worker_stats
+from config.env_config import ENV_TOKEN, STUB_FIXTURES
 
-# 全局初始化HttpClient实例（关键：先实例化，再赋值Token）
-global_client = HttpClient()
+# 全局HttpClient实例（关键：与用例执行共用同一个实例，登录后赋值Token）
+global_client = http_client
+
+
+def pytest_addoption(parser):
+    parser.addoption("--stub", action="store_true", default=False,
+                     help="启动本地替身服务，用例请求替身服务而不是真实环境")
+    parser.addoption("--stub-fixtures", default=STUB_FIXTURES,
+                     help="替身服务的接口声明文件（传空字符串：不加载，所有接口零延迟按用例预期返回）")
+
+
+def _case_of(item):
+    """参数化用例对应的Case（非用例执行的测试返回None）"""
+    case = getattr(item, "callspec", None) and item.callspec.params.get("case")
+    return case if isinstance(case, Case) else None
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    """用例执行期间的请求在追踪日志里关联到该用例ID"""
+    case = _case_of(item)
+    token = current_case.set(case.case_id) if case is not None else None
+    try:
+        yield
+    finally:
+        if token is not None:
+            current_case.reset(token)
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    """记录每条用例的耗时和结果（写入执行历史和追踪日志）"""
+    outcome = yield
+    report = outcome.get_result()
+    case = _case_of(item)
+    if report.when == "call" and case is not None and case.case_id:
+        case_history.add(case.case_id, report.duration, report.outcome)
+        crash = getattr(report.longrepr, "reprcrash", None)
+        trace_sink.emit("case", case_id=case.case_id, case_name=case.case_name, outcome=report.outcome,
+                        duration_ms=round(report.duration * 1000, 2),
+                        message=crash.message[:500] if crash is not None else None)
 
 
 @pytest.fixture(scope="session", autouse=True)
-def get_global_token():
+def stub_server(request):
+    """会话级夹具：--stub时启动本地替身服务，并把全局客户端指向它"""
+    if not request.config.getoption("--stub"):
+        yield None
+        return
+    from core.case_source import case_source
+    from core.stub_server import StubServer
+    server = StubServer(fixtures=request.config.getoption("--stub-fixtures"),
+                        cases=case_source.get_cases(), port=0).start()
+    global_client.base_url = server.base_url
+    yield server
+    server.stop()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def get_global_token(stub_server):
     """会话级夹具：登录获取Token，全局生效"""
-    log.info(f"======= 开始登录【{BASE_URL}】=======")
-    login_client = HttpClient()
-    # 登录重试（3次）
-    for retry in range(3):
-        try:
-            # 发送登录请求
-            response = login_client.send_request("POST", LOGIN_URL, json=LOGIN_PARAMS)
-            # 断言登录成功
-            assert response.status_code == 200, f"登录状态码异常：{response.status_code}"
-            resp_json = response.json()
-            # 提取Token（根据公司接口返回调整，示例：{"data":{"token":"xxx"}}）
-            token = resp_json["data"]["token"]
-            assert token, "登录成功但无Token"
-
-            # 正确给全局实例添加Token（核心修复！）
-            global_client.session.headers["Authorization"] = token  # 替换为你的TOKEN_HEADER
-            log.info(f"======= 登录成功，Token：{token} =======")
-            return token
-        except Exception as e:
-            if retry == 2:
-                log.error(f"登录重试3次失败，终止测试：{str(e)}")
-                pytest.exit(f"登录失败：{str(e)}")
-            log.warning(f"登录重试{retry + 1}次失败：{str(e)}，1秒后重试")
-            time.sleep(1)
+    # 分片执行：父进程已登录，直接使用下发的Token
+    token = os.environ.get(ENV_TOKEN)
+    if token:
+        apply_token(global_client, token)
+        log.info("======= 使用父进程下发的Token，跳过登录 =======")
+        # 运行中Token失效时由工作进程自行刷新
+        global_client.token_manager = TokenManager(global_client.base_url)
+        global_client.token_manager.token = token
+        return token
+    # Token管理器：本地缓存未过期时跳过登录，运行中Token失效（401）时自动刷新
+    global_client.token_manager = TokenManager(global_client.base_url)
+    try:
+        token = global_client.token_manager.get(global_client)
+    except Exception as e:
+        log.error(f"登录失败，终止测试：{str(e)}")
+        pytest.exit(str(e))
+    # 正确给全局实例添加Token（核心修复！）
+    apply_token(global_client, token)
+    return token
 
 
 @pytest.fixture(scope="session", autouse=True)
-def session_fixture():
+def session_fixture(request):
     """测试会话开始/结束提示"""
     log.info("======= 接口自动化测试开始 =======")
     yield
-    log.info("======= 接口自动化测试结束 =======")
\ No newline at end of file
+    log.info(f"连接池统计：{pool_stats.snapshot()}")
+    if cassette.mode != "off":
+        log.info(f"录制/回放统计：{cassette.stats()}")
+        cassette.close()
+    write_latency_report(request.config)
+    write_worker_stats()
+    try:
+        # 在写执行历史、关闭追踪日志之前校验，失败结果能记到所属用例上
+        unowned = report_db_deferred(request.session)
+    finally:
+        db_pool.close()
+    case_history.flush()
+    case_history.close()
+    trace_sink.close()
+    if trace_sink.started:
+        log.info(f"追踪日志：{trace_sink.run_dir}（查询：python -m core.trace_query）")
+    log.info("======= 接口自动化测试结束 =======")
+    assert not unowned, f"DB延迟校验失败{len(unowned)}条：" + "；".join(unowned)
+
+
+def report_db_deferred(session):
+    """执行延迟的数据库断言，失败记到所属用例：按该用例的teardown错误报出（计入失败数和退出码），
+    并写入追踪日志和执行历史；返回找不到所属用例的失败信息"""
+    items = {}
+    for item in session.items:
+        case = _case_of(item)
+        if case is not None:
+            items[case.case_id] = item
+    unowned = []
+    for case_id, case_name, message in assert_utils.db_deferred_failures():
+        trace_sink.emit("db_assert", case_id=case_id, case_name=case_name, outcome="failed", message=message[:500])
+        case_history.mark_failed(case_id)
+        item = items.get(case_id)
+        if item is None:
+            unowned.append(message)
+            continue
+        report = pytest.TestReport(item.nodeid, item.location, {}, "failed", message, "teardown")
+        item.ihook.pytest_runtest_logreport(report=report)
+    return unowned
+
+
+def write_latency_report(config):
+    """输出耗时分位数报告（含重试/熔断统计）：JSON文件 + Allure附件 + Allure环境信息"""
+    path, report = latency_recorder.write_report()
+    summary = report["summary"]
+    allure.attach(json.dumps({"summary": summary, "over_budget": report["over_budget"]}, ensure_ascii=False, indent=2),
+                  name="接口耗时分位数", attachment_type=allure.attachment_type.JSON)
+    resilience_summary = resilience.summary()
+    allure.attach(json.dumps(resilience_summary, ensure_ascii=False, indent=2),
+                  name="重试/熔断统计", attachment_type=allure.attachment_type.JSON)
+    schema_summary = schema_registry.summary()
+    if schema_summary["schemas"]:
+        allure.attach(json.dumps(schema_summary, ensure_ascii=False, indent=2),
+                      name="结构校验耗时", attachment_type=allure.attachment_type.JSON)
+    results_dir = config.getoption("allure_report_dir", None)
+    if results_dir:
+        write_allure_environment(results_dir, summary,
+                                 [*resilience.environment_lines(), *schema_registry.environment_lines()])
+    for endpoint, stats in summary.items():
+        log.info(f"【耗时】{endpoint}：{stats}")
+    totals = transfer_totals(summary)
+    log.info(f"【传输】发送{totals['sent_wire']}字节（压缩前{totals['sent']}），"
+             f"接收{totals['received_wire']}字节（解压后{totals['received']}）")
+    if resilience_summary["retries"] or resilience_summary["breakers"]:
+        log.warning(f"【重试/熔断】重试{resilience_summary['retries']}次（重试后成功{resilience_summary['recovered']}次），"
+                    f"熔断节省约{resilience_summary['saved_s']}秒，接口状态：{resilience_summary['breakers']}")
+    for name, stats in schema_summary["schemas"].items():
+        log.info(f"【结构校验】{name}：{stats}")
+    if schema_summary["slowest"]:
+        log.info(f"【结构校验】{schema_summary['engine']}合计{schema_summary['total_ms']}ms，"
+                 f"最慢的用例：{schema_summary['slowest']}")
+    if report["over_budget"]:
+        log.warning(f"超出耗时预算的用例{len(report['over_budget'])}条：{report['over_budget']}")
+    log.info(f"耗时报告已生成：{path}")
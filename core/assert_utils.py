@@ -1,6 +1,9 @@
-import pymysql
-from config.db_config import DB_CONFIG
+from config.db_config import DB_ASSERT_DEFERRED
+from core.db_pool import db_pool, db_checker
+from core.json_assert import parse_json, parse_expectations, check_expectations
+from core.schema_assert import schema_registry, format_errors
 from core.logger import log
+from core.trace import current_case
 #无需修改：断言工具
 class AssertUtils:
     @staticmethod
@@ -11,28 +14,64 @@ class AssertUtils:
         log.info(f"状态码断言成功：{real_code} == {expect_code}")
 
     @staticmethod
-    def assert_json(response, key, expect_value):
-        """断言JSON字段值"""
+    def assert_json(response, key, expect_value, expectations=None):
+        """断言JSON字段值（key支持多层路径如data.list[0].id；多个字段用分号分隔，一次校验全部）
+        expectations为加载用例时已解析好的[(路径, 预期值)]，传了就不再解析key/expect_value"""
         try:
-            resp_json = response.json()
-            real_value = resp_json.get(key)
-            assert real_value == expect_value, f"字段断言失败：{key}预期{expect_value}，实际{real_value}"
-            log.info(f"字段断言成功：{key}={real_value}")
+            if expectations is None:
+                expectations = parse_expectations(key, expect_value)
+            passed, failed = check_expectations(parse_json(response), expectations)
+            assert not failed, "字段断言失败：" + "；".join(
+                f"{path}预期{expect}，实际{real}" for path, expect, real in failed)
+            for path, _, real in passed:
+                log.info(f"字段断言成功：{path}={real}")
         except Exception as e:
             log.error(f"JSON断言失败：{str(e)}")
             raise
 
     @staticmethod
-    def assert_db(sql, expect_value):
-        """数据库断言（可选）"""
+    def assert_schema(response, schema, case_name=None):
+        """按JSON Schema校验整个响应（Schema文件只编译一次，记录每次校验耗时）"""
+        try:
+            errors, ms = schema_registry.validate(schema, parse_json(response), case_name)
+            assert not errors, f"结构断言失败（{schema}）：{format_errors(errors)}"
+            log.info(f"结构断言成功：{schema}（校验耗时{ms:.2f}ms）")
+        except Exception as e:
+            log.error(f"Schema断言失败：{str(e)}")
+            raise
+
+    @staticmethod
+    def assert_stream(response, expect_size=None, expect_hash=None):
+        """流式响应断言：正文字节数（支持>=、<=、>、<前缀）和sha256（可只填前几位）"""
+        body = response.stream_body
+        try:
+            if expect_size not in (None, ""):
+                text = str(expect_size).strip()
+                operator = next((op for op in (">=", "<=", ">", "<") if text.startswith(op)), "==")
+                limit = int(float(text[len(operator):] if operator != "==" else text))
+                ok = {">=": body.size >= limit, "<=": body.size <= limit, ">": body.size > limit,
+                      "<": body.size < limit, "==": body.size == limit}[operator]
+                assert ok, f"正文大小断言失败：预期{operator}{limit}字节，实际{body.size}字节"
+                log.info(f"正文大小断言成功：{body.size}字节 {operator} {limit}")
+            if expect_hash:
+                expect_hash = str(expect_hash).strip().lower()
+                assert body.sha256.startswith(expect_hash), f"正文哈希断言失败：预期{expect_hash}，实际{body.sha256}"
+                log.info(f"正文哈希断言成功：sha256={body.sha256}")
+        except Exception as e:
+            log.error(f"流式断言失败：{str(e)}")
+            raise
+
+    @staticmethod
+    def assert_db(sql, expect_value, case_name=None):
+        """数据库断言（可选，开启延迟校验时只登记，运行结束统一校验）"""
         if not sql or not expect_value:
             return
+        if DB_ASSERT_DEFERRED:
+            db_checker.defer(sql, expect_value, case_name, current_case.get())
+            log.info(f"DB断言已登记，运行结束时统一校验：{sql}")
+            return
         try:
-            conn = pymysql.connect(**DB_CONFIG)
-            cursor = conn.cursor()
-            cursor.execute(sql)
-            result = cursor.fetchone()
-            conn.close()
+            result = db_pool.query_one(sql)
             real_value = result[0] if result else None
             assert real_value == expect_value, f"DB断言失败：预期{expect_value}，实际{real_value}"
             log.info(f"DB断言成功：{real_value} == {expect_value}")
@@ -40,5 +79,21 @@ class AssertUtils:
             log.error(f"数据库断言失败：{str(e)}")
             raise
 
+    @staticmethod
+    def db_deferred_failures():
+        """执行所有延迟的数据库断言，返回失败列表[(case_id, case_name, 失败信息)]"""
+        failures = []
+        for case_id, case_name, sql, expect_value, real_value in db_checker.flush():
+            message = f"DB断言失败：用例【{case_name}】（{case_id}）| {sql} | 预期{expect_value}，实际{real_value}"
+            log.error(message)
+            failures.append((case_id, case_name, message))
+        return failures
+
+    @staticmethod
+    def assert_db_deferred():
+        """执行所有延迟的数据库断言，有失败时汇总抛出（失败信息含所属用例ID）"""
+        failures = AssertUtils.db_deferred_failures()
+        assert not failures, f"DB延迟校验失败{len(failures)}条：" + "；".join(message for _, _, message in failures)
+
 # 全局实例
 assert_utils = AssertUtils()
\ No newline at end of file
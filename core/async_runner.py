@@ -0,0 +1,80 @@
+import asyncio
+import time
+from config.env_config import ASYNC_CONCURRENCY
+from core.case_flow import CaseGraph, FlowError, render_case, extract_values
+from core.http_client import AsyncHttpClient, http_client
+from core.logger import log
+from core.trace import current_case
+#无需修改：异步并发执行用例请求
+
+
+class CaseResult:
+    """单条用例的请求结果（响应或异常二选一）；context为该用例可见的链路变量（含本用例提取的）"""
+    __slots__ = ("case", "response", "error", "elapsed", "context")
+
+    def __init__(self, case, response=None, error=None, elapsed=0.0, context=None):
+        self.case = case
+        self.response = response
+        self.error = error
+        self.elapsed = elapsed
+        self.context = context or {}
+
+    def get_response(self):
+        """取响应，请求失败时抛出原异常"""
+        if self.error is not None:
+            raise self.error
+        return self.response
+
+
+class AsyncCaseRunner:
+    """并发执行用例请求，并发数受concurrency限制，总耗时取决于最慢的接口
+    用例间有${var}依赖时，每条用例等它依赖的用例完成后再发送，互不依赖的链路并发执行"""
+    def __init__(self, client=None, concurrency=ASYNC_CONCURRENCY):
+        self.client = AsyncHttpClient(client or http_client, concurrency)
+        self.concurrency = concurrency
+
+    async def _run_one(self, semaphore, graph, tasks, index):
+        case = graph.cases[index]
+        current_case.set(case.case_id)  # 每个任务有独立的上下文，互不影响
+        # 等待依赖的用例完成，取出本用例引用的变量
+        context = {}
+        for name, producer in graph.sources[index].items():
+            upstream = await tasks[producer]
+            if upstream.error is not None:
+                error = FlowError(f"依赖的用例【{upstream.case.case_name}】执行失败：{upstream.error}")
+                return CaseResult(case, error=error)
+            context[name] = upstream.context[name]
+        start = time.perf_counter()
+        try:
+            request = render_case(case, context) if context else case
+            async with semaphore:
+                start = time.perf_counter()
+                response = await self.client.send_request(request.method, request.url, request.params, request.json,
+                                                          case.case_name, case.stream, case.compress,
+                                                          request.expect_code)
+            context.update(extract_values(case, response))
+            return CaseResult(case, response=response, elapsed=time.perf_counter() - start, context=context)
+        except Exception as e:
+            return CaseResult(case, error=e, elapsed=time.perf_counter() - start, context=context)
+
+    async def run_async(self, cases):
+        """并发发送全部用例请求，返回与cases顺序一致的CaseResult列表"""
+        graph = CaseGraph(cases)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        tasks = [None] * len(graph.cases)
+        # 按拓扑顺序创建任务，保证等待依赖时对应任务已存在
+        for index in graph.order:
+            tasks[index] = asyncio.ensure_future(self._run_one(semaphore, graph, tasks, index))
+        return await asyncio.gather(*tasks)
+
+    def run(self, cases):
+        """同步入口：在新事件循环中执行"""
+        start = time.perf_counter()
+        try:
+            results = asyncio.run(self.run_async(cases))
+        finally:
+            self.client.close()
+        failed = sum(1 for r in results if r.error is not None)
+        log.info(f"异步执行完成：{len(results)}条用例，请求异常{failed}条，"
+                 f"并发数{self.concurrency}，总耗时{time.perf_counter() - start:.2f}秒")
+        return results
@@ -0,0 +1,137 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+import time
+from config.env_config import (LOGIN_URL, LOGIN_PARAMS, TOKEN_HEADER, TOKEN_PREFIX, TOKEN_CACHE, TOKEN_CACHE_PATH,
+                               TOKEN_TTL, TOKEN_EXPIRE_MARGIN, ENV_TOKEN_CACHE_PATH)
+from core.logger import log
+#无需修改：登录获取Token（本地缓存、401自动刷新）
+
+# 登录参数中表示账号的字段（按顺序取第一个存在的，用作缓存键）
+USER_FIELDS = ("username", "tel", "phone", "account", "email")
+
+
+def fetch_token(client, retries=3):
+    """登录获取(Token, 过期时间戳)（失败重试，全部失败抛出异常）"""
+    log.info(f"======= 开始登录【{client.base_url}】=======")
+    for retry in range(retries):
+        try:
+            # 发送登录请求
+            response = client.send_request("POST", LOGIN_URL, json=LOGIN_PARAMS)
+            # 断言登录成功
+            assert response.status_code == 200, f"登录状态码异常：{response.status_code}"
+            resp_json = response.json()
+            # 提取Token（根据公司接口返回调整，示例：{"data":{"token":"xxx"}}）
+            token = resp_json["data"]["token"]
+            assert token, "登录成功但无Token"
+            log.info(f"======= 登录成功，Token：{token} =======")
+            return token, token_expiry(token, resp_json["data"])
+        except Exception as e:
+            if retry == retries - 1:
+                log.error(f"登录重试{retries}次失败：{str(e)}")
+                raise Exception(f"登录失败：{str(e)}")
+            log.warning(f"登录重试{retry + 1}次失败：{str(e)}，1秒后重试")
+            time.sleep(1)
+
+
+def login(client, retries=3):
+    """登录获取Token（失败重试，全部失败抛出异常）"""
+    return fetch_token(client, retries)[0]
+
+
+def apply_token(client, token):
+    """给HttpClient实例的会话设置Token请求头"""
+    client.session.headers[TOKEN_HEADER] = token
+
+
+def token_expiry(token, data=None):
+    """推算Token过期时间戳：登录响应的expires_in/expire_time > JWT的exp > TOKEN_TTL"""
+    now = time.time()
+    data = data if isinstance(data, dict) else {}
+    for key in ("expires_in", "expiresIn"):
+        if isinstance(data.get(key), (int, float)):
+            return now + data[key]
+    for key in ("expire_time", "expireTime"):
+        if isinstance(data.get(key), (int, float)):
+            # 毫秒时间戳转秒
+            return data[key] / 1000 if data[key] > 1e12 else data[key]
+    parts = str(token).split(".")
+    if len(parts) == 3:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(parts[1] + "=" * (-len(parts[1]) % 4)))
+            if isinstance(payload.get("exp"), (int, float)):
+                return payload["exp"]
+        except (ValueError, AttributeError):
+            pass
+    return now + TOKEN_TTL
+
+
+class TokenManager:
+    """Token管理：按域名+账号缓存到本地文件，未过期直接复用；并发请求遇到401时只刷新一次"""
+    def __init__(self, base_url, cache_path=None, enabled=TOKEN_CACHE):
+        self.base_url = base_url
+        self.cache_path = cache_path or os.environ.get(ENV_TOKEN_CACHE_PATH) or TOKEN_CACHE_PATH
+        self.enabled = enabled
+        self.token = None
+        self.expires_at = 0
+        self.refreshes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def cache_key(self):
+        user = next((str(LOGIN_PARAMS[field]) for field in USER_FIELDS if field in LOGIN_PARAMS),
+                    json.dumps(LOGIN_PARAMS, sort_keys=True))
+        return hashlib.sha1(f"{self.base_url}|{user}".encode("utf-8")).hexdigest()
+
+    def _read_cache(self):
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_cache(self):
+        """先写临时文件再替换（顺带清理已过期的条目），避免多进程同时读到半个文件"""
+        now = time.time()
+        cache = {key: entry for key, entry in self._read_cache().items() if entry.get("expires_at", 0) > now}
+        cache[self.cache_key] = {"base_url": self.base_url, "token": self.token, "expires_at": self.expires_at}
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def _valid(self, expires_at):
+        return expires_at - TOKEN_EXPIRE_MARGIN > time.time()
+
+    def _login(self, client):
+        # 登录用独立客户端（不挂TokenManager，避免登录接口401时递归刷新）
+        login_client = type(client)(base_url=self.base_url)
+        self.token, self.expires_at = fetch_token(login_client)
+        if self.enabled:
+            self._write_cache()
+        return self.token
+
+    def get(self, client):
+        """取可用Token：内存 > 本地缓存 > 登录"""
+        with self._lock:
+            if self.token and self._valid(self.expires_at):
+                return self.token
+            if self.enabled:
+                entry = self._read_cache().get(self.cache_key)
+                if entry and self._valid(entry.get("expires_at", 0)):
+                    self.token, self.expires_at = entry["token"], entry["expires_at"]
+                    log.info(f"======= 使用本地缓存的Token，跳过登录（{int(self.expires_at - time.time())}秒后过期）=======")
+                    return self.token
+            return self._login(client)
+
+    def refresh(self, client, stale_token):
+        """接口返回401时刷新Token：stale_token是失败请求携带的Token，已被其他线程刷新过则直接复用"""
+        with self._lock:
+            if self.token and stale_token not in (self.token, TOKEN_PREFIX + self.token):
+                return self.token
+            log.warning("======= Token已失效，重新登录 =======")
+            self.refreshes += 1
+            return self._login(client)
@@ -0,0 +1,212 @@
+import heapq
+import json
+import re
+from core.json_assert import MISSING, MULTI_SEPARATOR, compile_path, parse_json
+#无需修改：用例链路（extract提取变量、${var}引用变量、按依赖关系排序/并发）
+
+# 变量引用：${token}
+VAR_RE = re.compile(r"\$\{(\w+)\}")
+# 会引用变量的列（请求和断言都可以用）
+RENDER_COLUMNS = ("url", "params", "json", "expect_value", "db_sql", "db_expect")
+
+
+class FlowError(Exception):
+    """用例链路配置错误（变量未定义、循环依赖）或执行时变量提取失败"""
+
+
+def parse_extract(text):
+    """解析extract列：token=data.token;uid=data.user.id → [(变量名, 编译后的路径)]"""
+    extracts = []
+    for item in MULTI_SEPARATOR.split(str(text or "")):
+        if not item.strip():
+            continue
+        name, sep, path = item.partition("=")
+        if not sep or not name.strip() or not path.strip():
+            raise FlowError(f"extract格式错误：{item}（应为 变量名=字段路径）")
+        extracts.append((name.strip(), compile_path(path.strip())))
+    return extracts
+
+
+def references(value):
+    """值中引用的变量名集合（递归dict/list）"""
+    if isinstance(value, str):
+        return set(VAR_RE.findall(value))
+    if isinstance(value, dict):
+        return set().union(*(references(v) for v in value.values())) if value else set()
+    if isinstance(value, (list, tuple)):
+        return set().union(*(references(v) for v in value)) if value else set()
+    return set()
+
+
+def render(value, context, case_name=None):
+    """替换${var}：整个值就是一个变量时保留原类型（数字、对象），否则按文本拼接"""
+    if isinstance(value, str):
+        whole = VAR_RE.fullmatch(value)
+        if whole:
+            return _lookup(context, whole.group(1), case_name)
+        return VAR_RE.sub(lambda m: str(_lookup(context, m.group(1), case_name)), value)
+    if isinstance(value, dict):
+        return {k: render(v, context, case_name) for k, v in value.items()}
+    if isinstance(value, list):
+        return [render(v, context, case_name) for v in value]
+    return value
+
+
+def _lookup(context, name, case_name):
+    if name not in context:
+        raise FlowError(f"用例【{case_name}】引用的变量${{{name}}}没有值（提取该变量的用例未执行或执行失败）")
+    return context[name]
+
+
+def render_case(case, context):
+    """返回替换变量后的用例（不引用变量的用例原样返回）；params/json里含变量的非法JSON文本在替换后再解析"""
+    if not case.references:
+        return case
+    changes = {}
+    for column in RENDER_COLUMNS:
+        value = getattr(case, column)
+        if value in (None, ""):
+            continue
+        changes[column] = render(value, context, case.case_name)
+        if column in ("params", "json") and isinstance(value, str) and isinstance(changes[column], str):
+            try:
+                changes[column] = json.loads(changes[column])
+            except ValueError:
+                pass
+    return case.replace(**changes)
+
+
+def extract_values(case, response):
+    """按extract列从响应中提取变量，字段不存在时报错"""
+    if not case.extract:
+        return {}
+    doc = parse_json(response)
+    values = {}
+    for name, path in case.extract:
+        value = path.get(doc)
+        if value is MISSING:
+            raise FlowError(f"用例【{case.case_name}】提取变量{name}失败：响应中没有字段{path.expr}")
+        values[name] = value
+    return values
+
+
+class CaseGraph:
+    """用例依赖图：引用${var}的用例依赖于提取var的用例（优先取表格中位置最近的前一个提取者）"""
+    def __init__(self, cases, known=()):
+        self.cases = list(cases)
+        self.deps = [set() for _ in self.cases]
+        # 每条用例引用的变量分别来自哪条用例：{变量名: 用例下标}
+        self.sources = [{} for _ in self.cases]
+        producers = {}
+        for index, case in enumerate(self.cases):
+            for name, _ in case.extract:
+                producers.setdefault(name, []).append(index)
+        for index, case in enumerate(self.cases):
+            for name in case.references:
+                if name in known:
+                    continue
+                candidates = [i for i in producers.get(name, ()) if i != index]
+                if not candidates:
+                    raise FlowError(f"用例【{case.case_name}】引用的变量${{{name}}}未定义（没有其他用例在extract列提取它）")
+                earlier = [i for i in candidates if i < index]
+                producer = earlier[-1] if earlier else candidates[0]
+                self.deps[index].add(producer)
+                self.sources[index][name] = producer
+        self.order = self._topological_order()
+
+    def _topological_order(self):
+        """拓扑排序（同层按表格顺序），存在循环依赖时报出环上的用例"""
+        pending = [len(deps) for deps in self.deps]
+        dependents = [[] for _ in self.cases]
+        for index, deps in enumerate(self.deps):
+            for dep in deps:
+                dependents[dep].append(index)
+        ready = [i for i, count in enumerate(pending) if count == 0]
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            index = heapq.heappop(ready)
+            order.append(index)
+            for dependent in dependents[index]:
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    heapq.heappush(ready, dependent)
+        if len(order) != len(self.cases):
+            cycle = self._find_cycle({i for i, count in enumerate(pending) if count > 0})
+            raise FlowError("用例存在循环依赖：" + " → ".join(f"【{self.cases[i].case_name}】" for i in cycle))
+        return order
+
+    def _find_cycle(self, remaining):
+        # 剩余节点都在环上或依赖环：沿依赖边走，第一次回到走过的节点即为环
+        node, path = min(remaining), []
+        while node not in path:
+            path.append(node)
+            node = min(dep for dep in self.deps[node] if dep in remaining)
+        return path[path.index(node):] + [node]
+
+    @property
+    def chained(self):
+        """是否存在依赖关系"""
+        return any(self.deps)
+
+    def ordered_cases(self):
+        """按依赖排好序的用例（串行执行时使用，没有依赖的用例保持表格顺序）"""
+        return [self.cases[i] for i in self.order]
+
+    def groups(self):
+        """按依赖链划分的连通分组（同一条链必须在同一个进程内执行），每组为表格下标列表"""
+        parent = list(range(len(self.cases)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for index, deps in enumerate(self.deps):
+            for dep in deps:
+                parent[find(index)] = find(dep)
+        groups = {}
+        for index in self.order:
+            groups.setdefault(find(index), []).append(index)
+        return sorted(groups.values(), key=lambda group: min(group))
+
+
+class FlowContext:
+    """串行执行时的变量上下文：每条用例引用的变量取自依赖图中绑定的提取者（与异步/分片执行一致，
+    同名变量被后执行的其他用例再次提取时不受影响）；values为各变量最近一次提取的值，供不在依赖图中的用例使用"""
+    def __init__(self, graph=None, initial=None):
+        self.values = dict(initial or {})
+        self.produced = {}         # {提取者case_id: {变量名: 值}}
+        self.bind(graph)
+
+    def bind(self, graph):
+        """切换依赖图（监听模式重新读取用例后调用），已提取的变量保留"""
+        self.graph = graph
+        self._index = {id(case): index for index, case in enumerate(graph.cases)} if graph is not None else {}
+
+    def variables(self, case):
+        """本用例可见的变量"""
+        index = self._index.get(id(case))
+        if index is None:
+            return self.values
+        context = dict(self.values)
+        for name, producer in self.graph.sources[index].items():
+            produced = self.produced.get(self.graph.cases[producer].case_id, {})
+            if name in produced:
+                context[name] = produced[name]
+            else:
+                # 绑定的提取者未执行或执行失败：按变量没有值报错，不取其他用例提取的同名变量
+                context.pop(name, None)
+        return context
+
+    def prepare(self, case):
+        """替换用例中的变量"""
+        return render_case(case, self.variables(case))
+
+    def collect(self, case, response):
+        """提取变量写入上下文，返回本次提取的变量"""
+        values = extract_values(case, response)
+        self.values.update(values)
+        self.produced.setdefault(case.case_id, {}).update(values)
+        return values
@@ -0,0 +1,137 @@
+import hashlib
+import os
+import sqlite3
+import statistics
+import threading
+import time
+from config.env_config import HISTORY_ENABLED, HISTORY_PATH, HISTORY_KEEP, HISTORY_FAIL_WINDOW, FAILED_FIRST, ENV_HISTORY_PATH
+from core.logger import log
+#无需修改：用例执行历史（耗时、结果），用于失败优先排序和按耗时分片
+
+# 没有历史记录时的预估耗时（秒）
+DEFAULT_DURATION = 1.0
+# 用于生成用例ID的列（Excel里有case_id列时直接用）
+ID_COLUMNS = ("module", "case_name", "method", "url")
+
+
+def case_id(case):
+    """稳定的用例ID：模块+用例名+方法+路径（改参数、调整行顺序都不变）"""
+    value = case.get("case_id")
+    if value:
+        return str(value)
+    raw = "|".join(str(case.get(column) or "") for column in ID_COLUMNS)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def iter_case_ids(cases):
+    """逐条写入case_id列（同名同路径的重复行追加序号区分），用于流式读取"""
+    seen = {}
+    for case in cases:
+        base = case_id(case)
+        seen[base] = seen.get(base, 0) + 1
+        case["case_id"] = base if seen[base] == 1 else f"{base}#{seen[base]}"
+        yield case
+
+
+class CaseHistory:
+    """执行历史（SQLite）：每条用例保留最近HISTORY_KEEP次的耗时和结果"""
+    def __init__(self, path=None, enabled=HISTORY_ENABLED):
+        self.path = path or os.environ.get(ENV_HISTORY_PATH) or HISTORY_PATH
+        self.enabled = enabled
+        self._pending = []
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _db(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn.execute("""CREATE TABLE IF NOT EXISTS runs (
+                case_id TEXT, finished_at REAL, duration REAL, outcome TEXT)""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_runs_case ON runs (case_id, finished_at)")
+            self._conn.commit()
+        return self._conn
+
+    def add(self, case_id, duration, outcome):
+        """记录一次执行结果（先缓存在内存，flush时一次写入）"""
+        if self.enabled:
+            with self._lock:
+                self._pending.append((case_id, time.time(), duration, outcome))
+
+    def mark_failed(self, case_id):
+        """把本次运行中该用例的结果改为失败（运行结束时才得出结论的校验，如延迟的数据库断言）"""
+        with self._lock:
+            self._pending = [(cid, finished_at, duration, "failed" if cid == case_id else outcome)
+                             for cid, finished_at, duration, outcome in self._pending]
+
+    def flush(self):
+        """写入本次运行的结果，并清理每条用例超出保留次数的旧记录"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return
+        db = self._db()
+        with db:
+            db.executemany("INSERT INTO runs VALUES (?, ?, ?, ?)", pending)
+            db.executemany("""DELETE FROM runs WHERE case_id = ? AND rowid NOT IN (
+                SELECT rowid FROM runs WHERE case_id = ? ORDER BY finished_at DESC LIMIT ?)""",
+                           [(cid, cid, HISTORY_KEEP) for cid in {row[0] for row in pending}])
+        log.info(f"执行历史已记录：{len(pending)}条（{self.path}）")
+
+    def load(self):
+        """读取全部历史：{case_id: [(耗时, 结果), ...]}，按时间从新到旧"""
+        if not self.enabled or not os.path.exists(self.path):
+            return {}
+        history = {}
+        with self._lock:
+            rows = self._db().execute(
+                "SELECT case_id, duration, outcome FROM runs ORDER BY finished_at DESC").fetchall()
+        for cid, duration, outcome in rows:
+            history.setdefault(cid, []).append((duration, outcome))
+        return history
+
+    @staticmethod
+    def durations(history):
+        """每条用例的预估耗时（最近几次通过时的中位数，没有通过记录时取全部记录）"""
+        estimates = {}
+        for cid, runs in history.items():
+            passed = [duration for duration, outcome in runs if outcome == "passed"]
+            estimates[cid] = statistics.median(passed or [duration for duration, _ in runs])
+        return estimates
+
+    @staticmethod
+    def recently_failed(history):
+        """最近HISTORY_FAIL_WINDOW次内失败过的用例ID"""
+        return {cid for cid, runs in history.items()
+                if any(outcome != "passed" for _, outcome in runs[:HISTORY_FAIL_WINDOW])}
+
+    def estimate(self, cases, history=None):
+        """按历史预估每条用例耗时（没有历史的用例取已知耗时的中位数）"""
+        estimates = self.durations(self.load() if history is None else history)
+        known = [estimates[case_id(case)] for case in cases if case_id(case) in estimates]
+        default = statistics.median(known) if known else DEFAULT_DURATION
+        return [estimates.get(case_id(case), default) for case in cases]
+
+    def prioritize(self, graph):
+        """最近失败过的用例所在的链路排在最前面（链路内部仍按依赖顺序），其余保持原顺序"""
+        if not FAILED_FIRST:
+            return graph.ordered_cases()
+        failed = self.recently_failed(self.load())
+        if not failed:
+            return graph.ordered_cases()
+        groups = graph.groups()
+        failing = [group for group in groups if any(case_id(graph.cases[i]) in failed for i in group)]
+        others = [group for group in groups if not any(case_id(graph.cases[i]) in failed for i in group)]
+        ordered = [graph.cases[i] for group in failing + others for i in group]
+        log.info(f"失败优先：{len(failing)}条链路（含最近失败的用例）提前执行")
+        return ordered
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# 全局实例
+case_history = CaseHistory()
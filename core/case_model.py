@@ -0,0 +1,187 @@
+import html
+import json
+from core.case_flow import RENDER_COLUMNS, FlowError, parse_extract, references
+from core.compression import request_encoding
+from core.json_assert import WILDCARD, compile_path, parse_expectations
+from core.schema_assert import schema_registry
+from core.streaming import StreamSpec
+#无需修改：编译后的用例对象（加载时解析、校验一次，执行时直接取属性）
+
+HTTP_METHODS = ("GET", "POST", "PUT", "DELETE", "PATCH", "HEAD", "OPTIONS")
+# 校验失败时最多列出的错误条数（其余只计数）
+MAX_REPORTED_ERRORS = 50
+
+
+class CaseError(Exception):
+    """用例数据错误（加载时校验，汇总全部错误用例后一次报出）"""
+
+
+class Case:
+    """编译后的用例（只读）：params/json已解析，断言预期和extract已解析，Allure描述已拼好
+    属性名与用例表列名一致，get(列名)兼容按列取值"""
+    __slots__ = ("case_id", "case_name", "module", "level", "method", "url", "params", "json", "expect_code",
+                 "expect_key", "expect_value", "expectations", "expect_schema", "db_sql", "db_expect", "extract", "references",
+                 "stream", "compress", "latency_budget_ms", "expect_size", "expect_hash", "weight", "description")
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields.get(name))
+        if self.description is None:
+            object.__setattr__(self, "description", describe(self))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"用例对象只读，不能修改{name}（需要变更时用replace生成新用例）")
+
+    def __getstate__(self):
+        """pickle/copy时按字段保存（分片、多进程传递用例）"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        """pickle/copy恢复字段（绕过只读限制）"""
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+    def __repr__(self):
+        return f"Case({self.case_name!r}, {self.method} {self.url})"
+
+    def get(self, column, default=None):
+        """按列名取值（与原来的用例字典用法一致）"""
+        value = getattr(self, column, None)
+        return default if value is None else value
+
+    def replace(self, **changes):
+        """返回修改了部分字段的新用例（描述和断言预期按新值重新生成）"""
+        fields = {name: getattr(self, name) for name in self.__slots__}
+        fields.update(changes, description=None)
+        if "expect_key" in changes or "expect_value" in changes:
+            fields["expectations"] = expectations_of(fields["expect_key"], fields["expect_value"])
+        return Case(**fields)
+
+
+def expectations_of(expect_key, expect_value):
+    """解析expect_key/expect_value（两列都有值时才断言，与原来的判断一致）"""
+    if not (expect_key and expect_value):
+        return ()
+    return tuple(parse_expectations(expect_key, expect_value))
+
+
+def describe(case):
+    """Allure用例描述"""
+    e = lambda value: html.escape(str(value))
+    return (f"<h3>接口信息</h3><p>请求方法：{e(case.method)}</p><p>接口路径：{e(case.url)}</p>"
+            f"<p>请求参数：params={e(case.params)} | json={e(case.json)}</p>"
+            f"<h3>断言信息</h3><p>预期状态码：{e(case.expect_code)}</p>"
+            f"<p>预期字段：{e(case.expect_key)} = {e(case.expect_value)}</p>"
+            f"<p>响应结构：{e(case.expect_schema)}</p>"
+            f"<p>数据库校验：{e(case.db_sql)} → {e(case.db_expect)}</p>")
+
+
+def _number(row, column, problems, cast=float):
+    value = row.get(column)
+    if value in (None, ""):
+        return None
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        problems.append(f"{column}不是数字：{value}")
+        return None
+
+
+def _size_limit(value):
+    """expect_size列：字节数，可带>=、<=、>、<前缀"""
+    return float(str(value).strip().lstrip("<>="))
+
+
+def _payload(row, column, problems):
+    """params/json列：已由用例来源解析成对象；仍是文本说明JSON非法（含${var}的等替换后再解析）"""
+    value = row.get(column)
+    if value in (None, ""):
+        return None
+    if isinstance(value, str) and not references(value):
+        try:
+            value = json.loads(value)
+        except ValueError as e:
+            problems.append(f"{column}不是合法的JSON：{str(e)}")
+            return None
+    if column == "params" and not isinstance(value, (dict, str)):
+        problems.append(f"params应为JSON对象，实际为{type(value).__name__}")
+    return value or None
+
+
+def compile_case(row):
+    """把一行用例数据编译成Case，数据有误时抛出CaseError（列出该行全部问题）"""
+    problems = []
+    refs = frozenset().union(*(references(row.get(column)) for column in RENDER_COLUMNS))
+    method = str(row.get("method") or "").strip().upper()
+    if method not in HTTP_METHODS:
+        problems.append(f"method无效：{row.get('method')}" if method else "缺少method")
+    url = row.get("url")
+    if not url or not isinstance(url, str):
+        problems.append("缺少url")
+    params = _payload(row, "params", problems)
+    json_data = _payload(row, "json", problems)
+    expect_code = _number(row, "expect_code", problems, int) or 200
+    if not 100 <= expect_code <= 599:
+        problems.append(f"expect_code不是有效的状态码：{expect_code}")
+
+    expectations = ()
+    try:
+        # 预期值里引用了变量时，替换后再解析
+        if not references(row.get("expect_value")):
+            expectations = expectations_of(row.get("expect_key"), row.get("expect_value"))
+    except ValueError as e:
+        problems.append(str(e))
+    expect_schema = str(row.get("expect_schema") or "").strip() or None
+    if expect_schema:
+        # 加载用例时即编译Schema（每个文件只编译一次），文件缺失/有误随用例数据错误一起报出
+        try:
+            schema_registry.get(expect_schema)
+        except ValueError as e:
+            problems.append(str(e))
+    try:
+        extract = tuple(parse_extract(row.get("extract")))
+    except FlowError as e:
+        problems.append(str(e))
+        extract = ()
+    try:
+        stream = StreamSpec.from_case(row)
+        if stream is not None and stream.records_path and WILDCARD in compile_path(stream.records_path).steps:
+            problems.append(f"stream_records不支持通配符：{stream.records_path}")
+    except ValueError as e:
+        problems.append(f"stream_records格式错误：{str(e)}")
+        stream = None
+    compress = row.get("compress")
+    try:
+        request_encoding(url, compress)
+    except ValueError as e:
+        problems.append(str(e))
+    weight = _number(row, "weight", problems)
+    if weight is not None and weight < 0:
+        problems.append(f"weight不能为负数：{weight}")
+    latency_budget_ms = _number(row, "latency_budget_ms", problems)
+    _number(row, "expect_size", problems, _size_limit)
+
+    if problems:
+        raise CaseError("；".join(problems))
+    return Case(
+        case_id=row.get("case_id"), case_name=row.get("case_name"), module=row.get("module") or "默认模块",
+        level=row.get("level") or "normal", method=method, url=url, params=params, json=json_data,
+        expect_code=expect_code, expect_key=row.get("expect_key"), expect_value=row.get("expect_value"),
+        expectations=expectations, expect_schema=expect_schema, db_sql=row.get("db_sql"), db_expect=row.get("db_expect"), extract=extract,
+        references=refs, stream=stream, compress=compress or None, latency_budget_ms=latency_budget_ms,
+        expect_size=row.get("expect_size"), expect_hash=row.get("expect_hash"),
+        weight=1.0 if weight is None else weight)
+
+
+def compile_cases(rows):
+    """逐条编译用例（流式），有错误的用例跳过并记录，全部读完后一次报出所有错误"""
+    errors = []
+    for number, row in enumerate(rows, 1):
+        try:
+            yield compile_case(row)
+        except CaseError as e:
+            errors.append(f"第{number}条【{row.get('case_name')}】：{str(e)}")
+    if errors:
+        listed = "\n".join(errors[:MAX_REPORTED_ERRORS])
+        more = f"\n……另有{len(errors) - MAX_REPORTED_ERRORS}条" if len(errors) > MAX_REPORTED_ERRORS else ""
+        raise CaseError(f"用例数据校验失败，共{len(errors)}条用例有误（未发送任何请求）：\n{listed}{more}")
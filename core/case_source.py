@@ -0,0 +1,221 @@
+import csv
+import glob
+import json
+import os
+import re
+import yaml
+from yaml.composer import Composer
+from yaml.constructor import SafeConstructor
+from yaml.resolver import Resolver
+from config.env_config import BASE_DIR, CASE_FILES, ENV_CASE_FILE
+from core.case_history import iter_case_ids
+from core.case_model import compile_cases
+from core.logger import log
+#无需修改：用例来源（Excel/YAML/CSV/JSONL，逐条流式读取，支持通配符加载多个文件）
+
+# 用例文件目录（相对路径都基于它）
+CASE_DIR = os.path.join(BASE_DIR, "test_data")
+# 需要预先解析成dict的JSON列
+JSON_COLUMNS = ("params", "json")
+# CSV里看起来是数字的单元格按数字处理（与Excel单元格类型一致）；有前导0的保留文本
+INT_RE = re.compile(r"-?(0|[1-9]\d*)")
+FLOAT_RE = re.compile(r"-?(0|[1-9]\d*)\.\d+")
+
+
+try:
+    from yaml.cyaml import CParser
+except ImportError:  # PyYAML没有编译libyaml时用纯Python解析（约慢8倍）
+    CParser = None
+
+
+if CParser is not None:
+    class _YamlStreamLoader(CParser, Composer, SafeConstructor, Resolver):
+        """libyaml解析事件 + 逐节点构造（CSafeLoader只能整篇文档构造）"""
+        def __init__(self, stream):
+            CParser.__init__(self, stream)
+            Composer.__init__(self)
+            SafeConstructor.__init__(self)
+            Resolver.__init__(self)
+else:
+    _YamlStreamLoader = yaml.SafeLoader
+
+
+def decode_case(case):
+    """预先解析params/json列，非法JSON保留原文（执行时再报错）"""
+    for column in JSON_COLUMNS:
+        value = case.get(column)
+        if isinstance(value, str) and value:
+            try:
+                case[column] = json.loads(value)
+            except ValueError:
+                pass
+    return case
+
+
+class CaseSource:
+    """用例来源基类：iter_cases逐条产出用例字典（不整体加载文件），stream/get_cases产出编译后的Case"""
+    def __init__(self, file_path):
+        self.file_path = file_path
+        if not os.path.exists(self.file_path):
+            raise FileNotFoundError(f"用例文件不存在：{self.file_path}")
+
+    @property
+    def name(self):
+        return os.path.basename(self.file_path)
+
+    def iter_cases(self):
+        raise NotImplementedError
+
+    def stream(self):
+        """逐条产出编译好的用例（调用方边读边筛选时不必先把全部用例放进内存）；
+        有数据错误的用例全部读完后一次报出"""
+        count = 0
+        try:
+            for case in compile_cases(iter_case_ids(self.iter_cases())):
+                count += 1
+                yield case
+        except Exception as e:
+            log.error(f"读取用例失败（{self.name}）：{str(e)}")
+            raise
+        log.info(f"成功读取{count}条用例（{self.name}）")
+
+    def get_cases(self):
+        """读取全部用例，返回Case列表"""
+        return list(self.stream())
+
+
+class JsonlCaseSource(CaseSource):
+    """JSON Lines：每行一条用例（空行和#开头的行跳过）"""
+    def iter_cases(self):
+        with open(self.file_path, encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                try:
+                    case = json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"第{number}行不是合法的JSON：{str(e)}")
+                if not isinstance(case, dict):
+                    raise ValueError(f"第{number}行应为JSON对象")
+                yield decode_case(case)
+
+
+class CsvCaseSource(CaseSource):
+    """CSV：首行为表头（与Excel列名一致），空单元格为None"""
+    def iter_cases(self):
+        # utf-8-sig：兼容Excel另存为CSV时带的BOM
+        with open(self.file_path, encoding="utf-8-sig", newline="") as f:
+            for row in csv.DictReader(f):
+                if not any(row.values()):  # 跳过空行
+                    continue
+                yield decode_case({key: self._cell(value) for key, value in row.items() if key})
+
+    @staticmethod
+    def _cell(value):
+        if value is None or value == "":
+            return None
+        if INT_RE.fullmatch(value):
+            return int(value)
+        if FLOAT_RE.fullmatch(value):
+            return float(value)
+        return value
+
+
+class YamlCaseSource(CaseSource):
+    """YAML：文档为用例列表，或每个文档（---分隔）一条用例；列表按元素逐条构造，不整体加载"""
+    def iter_cases(self):
+        with open(self.file_path, encoding="utf-8") as f:
+            loader = _YamlStreamLoader(f)
+            try:
+                loader.get_event()  # StreamStart
+                while not loader.check_event(yaml.StreamEndEvent):
+                    loader.get_event()  # DocumentStart
+                    if loader.check_event(yaml.SequenceStartEvent):
+                        loader.get_event()
+                        while not loader.check_event(yaml.SequenceEndEvent):
+                            yield self._case(loader, loader.compose_node(None, None))
+                        loader.get_event()
+                    elif not loader.check_event(yaml.DocumentEndEvent):
+                        # 整个文档是一条用例（空文档跳过）
+                        node = loader.compose_node(None, None)
+                        if not (isinstance(node, yaml.ScalarNode) and node.value == ""):
+                            yield self._case(loader, node)
+                    loader.get_event()  # DocumentEnd
+                    loader.anchors = {}
+            finally:
+                loader.dispose()
+
+    @staticmethod
+    def _case(loader, node):
+        case = loader.construct_object(node, deep=True)
+        # 构造缓存按节点保存，逐条清掉避免随用例数增长
+        loader.constructed_objects = {}
+        if not isinstance(case, dict):
+            raise ValueError(f"第{node.start_mark.line + 1}行：用例应为键值对，实际为{type(case).__name__}")
+        return decode_case(case)
+
+
+def open_source(file_path):
+    """按扩展名选择用例读取方式"""
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext in (".xlsx", ".xlsm"):
+        from core.excel_reader import ExcelReader  # 延迟导入：ExcelReader依赖本模块
+        return ExcelReader(file_path)
+    if ext in (".yaml", ".yml"):
+        return YamlCaseSource(file_path)
+    if ext == ".csv":
+        return CsvCaseSource(file_path)
+    if ext in (".jsonl", ".ndjson"):
+        return JsonlCaseSource(file_path)
+    raise ValueError(f"不支持的用例文件类型：{file_path}（支持xlsx/yaml/csv/jsonl）")
+
+
+def resolve_files(patterns):
+    """解析用例文件配置：逗号分隔多个，支持通配符（cases/**/*.yaml），相对路径基于test_data目录；按文件名排序"""
+    files = []
+    for pattern in str(patterns).split(","):
+        pattern = pattern.strip()
+        if not pattern:
+            continue
+        path = os.path.join(CASE_DIR, pattern)
+        if any(char in pattern for char in "*?["):
+            matched = sorted(glob.glob(path, recursive=True))
+            if not matched:
+                log.warning(f"用例文件通配符没有匹配到文件：{pattern}")
+            files.extend(matched)
+        else:
+            files.append(path)
+    if not files:
+        raise FileNotFoundError(f"没有找到用例文件：{patterns}")
+    return files
+
+
+class CaseSources(CaseSource):
+    """按配置加载一个或多个用例文件（CASE_FILES，环境变量API_AUTO_CASE_FILE可覆盖），按文件顺序逐个打开读取"""
+    def __init__(self, patterns=None):
+        self.patterns = patterns or os.environ.get(ENV_CASE_FILE) or CASE_FILES
+        self.files = resolve_files(self.patterns)
+        for path in self.files:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"用例文件不存在：{path}")
+        self.file_path = self.files[0] if len(self.files) == 1 else str(self.patterns)
+
+    @property
+    def name(self):
+        return os.path.basename(self.file_path) if len(self.files) == 1 else f"{len(self.files)}个文件"
+
+    def iter_cases(self):
+        for path in self.files:
+            try:
+                yield from open_source(path).iter_cases()
+            except (ValueError, yaml.YAMLError) as e:
+                if len(self.files) == 1:
+                    raise
+                # 多个文件时在错误里带上出错的文件（test_data下的文件显示相对路径）
+                name = os.path.relpath(path, CASE_DIR)
+                raise ValueError(f"{path if name.startswith('..') else name}：{str(e)}") from e
+
+
+# 全局实例
+case_source = CaseSources()
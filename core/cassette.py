@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import timedelta
+from urllib.parse import urlencode
+import requests
+from requests.structures import CaseInsensitiveDict
+from config.env_config import BASE_DIR, CASSETTE_MODE, CASSETTE_STRICT, CASSETTE_NAME, ENV_CASSETTE
+from core.logger import log
+#无需修改：请求录制/回放（离线快速调试）
+
+CASSETTE_DIR = os.path.join(BASE_DIR, "test_data", "cassettes")
+# 不需要录制的响应头（回放时由requests重新计算或无意义）
+SKIP_HEADERS = {"content-encoding", "transfer-encoding", "content-length", "connection", "date"}
+
+
+def cassette_key(method, path, params=None, json_data=None):
+    """规范化请求生成索引键：方法大写、参数排序、JSON按key排序（不含域名和Token）"""
+    query = urlencode(sorted((str(k), str(v)) for k, v in (params or {}).items()))
+    body = json.dumps(json_data, sort_keys=True, ensure_ascii=False, separators=(",", ":")) if json_data is not None else ""
+    raw = "\n".join((method.upper(), path, query, body))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class CassetteMiss(Exception):
+    """严格回放模式下未找到录制的响应"""
+
+
+class Cassette:
+    """录制文件（SQLite，按规范化请求键建主键索引）"""
+    def __init__(self, name=CASSETTE_NAME, mode=None, strict=CASSETTE_STRICT):
+        self.mode = mode or os.environ.get(ENV_CASSETTE) or CASSETTE_MODE
+        self.strict = strict
+        self.path = os.path.join(CASSETTE_DIR, f"{name}.sqlite3")
+        self.hits = self.misses = self.recorded = 0
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @property
+    def recording(self):
+        return self.mode == "record"
+
+    @property
+    def replaying(self):
+        return self.mode == "replay"
+
+    def _db(self):
+        if self._conn is None:
+            os.makedirs(CASSETTE_DIR, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._conn.execute("""CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY, method TEXT, path TEXT, status INTEGER, reason TEXT,
+                headers TEXT, body BLOB, recorded_at REAL)""")
+            self._conn.commit()
+        return self._conn
+
+    def lookup(self, method, path, params=None, json_data=None):
+        """查找录制的(status, reason, headers, body)，不计入命中统计"""
+        key = cassette_key(method, path, params, json_data)
+        with self._lock:
+            row = self._db().execute(
+                "SELECT status, reason, headers, body FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        status, reason, headers, body = row
+        return status, reason, json.loads(headers), body
+
+    def replay(self, method, path, params=None, json_data=None):
+        """按请求查找录制的响应；未命中返回None（严格模式抛出CassetteMiss）"""
+        row = self.lookup(method, path, params, json_data)
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if row is None:
+            if self.strict:
+                raise CassetteMiss(f"回放未命中：{method.upper()} {path} params={params} json={json_data}")
+            log.warning(f"回放未命中，改为真实请求：{method.upper()} {path}")
+            return None
+        status, reason, headers, body = row
+        response = requests.Response()
+        response.status_code = status
+        response.reason = reason
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = body
+        response._content_consumed = True  # 流式读取（iter_content）时直接切分已有正文
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.url = path
+        response.elapsed = timedelta(0)
+        return response
+
+    def record(self, method, path, params, json_data, response):
+        """录制一次请求/响应（同一请求重复录制时覆盖）"""
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in SKIP_HEADERS}
+        with self._lock:
+            db = self._db()
+            db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (
+                cassette_key(method, path, params, json_data), method.upper(), path, response.status_code,
+                response.reason, json.dumps(headers), response.content, time.time()))
+            db.commit()
+            self.recorded += 1
+
+    def stats(self):
+        return {"mode": self.mode, "hits": self.hits, "misses": self.misses, "recorded": self.recorded}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# 全局实例
+cassette = Cassette()
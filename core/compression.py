@@ -0,0 +1,76 @@
+import gzip
+import json
+import zlib
+from config.env_config import (COMPRESS_REQUEST, COMPRESS_ENDPOINTS, COMPRESS_ENCODING, COMPRESS_LEVEL,
+                               COMPRESS_MIN_BYTES)
+#无需修改：请求正文压缩（gzip/deflate）与传输字节统计
+
+ENCODINGS = ("gzip", "deflate")
+TRUE_VALUES = ("1", "true", "yes", "y", "是")
+FALSE_VALUES = ("0", "false", "no", "n", "off", "否")
+
+
+def compress(data, encoding, level=COMPRESS_LEVEL):
+    """按Content-Encoding压缩（deflate为HTTP约定的zlib格式）"""
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=level, mtime=0)
+    if encoding == "deflate":
+        return zlib.compress(data, level)
+    raise ValueError(f"不支持的压缩方式：{encoding}（只支持{'/'.join(ENCODINGS)}）")
+
+
+def decompress(data, encoding):
+    """按Content-Encoding解压（替身服务解析压缩的请求正文用），未压缩原样返回"""
+    encoding = (encoding or "").strip().lower()
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    if encoding == "deflate":
+        try:
+            return zlib.decompress(data)
+        except zlib.error:
+            # 部分客户端发送不带zlib头的原始deflate
+            return zlib.decompress(data, -zlib.MAX_WBITS)
+    return data
+
+
+def request_encoding(path, column=None):
+    """请求正文的压缩方式：Excel的compress列优先，其次COMPRESS_ENDPOINTS按接口配置，最后COMPRESS_REQUEST；None不压缩"""
+    value = str(column or "").strip().lower()
+    if value:
+        if value in FALSE_VALUES:
+            return None
+        if value in TRUE_VALUES:
+            return COMPRESS_ENCODING
+        if value in ENCODINGS:
+            return value
+        raise ValueError(f"compress列只支持gzip/deflate/true/false：{column}")
+    if path in COMPRESS_ENDPOINTS:
+        return COMPRESS_ENDPOINTS[path] or None
+    return COMPRESS_ENCODING if COMPRESS_REQUEST else None
+
+
+def encode_json(json_data, encoding):
+    """序列化JSON请求正文（与requests的json=参数一致）并压缩，返回(正文, 实际压缩方式, 压缩前字节数)
+    正文小于COMPRESS_MIN_BYTES时不压缩，压缩方式返回None"""
+    body = json.dumps(json_data, allow_nan=False).encode("utf-8")
+    if encoding is None or len(body) < COMPRESS_MIN_BYTES:
+        return body, None, len(body)
+    return compress(body, encoding), encoding, len(body)
+
+
+def body_size(body):
+    """请求正文字节数（requests准备好的正文可能是str或bytes）"""
+    if body is None:
+        return 0
+    return len(body.encode("utf-8")) if isinstance(body, str) else len(body)
+
+
+def wire_size(response, decoded):
+    """响应正文实际传输的字节数（解压前）：取urllib3从连接读取的字节数；回放的响应没有连接，按解压后字节数计"""
+    tell = getattr(response.raw, "tell", None)
+    if tell is None:
+        return decoded
+    try:
+        return tell()
+    except Exception:
+        return decoded
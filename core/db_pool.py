@@ -0,0 +1,176 @@
+import queue
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from config.db_config import DB_CONFIG, DB_ADAPTER, SQLITE_PATH, DB_POOL_SIZE, DB_BATCH_SIZE, DB_IDLE_CHECK
+from core.logger import log
+#无需修改：数据库连接池 + 批量校验
+
+
+class MySQLAdapter:
+    """公司MySQL（pymysql，占位符%s）"""
+    placeholder = "%s"
+
+    def connect(self):
+        import pymysql  # 延迟导入：不做数据库断言时不需要
+        return pymysql.connect(**DB_CONFIG)
+
+    def ping(self, conn):
+        conn.ping(reconnect=True)
+
+
+class SQLiteAdapter:
+    """本地替身（sqlite3，占位符?），用于没有MySQL时调试/自测数据库断言"""
+    placeholder = "?"
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+
+    def connect(self):
+        return sqlite3.connect(self.path, check_same_thread=False, uri=self.path.startswith("file:"))
+
+    def ping(self, conn):
+        conn.execute("SELECT 1")
+
+
+ADAPTERS = {"mysql": MySQLAdapter, "sqlite": SQLiteAdapter}
+# 转换占位符时按顺序匹配：引号/反引号内的文本、%%、参数占位符%s（只有最后一种会被替换）
+PARAM_RE = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`|%%|%s")
+
+
+@lru_cache(maxsize=512)
+def prepare(sql, placeholder="%s"):
+    """规范化SQL文本（去掉首尾空白和分号、转换占位符），相同语句只处理一次
+    同一条参数化语句文本不变，驱动端的语句缓存（如sqlite3）也能命中"""
+    sql = sql.strip().rstrip(";").strip()
+    if placeholder == "%s":
+        return sql
+    # 引号内的%s、%%原样保留（不带参数执行时驱动不做%格式化，%无需转义）
+    return PARAM_RE.sub(lambda m: placeholder if m.group() == "%s" else m.group(), sql)
+
+
+class DBPool:
+    """线程安全的数据库连接池：连接用完归还复用，出异常的连接直接丢弃"""
+    def __init__(self, adapter=None, size=DB_POOL_SIZE):
+        self.adapter = adapter or ADAPTERS[DB_ADAPTER]()
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self.created = 0
+
+    @contextmanager
+    def connection(self):
+        """借出一个连接（池满时阻塞等待）"""
+        self._slots.acquire()
+        conn = None
+        try:
+            conn = self._checkout()
+            yield conn
+            self._idle.put((conn, time.monotonic()))
+        except Exception:
+            if conn is not None:
+                self._close(conn)
+            raise
+        finally:
+            self._slots.release()
+
+    def _checkout(self):
+        while True:
+            try:
+                conn, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                self.created += 1
+                return self.adapter.connect()
+            # 空闲较久的连接先探活，避免被服务端断开
+            if time.monotonic() - last_used < DB_IDLE_CHECK:
+                return conn
+            try:
+                self.adapter.ping(conn)
+                return conn
+            except Exception:
+                self._close(conn)
+
+    @staticmethod
+    def _close(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def query_one(self, sql, args=None):
+        """执行查询，返回第一行（无结果返回None）"""
+        with self.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                # 没有参数时不传args：pymysql只在有参数时做%格式化，LIKE 'ab%'这类语句原样执行
+                if args:
+                    cursor.execute(prepare(sql, self.adapter.placeholder), args)
+                else:
+                    cursor.execute(prepare(sql, self.adapter.placeholder))
+                return cursor.fetchone()
+            finally:
+                cursor.close()
+
+    def query_scalars(self, sqls):
+        """多条标量查询合并成一次往返：SELECT (sql1), (sql2), ...，返回每条的第一列值"""
+        merged = ", ".join(f"({prepare(sql, self.adapter.placeholder)})" for sql in sqls)
+        row = self.query_one(f"SELECT {merged}")
+        return list(row) if row else [None] * len(sqls)
+
+    def close(self):
+        """关闭所有空闲连接"""
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._close(conn)
+
+
+class DBChecker:
+    """延迟数据库校验：执行用例时只登记db_sql/db_expect，运行结束时分批合并查询"""
+    def __init__(self, pool, batch_size=DB_BATCH_SIZE):
+        self.pool = pool
+        self.batch_size = batch_size
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def defer(self, sql, expect_value, case_name=None, case_id=None):
+        with self._lock:
+            self._pending.append((case_id, case_name, sql, expect_value))
+
+    def flush(self):
+        """执行所有登记的校验，返回失败列表[(case_id, case_name, sql, 预期, 实际或异常)]"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return []
+        failures = []
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            try:
+                values = self.pool.query_scalars([sql for _, _, sql, _ in batch])
+            except Exception as e:
+                # 合并查询失败（如某条语句返回多行/语法错误），退回逐条查询定位问题
+                log.warning(f"DB批量校验失败，改为逐条执行：{str(e)}")
+                values = [self._query_single(sql) for _, _, sql, _ in batch]
+            for (case_id, case_name, sql, expect_value), real_value in zip(batch, values):
+                if isinstance(real_value, Exception) or real_value != expect_value:
+                    failures.append((case_id, case_name, sql, expect_value, real_value))
+        log.info(f"DB延迟校验完成：共{len(pending)}条，失败{len(failures)}条")
+        return failures
+
+    def _query_single(self, sql):
+        try:
+            row = self.pool.query_one(sql)
+            return row[0] if row else None
+        except Exception as e:
+            return e
+
+
+# 全局实例（首次查询时才建立连接）
+db_pool = DBPool()
+db_checker = DBChecker(db_pool)
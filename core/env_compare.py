@@ -0,0 +1,249 @@
+import html
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config.env_config import BASE_DIR, ENVIRONMENTS, ASYNC_CONCURRENCY, POOL_MAXSIZE, COMPARE_SLOWER_RATIO
+from core.async_runner import AsyncCaseRunner
+from core.auth import TokenManager, apply_token
+from core.cassette import cassette
+from core.http_client import HttpClient
+from core.http_pool import PooledAdapter
+from core.json_assert import parse_json, check_expectations
+from core.latency import percentile
+from core.logger import log
+from core.schema_assert import schema_registry, format_errors
+#无需修改：多环境对比（同一批用例并发请求多个环境，对比状态码、断言结果和各接口耗时）
+
+REPORT_PATH = os.path.join(BASE_DIR, "reports", "env-compare.json")
+HTML_PATH = os.path.join(BASE_DIR, "reports", "env-compare.html")
+OUTCOME_COLORS = {"passed": "#97cc64", "failed": "#fd5a3e", "error": "#d35ebe"}
+
+
+def resolve_environments(spec=None):
+    """解析--envs：逗号分隔的环境名称（见ENVIRONMENTS）或域名，all/不传为全部；返回[(名称, 域名)]，第一个为基准"""
+    names = list(ENVIRONMENTS) if not spec or spec == "all" else [n.strip() for n in spec.split(",") if n.strip()]
+    envs = []
+    for name in names:
+        if name in ENVIRONMENTS:
+            envs.append((name, ENVIRONMENTS[name].rstrip("/")))
+        elif name.startswith(("http://", "https://")):
+            envs.append((name, name.rstrip("/")))
+        else:
+            raise Exception(f"未配置的环境：{name}（可选：{'、'.join(ENVIRONMENTS)}，或直接填域名）")
+    if len(envs) < 2:
+        raise Exception("多环境对比至少需要两个环境")
+    if len({base_url for _, base_url in envs}) < len(envs):
+        raise Exception(f"对比的环境域名重复：{envs}")
+    return envs
+
+
+def evaluate(case, result):
+    """单条用例在某个环境的结果：状态码、是否通过（状态码+字段断言+结构断言）、耗时毫秒"""
+    if result.error is not None:
+        return {"status": None, "outcome": "error", "ms": round(result.elapsed * 1000, 1), "message": str(result.error)}
+    response = result.response
+    timing = getattr(response, "timing", None)
+    ms = timing.total * 1000 if timing is not None else result.elapsed * 1000
+    problems = []
+    if response.status_code != case.expect_code:
+        problems.append(f"状态码预期{case.expect_code}，实际{response.status_code}")
+    elif case.expectations:
+        # 预期值引用了链路变量的用例（加载时未解析预期）只对比状态码
+        try:
+            _, failed = check_expectations(parse_json(response), case.expectations)
+            problems.extend(f"{path}预期{expect}，实际{real}" for path, expect, real in failed)
+        except Exception as e:
+            problems.append(f"响应不是合法的JSON：{str(e)}")
+    if not problems and case.expect_schema:
+        try:
+            errors, _ = schema_registry.validate(case.expect_schema, parse_json(response), case.case_name)
+            if errors:
+                problems.append(f"结构不符（{case.expect_schema}）：{format_errors(errors)}")
+        except Exception as e:
+            problems.append(f"响应不是合法的JSON：{str(e)}")
+    return {"status": response.status_code, "outcome": "failed" if problems else "passed", "ms": round(ms, 1),
+            "message": "；".join(problems)}
+
+
+class EnvCompareRunner:
+    """每个环境独立的连接池、会话和Token，各环境在各自线程中并发执行同一批用例（环境内按ASYNC_CONCURRENCY并发）"""
+    def __init__(self, cases, envs, concurrency=ASYNC_CONCURRENCY, slower_ratio=COMPARE_SLOWER_RATIO):
+        self.cases = list(cases)
+        self.envs = envs
+        self.concurrency = concurrency
+        self.slower_ratio = slower_ratio
+
+    def _client(self, base_url):
+        client = HttpClient(base_url=base_url)
+        # 独立连接池：各环境的连接互不占用，容量不小于并发数
+        adapter = PooledAdapter(pool_maxsize=max(self.concurrency, POOL_MAXSIZE))
+        client.session.mount("http://", adapter)
+        client.session.mount("https://", adapter)
+        client.token_manager = TokenManager(base_url)
+        apply_token(client, client.token_manager.get(client))
+        return client
+
+    def _run_env(self, name, base_url):
+        """执行一个环境的全部用例，返回(各用例结果, 环境汇总)"""
+        start = time.perf_counter()
+        log.info(f"======= 【{name}】开始执行：{base_url} =======")
+        try:
+            client = self._client(base_url)
+        except Exception as e:
+            log.error(f"【{name}】跳过该环境：{str(e)}")
+            outcome = {"status": None, "outcome": "error", "ms": 0.0, "message": str(e)}
+            return [outcome] * len(self.cases), {"base_url": base_url, "login_error": str(e), "wall_ms": None}
+        try:
+            results = AsyncCaseRunner(client, self.concurrency).run(self.cases)
+        finally:
+            client.session.close()
+        outcomes = [evaluate(result.case, result) for result in results]
+        return outcomes, {"base_url": base_url, "login_error": None, "wall_ms": round((time.perf_counter() - start) * 1000, 1)}
+
+    def run(self):
+        names = [name for name, _ in self.envs]
+        if cassette.mode != "off":
+            # 录制键不含域名：回放时所有环境拿到同一份录制，录制时各环境互相覆盖，对比没有意义
+            log.warning(f"多环境对比不使用录制/回放（当前模式：{cassette.mode}），本次请求全部发往真实环境")
+            cassette.mode = "off"
+        log.info(f"======= 多环境对比开始：{'、'.join(names)}，{len(self.cases)}条用例，基准环境：{names[0]} =======")
+        with ThreadPoolExecutor(max_workers=len(self.envs), thread_name_prefix="env") as executor:
+            futures = [executor.submit(self._run_env, name, base_url) for name, base_url in self.envs]
+            runs = dict(zip(names, (future.result() for future in futures)))
+        report = self.report(runs)
+        self.print_report(report)
+        return report
+
+    def report(self, runs):
+        """汇总：各环境通过情况、结果不一致的用例、各接口耗时及相对基准环境的差值；写入reports/env-compare.json/.html"""
+        names = list(runs)
+        baseline = names[0]
+        cases, latencies = [], {name: {} for name in names}
+        for index, case in enumerate(self.cases):
+            endpoint = f"{case.method} {case.url}"
+            outcomes = {name: runs[name][0][index] for name in names}
+            for name, outcome in outcomes.items():
+                if outcome["outcome"] != "error":
+                    latencies[name].setdefault(endpoint, []).append(outcome["ms"])
+            differs = (len({o["status"] for o in outcomes.values()}) > 1
+                       or len({o["outcome"] for o in outcomes.values()}) > 1)
+            cases.append({"case_id": case.case_id, "case_name": case.case_name, "endpoint": endpoint,
+                          "differs": differs, "envs": outcomes})
+
+        environments = {}
+        for name in names:
+            outcomes = runs[name][0]
+            counts = {key: sum(1 for o in outcomes if o["outcome"] == key) for key in OUTCOME_COLORS}
+            environments[name] = dict(runs[name][1], total=len(outcomes), **counts)
+
+        endpoints = {}
+        for endpoint in dict.fromkeys(case["endpoint"] for case in cases):
+            stats = {name: self._stats(latencies[name].get(endpoint, [])) for name in names}
+            base = stats[baseline]
+            for name in names[1:]:
+                current = stats[name]
+                if base["count"] and current["count"]:
+                    current["p50_delta"] = round(current["p50"] - base["p50"], 1)
+                    current["p95_delta"] = round(current["p95"] - base["p95"], 1)
+                    current["p95_ratio"] = round(current["p95"] / base["p95"], 2) if base["p95"] else None
+                    current["slower"] = bool(current["p95_ratio"] and current["p95_ratio"] >= self.slower_ratio)
+            endpoints[endpoint] = stats
+
+        report = {
+            "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "baseline": baseline,
+            "slower_ratio": self.slower_ratio,
+            "environments": environments,
+            "differences": sum(1 for case in cases if case["differs"]),
+            "slower_endpoints": sorted(endpoint for endpoint, stats in endpoints.items()
+                                       if any(s.get("slower") for s in stats.values())),
+            "endpoints": endpoints,
+            "cases": cases,
+        }
+        os.makedirs(os.path.dirname(REPORT_PATH), exist_ok=True)
+        with open(REPORT_PATH, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        with open(HTML_PATH, "w", encoding="utf-8") as f:
+            f.write(render_html(report))
+        return report
+
+    @staticmethod
+    def _stats(latencies):
+        latencies = sorted(latencies)
+        return {"count": len(latencies), "p50": round(percentile(latencies, 50), 1),
+                "p95": round(percentile(latencies, 95), 1)}
+
+    @staticmethod
+    def print_report(report):
+        names = list(report["environments"])
+        print("\n" + "  ".join(f"{name}：{env['base_url']} 通过{env['passed']}/{env['total']} 失败{env['failed']} "
+                                f"异常{env['error']}" for name, env in report["environments"].items()))
+        differing = [case for case in report["cases"] if case["differs"]]
+        if differing:
+            print(f"\n结果不一致的用例（{len(differing)}条）：")
+            for case in differing:
+                print(f"  {case['case_name']}（{case['endpoint']}）：" + " | ".join(
+                    f"{name} {o['status'] or '-'} {o['outcome']}" + (f"（{o['message']}）" if o["message"] else "")
+                    for name, o in case["envs"].items()))
+        print(f"\n{'接口':<40}" + "".join(f"  {name} p95(ms)" for name in names) + "  相对基准")
+        for endpoint, stats in report["endpoints"].items():
+            deltas = "  ".join(f"{name} {s['p95_delta']:+.1f}ms{'（变慢）' if s['slower'] else ''}"
+                               for name, s in stats.items() if "p95_delta" in s)
+            print(f"{endpoint:<40}" + "".join(f"  {stats[name]['p95'] if stats[name]['count'] else '-':>{len(name) + 8}}"
+                                              for name in names) + f"  {deltas}")
+        print(f"\n多环境对比报告已生成：{HTML_PATH}")
+
+
+def render_html(report):
+    """单文件静态页面：各环境汇总、结果不一致的用例、各接口耗时对比、全部用例并排"""
+    e = html.escape
+    names = list(report["environments"])
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>多环境对比报告</title><style>",
+        "body{font-family:sans-serif;margin:24px;color:#333}table{border-collapse:collapse;width:100%;margin:12px 0}"
+        "th,td{border:1px solid #ddd;padding:4px 8px;text-align:left;font-size:13px}th{background:#f5f5f5}"
+        ".diff{background:#fff4e5}.slower{color:#fd5a3e;font-weight:bold}",
+        "</style></head><body>",
+        f"<h2>多环境对比报告</h2><p>生成时间：{e(report['generated_at'])} ｜ 基准环境：{e(report['baseline'])} ｜ "
+        f"结果不一致：{report['differences']}条 ｜ 变慢接口（p95≥基准{report['slower_ratio']}倍）："
+        f"{len(report['slower_endpoints'])}个</p>",
+        "<h3>环境汇总</h3><table><tr><th>环境</th><th>域名</th><th>用例数</th><th>通过</th><th>失败</th><th>异常</th>"
+        "<th>执行时长</th></tr>",
+    ]
+    for name, env in report["environments"].items():
+        wall = f"{env['wall_ms'] / 1000:.2f}s" if env["wall_ms"] is not None else e(env["login_error"])
+        parts.append(f"<tr><td>{e(name)}</td><td>{e(env['base_url'])}</td><td>{env['total']}</td><td>{env['passed']}</td>"
+                     f"<td>{env['failed']}</td><td>{env['error']}</td><td>{wall}</td></tr>")
+    parts.append("</table>")
+
+    def cell(outcome):
+        text = f"{outcome['status'] or '-'} {outcome['outcome']} {outcome['ms']}ms"
+        message = f"<br><small>{e(outcome['message'])}</small>" if outcome["message"] else ""
+        return f"<td style='color:{OUTCOME_COLORS[outcome['outcome']]}'>{text}{message}</td>"
+
+    header = "<tr><th>#</th><th>用例</th><th>接口</th>" + "".join(f"<th>{e(name)}</th>" for name in names) + "</tr>"
+    differing = [(number, case) for number, case in enumerate(report["cases"], 1) if case["differs"]]
+    if differing:
+        parts.append("<h3>结果不一致的用例</h3><table>" + header)
+        parts.extend(f"<tr><td>{number}</td><td>{e(case['case_name'] or '')}</td><td>{e(case['endpoint'])}</td>"
+                     + "".join(cell(case["envs"][name]) for name in names) + "</tr>" for number, case in differing)
+        parts.append("</table>")
+
+    parts.append("<h3>接口耗时对比（ms）</h3><table><tr><th>接口</th>"
+                 + "".join(f"<th>{e(name)} p50 / p95</th>" for name in names) + "</tr>")
+    for endpoint, stats in report["endpoints"].items():
+        parts.append(f"<tr><td>{e(endpoint)}</td>")
+        for name in names:
+            s = stats[name]
+            delta = f" <span class='{'slower' if s['slower'] else ''}'>({s['p95_delta']:+.1f})</span>" if "p95_delta" in s else ""
+            parts.append(f"<td>{s['p50']} / {s['p95']}{delta}</td>" if s["count"] else "<td>-</td>")
+        parts.append("</tr>")
+    parts.append("</table>")
+
+    parts.append("<h3>全部用例</h3><table>" + header)
+    for number, case in enumerate(report["cases"], 1):
+        parts.append(f"<tr class='{'diff' if case['differs'] else ''}'><td>{number}</td><td>{e(case['case_name'] or '')}</td>"
+                     f"<td>{e(case['endpoint'])}</td>" + "".join(cell(case["envs"][name]) for name in names) + "</tr>")
+    parts.append("</table></body></html>")
+    return "".join(parts)
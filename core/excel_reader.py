@@ -1,35 +1,109 @@
-import openpyxl
+import hashlib
 import os
-from config.env_config import BASE_DIR
+import pickle
+from config.env_config import BASE_DIR, CASE_CACHE, ENV_CASE_FILE
+from core.case_source import CASE_DIR, CaseSource, decode_case
 from core.logger import log
 #无需修改：excel用例读取
-class ExcelReader:
-    def __init__(self, file_name="api_cases.xlsx"):
-        self.file_path = os.path.join(BASE_DIR, "test_data", file_name)
-        # 检查Excel文件是否存在
-        if not os.path.exists(self.file_path):
-            raise FileNotFoundError(f"用例文件不存在：{self.file_path}")
-        self.workbook = openpyxl.load_workbook(self.file_path)
-
-    def get_cases(self, sheet_name="Sheet1"):
-        """读取用例，返回字典列表"""
+
+# 解析后的用例缓存目录（按文件路径+sheet区分，文件未变化时跳过openpyxl）
+CACHE_DIR = os.path.join(BASE_DIR, ".cache", "cases")
+CACHE_VERSION = 1
+
+
+class ExcelReader(CaseSource):
+    def __init__(self, file_name=None, sheet_name="Sheet1"):
+        # 文件名相对test_data目录（也可以是绝对路径）
+        file_name = file_name or os.environ.get(ENV_CASE_FILE) or "api_cases.xlsx"
+        super().__init__(os.path.join(CASE_DIR, file_name))
+        self.sheet_name = sheet_name
+
+    def get_cases(self, sheet_name=None):
+        """读取用例，返回字典列表（优先读缓存）"""
+        if sheet_name:
+            self.sheet_name = sheet_name
+        return super().get_cases()
+
+    def iter_cases(self):
+        """开启缓存时整表解析一次写入缓存（文件未变化时直接取缓存），关闭缓存时逐行产出"""
+        if not CASE_CACHE:
+            yield from self._iter_sheet(self.sheet_name)
+            return
+        cases = self._load_cache(self.sheet_name)
+        if cases is None:
+            cases = list(self._iter_sheet(self.sheet_name))
+            self._save_cache(self.sheet_name, cases)
+        else:
+            log.info("用例文件未变化，使用缓存")
+        yield from cases
+
+    def _iter_sheet(self, sheet_name):
+        """只读流式模式逐行读取sheet"""
+        import openpyxl  # 延迟导入：命中缓存时完全不需要openpyxl
+        workbook = openpyxl.load_workbook(self.file_path, read_only=True)
         try:
-            sheet = self.workbook[sheet_name]
-            rows = list(sheet.iter_rows(values_only=True))
-            if len(rows) < 2:
-                log.warning("Excel用例表无数据")
-                return []
+            rows = workbook[sheet_name].iter_rows(values_only=True)
             # 表头作为key
-            headers = rows[0]
-            cases = []
-            for row in rows[1:]:
+            headers = next(rows, None)
+            count = 0
+            for row in rows:
                 if any(row):  # 跳过空行
-                    cases.append(dict(zip(headers, row)))
-            log.info(f"成功读取{len(cases)}条用例")
-            return cases
+                    count += 1
+                    yield decode_case(dict(zip(headers, row)))
+        finally:
+            workbook.close()
+        if not count:
+            log.warning("Excel用例表无数据")
+
+    def _cache_path(self, sheet_name):
+        key = hashlib.sha1(f"{os.path.abspath(self.file_path)}|{sheet_name}".encode("utf-8")).hexdigest()
+        return os.path.join(CACHE_DIR, f"{key}.pickle")
+
+    def _file_digest(self):
+        digest = hashlib.sha1()
+        with open(self.file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _load_cache(self, sheet_name):
+        """缓存有效返回用例列表，否则返回None
+        先比较mtime和大小；mtime变了（如git checkout）再比较内容哈希"""
+        path = self._cache_path(sheet_name)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as f:
+                cache = pickle.load(f)
         except Exception as e:
-            log.error(f"读取Excel失败：{str(e)}")
-            raise
+            log.warning(f"用例缓存损坏，重新读取Excel：{str(e)}")
+            return None
+        if cache.get("version") != CACHE_VERSION:
+            return None
+        stat = os.stat(self.file_path)
+        if cache["mtime_ns"] == stat.st_mtime_ns and cache["size"] == stat.st_size:
+            return cache["cases"]
+        if cache["size"] == stat.st_size and cache["sha1"] == self._file_digest():
+            # 内容没变，刷新mtime避免下次再算哈希
+            self._write_cache(path, dict(cache, mtime_ns=stat.st_mtime_ns))
+            return cache["cases"]
+        return None
+
+    def _save_cache(self, sheet_name, cases):
+        stat = os.stat(self.file_path)
+        self._write_cache(self._cache_path(sheet_name), {
+            "version": CACHE_VERSION,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha1": self._file_digest(),
+            "cases": cases,
+        })
 
-# 全局实例
-excel_reader = ExcelReader()
\ No newline at end of file
+    @staticmethod
+    def _write_cache(path, cache):
+        """先写临时文件再替换，避免多进程同时读到半个文件"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
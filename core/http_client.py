@@ -1,34 +1,142 @@
+import asyncio
+import contextvars
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
 import requests
-from config.env_config import BASE_URL, TIMEOUT, DEFAULT_HEADERS, TOKEN_HEADER, TOKEN_PREFIX
+from config.env_config import (BASE_URL, TIMEOUT, DEFAULT_HEADERS, TOKEN_HEADER, TOKEN_PREFIX, ASYNC_CONCURRENCY, KEEP_ALIVE,
+                               ACCEPT_ENCODING)
+from core.cassette import cassette
+from core.compression import request_encoding, encode_json, body_size, wire_size
+from core.http_pool import get_shared_adapter
+from core.latency import start_timing, finish_timing, latency_recorder
+from core.log_policy import describe_payload, describe_body
+from core.resilience import resilience
+from core.streaming import StreamBody
+from core.trace import trace_sink
 from core.logger import log
 
 class HttpClient:
-    def __init__(self, token=""):
+    def __init__(self, token="", base_url=None, quiet=False):
+        # base_url：不传用env_config的BASE_URL（压测/本地替身服务时可指定）
+        self.base_url = base_url or BASE_URL
+        # quiet：压测模式，请求日志降为DEBUG，且不计入本次运行的耗时统计
+        self.quiet = quiet
+        self.log_level = "DEBUG" if quiet else "INFO"
         self.session = requests.Session()
         self.session.headers.update(DEFAULT_HEADERS)
+        # 明确声明可接收的响应压缩方式（不依赖requests按已安装的解压库自动生成）
+        self.session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        # 挂载全局共用的连接池
+        adapter = get_shared_adapter()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if not KEEP_ALIVE:
+            self.session.headers["Connection"] = "close"
+        # Token管理器（挂载后接口返回401时自动刷新Token并重发）
+        self.token_manager = None
+        # 失败重试与熔断（None：不重试不熔断，压测时如实反映错误）
+        self.resilience = resilience
         # 自动携带Token
         if token:
             self.session.headers[TOKEN_HEADER] = TOKEN_PREFIX + token
 
-    def send_request(self, method, url, params=None, json=None):
-        """统一发送请求"""
-        full_url = BASE_URL + url
-        log.info(f"【请求】环境：{BASE_URL} | 方法：{method} | 路径：{url}")
-        log.info(f"【请求参数】params={params} | json={json}")
+    def _request(self, method, url, params, json, stream=False, body=None, expect_code=None):
+        # body：(已压缩的正文, 压缩方式)，此时不再由requests序列化json
+        data, headers = (body[0], {"Content-Encoding": body[1]}) if body is not None else (None, None)
+        send = functools.partial(self.session.request, method=method.upper(), url=self.base_url + url,
+                                 params=params, json=json if body is None else None, data=data, headers=headers,
+                                 timeout=TIMEOUT, stream=stream)
+        if self.resilience is None:
+            return send()
+        return self.resilience.call(method, url, send, endpoint=self.base_url + url, expect_code=expect_code)
 
+    def send_request(self, method, url, params=None, json=None, case_name=None, stream=None, compress=None,
+                     expect_code=None):
+        """统一发送请求（case_name用于耗时统计归类；stream传StreamSpec时分块读取正文，不整体加载到内存；
+        compress为Excel的compress列，按它或接口配置压缩JSON请求正文；expect_code为用例预期状态码，
+        返回该状态码时不重试、不计入熔断）"""
+        # 惰性格式化：日志级别未启用时不会拼接参数/正文
+        log.log(self.log_level, "【请求】环境：{} | 方法：{} | 路径：{}", self.base_url, method, url)
+        log.opt(lazy=True).log(self.log_level, "【请求参数】params={} | json={}",
+                               lambda: describe_payload(params, url), lambda: describe_payload(json, url))
+
+        # 耗时记录：连接池在建连时补充DNS/TCP/TLS耗时
+        timing = start_timing(method.upper(), url, case_name)
+        start = time.perf_counter()
+        error = None
         try:
-            response = self.session.request(
-                method=method.upper(),
-                url=full_url,
-                params=params,
-                json=json,
-                timeout=TIMEOUT
-            )
-            log.info(f"【响应】状态码：{response.status_code} | 内容：{response.text}")
+            # 请求正文压缩：序列化一次，重试/重发复用同一份压缩结果
+            body = None
+            encoding = request_encoding(url, compress) if json is not None else None
+            if encoding is not None:
+                data, encoding, timing.sent = encode_json(json, encoding)
+                if encoding is not None:
+                    body = (data, encoding)
+            # 回放模式优先取录制的响应，未命中才真实请求
+            response = cassette.replay(method, url, params, json) if cassette.replaying else None
+            if response is None:
+                response = self._request(method, url, params, json, stream is not None, body, expect_code)
+                if response.status_code == 401 and self.token_manager is not None and expect_code != 401:
+                    # Token过期：刷新（并发请求只刷新一次）后重发本次请求；用例本身预期401（未授权校验）时不刷新
+                    stale_token = response.request.headers.get(TOKEN_HEADER)
+                    response.close()
+                    self.session.headers[TOKEN_HEADER] = self.token_manager.refresh(self, stale_token)
+                    log.log(self.log_level, "【重发】Token已刷新，重发请求：{} {}", method, url)
+                    response = self._request(method, url, params, json, stream is not None, body, expect_code)
+                if cassette.recording and stream is None:
+                    cassette.record(method, url, params, json, response)
+            if stream is not None:
+                # 流式：边读边统计，正文不挂在response.content上
+                response.stream_body = StreamBody(stream).consume(response)
+            # 字节统计：请求正文压缩前/实际发送，响应正文实际接收/解压后
+            if response.request is not None:
+                timing.sent_wire = body_size(response.request.body)
+                timing.sent = timing.sent or timing.sent_wire
+            timing.received = response.stream_body.size if stream is not None else len(response.content)
+            timing.received_wire = wire_size(response, timing.received)
+            timing.total = time.perf_counter() - start
+            timing.ttfb = response.elapsed.total_seconds()  # 发出请求到收到响应头
+            timing.status = response.status_code
+            response.timing = timing
+            log.opt(lazy=True).log(self.log_level, "【响应】状态码：{} | 内容：{}",
+                                   lambda: response.status_code, lambda: describe_body(response, url))
             return response
         except Exception as e:
+            timing.total = time.perf_counter() - start
+            error = str(e)
             log.error(f"【请求失败】{str(e)}")
             raise Exception(f"接口请求异常：{str(e)}")
+        finally:
+            finish_timing()
+            if not self.quiet:
+                latency_recorder.add(timing)
+                trace_sink.request(timing, error)
+
+
+class AsyncHttpClient:
+    """异步客户端：send_request约定与HttpClient一致，只是需要await调用
+    底层复用同步HttpClient的会话（Token、请求头共用），阻塞请求交给线程池执行"""
+    def __init__(self, client=None, concurrency=ASYNC_CONCURRENCY):
+        self.client = client or HttpClient()
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="async-http")
+
+    @property
+    def session(self):
+        return self.client.session
+
+    async def send_request(self, method, url, params=None, json=None, case_name=None, stream=None, compress=None,
+                           expect_code=None):
+        """统一发送请求（协程）"""
+        loop = asyncio.get_running_loop()
+        # 带上当前协程的上下文（追踪日志的用例ID）
+        call = functools.partial(contextvars.copy_context().run, self.client.send_request, method, url, params, json,
+                                 case_name, stream, compress, expect_code)
+        return await loop.run_in_executor(self.executor, call)
+
+    def close(self):
+        """关闭线程池"""
+        self.executor.shutdown(wait=True)
 
 # 核心补充：创建全局可调用的实例（其他模块直接导入这个实例）
-http_client = HttpClient()
\ No newline at end of file
+http_client = HttpClient()
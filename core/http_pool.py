@@ -0,0 +1,137 @@
+import socket
+import threading
+import time
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NewConnectionError
+from config.env_config import POOL_CONNECTIONS, POOL_MAXSIZE, POOL_BLOCK, POOL_MAX_RETRIES
+from core.latency import current_timing
+#无需修改：HTTP连接池（所有HttpClient共用，并统计连接复用情况）
+
+
+class PoolStats:
+    """连接池计数器（线程安全）
+    hits：取到仍存活的复用连接；misses：需要新建或重连；
+    new_connections：新建连接对象数；connects：实际TCP建连数；handshakes：TLS握手数"""
+    FIELDS = ("hits", "misses", "new_connections", "connects", "handshakes")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def incr(self, field):
+        with self._lock:
+            self._counts[field] += 1
+
+    def reset(self):
+        self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def snapshot(self):
+        """返回当前计数的副本，附带复用率"""
+        with self._lock:
+            counts = dict(self._counts)
+        total = counts["hits"] + counts["misses"]
+        counts["hit_rate"] = round(counts["hits"] / total, 4) if total else 0.0
+        return counts
+
+
+pool_stats = PoolStats()
+
+
+class _TimingConnectionMixin:
+    def _new_conn(self):
+        """新建socket时把DNS解析和TCP建连分开计时（记到当前请求的耗时记录上）"""
+        timing = current_timing()
+        if timing is None:
+            return super()._new_conn()
+        host = self._dns_host
+        start = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(host, self.port, 0, socket.SOCK_STREAM)
+        except OSError:
+            # 解析失败交给urllib3按原逻辑抛出标准异常
+            return super()._new_conn()
+        resolved = time.perf_counter()
+        timing.dns += resolved - start
+        # 用解析好的IP建连；connect()随后读取的self.host（TLS的SNI）在finally中已恢复
+        self._dns_host = addresses[0][4][0]
+        try:
+            return super()._new_conn()
+        except NewConnectionError:
+            if len(addresses) == 1:
+                raise
+            # 有多个地址且第一个连不上时，按原逻辑依次尝试全部地址
+            self._dns_host = host
+            return super()._new_conn()
+        finally:
+            self._dns_host = host
+            timing.connect += time.perf_counter() - resolved
+
+
+class CountingHTTPConnection(_TimingConnectionMixin, HTTPConnection):
+    def connect(self):
+        pool_stats.incr("connects")
+        super().connect()
+
+
+class CountingHTTPSConnection(_TimingConnectionMixin, HTTPSConnection):
+    def connect(self):
+        pool_stats.incr("connects")
+        pool_stats.incr("handshakes")
+        timing = current_timing()
+        if timing is None:
+            return super().connect()
+        start = time.perf_counter()
+        before = timing.dns + timing.connect
+        super().connect()
+        # connect()总耗时扣除DNS和TCP建连即为TLS握手耗时
+        timing.tls += time.perf_counter() - start - (timing.dns + timing.connect - before)
+
+
+class _CountingPoolMixin:
+    def _get_conn(self, timeout=None):
+        conn = super()._get_conn(timeout)
+        # 连接对象还持有socket说明是可直接复用的长连接
+        pool_stats.incr("hits" if getattr(conn, "sock", None) is not None else "misses")
+        return conn
+
+    def _new_conn(self):
+        pool_stats.incr("new_connections")
+        return super()._new_conn()
+
+
+class CountingHTTPConnectionPool(_CountingPoolMixin, HTTPConnectionPool):
+    ConnectionCls = CountingHTTPConnection
+
+
+class CountingHTTPSConnectionPool(_CountingPoolMixin, HTTPSConnectionPool):
+    ConnectionCls = CountingHTTPSConnection
+
+
+class PooledAdapter(HTTPAdapter):
+    """按env_config配置连接池大小/阻塞行为，并使用带计数的连接池"""
+    def __init__(self, pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE,
+                 pool_block=POOL_BLOCK, max_retries=POOL_MAX_RETRIES):
+        super().__init__(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                         pool_block=pool_block, max_retries=max_retries)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        super().init_poolmanager(connections, maxsize, block, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CountingHTTPConnectionPool,
+            "https": CountingHTTPSConnectionPool,
+        }
+
+
+_shared_adapter = None
+_shared_lock = threading.Lock()
+
+
+def get_shared_adapter():
+    """全局共用的连接池适配器（懒加载，所有HttpClient实例挂载同一个）"""
+    global _shared_adapter
+    with _shared_lock:
+        if _shared_adapter is None:
+            _shared_adapter = PooledAdapter()
+        return _shared_adapter
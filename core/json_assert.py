@@ -0,0 +1,131 @@
+import json
+import re
+from functools import lru_cache
+try:
+    import orjson  # 可选：安装后自动使用更快的JSON解析
+except ImportError:
+    orjson = None
+#无需修改：JSON断言引擎（响应只解析一次，路径表达式只编译一次）
+
+# 多字段断言的分隔符：expect_key填"code;data.token"，expect_value对应填"0;abc"
+MULTI_SEPARATOR = re.compile(r"[;\n]")
+# 路径片段：.key / ['key'] / ["key"] / [0] / [*] / .*
+TOKEN_RE = re.compile(r"""\.?([^.\[\]]+)|\[(\d+|-\d+|\*)\]|\[['"]([^'"]+)['"]\]""")
+MISSING = object()
+WILDCARD = object()
+
+
+def loads(data):
+    """按可用后端解析JSON（bytes/str）"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def parse_json(response):
+    """解析响应JSON，结果缓存在response上，同一响应多次断言只解析一次（流式响应取解析出的记录或完整正文）"""
+    parsed = getattr(response, "_parsed_json", MISSING)
+    if parsed is MISSING:
+        stream_body = getattr(response, "stream_body", None)
+        parsed = stream_body.json() if stream_body is not None else loads(response.content)
+        response._parsed_json = parsed
+    return parsed
+
+
+class CompiledPath:
+    """编译后的字段路径：支持 data.list.0.id / data.list[0].id / $.data.list[*].id"""
+    __slots__ = ("expr", "steps", "multi")
+
+    def __init__(self, expr, steps):
+        self.expr = expr
+        self.steps = steps
+        self.multi = WILDCARD in steps
+
+    def find(self, doc):
+        """返回所有匹配值（无匹配返回空列表）"""
+        nodes = [doc]
+        for step in self.steps:
+            matched = []
+            for node in nodes:
+                if step is WILDCARD:
+                    if isinstance(node, dict):
+                        matched.extend(node.values())
+                    elif isinstance(node, list):
+                        matched.extend(node)
+                elif isinstance(node, dict):
+                    if step in node:
+                        matched.append(node[step])
+                    elif isinstance(step, int) and str(step) in node:
+                        # 数字步骤也匹配同名字符串键（JSON对象的键总是字符串）
+                        matched.append(node[str(step)])
+                elif isinstance(node, list) and isinstance(step, int):
+                    if -len(node) <= step < len(node):
+                        matched.append(node[step])
+            nodes = matched
+            if not nodes:
+                break
+        return nodes
+
+    def get(self, doc, default=MISSING):
+        """取值：普通路径返回单个值，含通配符返回匹配列表；不存在返回default"""
+        values = self.find(doc)
+        if self.multi:
+            return values
+        return values[0] if values else default
+
+
+@lru_cache(maxsize=1024)
+def compile_path(expr):
+    """编译字段路径（相同表达式只编译一次）"""
+    text = str(expr).strip()
+    if text.startswith("$"):
+        text = text[1:]
+    steps = []
+    position = 0
+    while position < len(text):
+        match = TOKEN_RE.match(text, position)
+        if not match or match.end() == position:
+            raise ValueError(f"无法解析的字段路径：{expr}")
+        key, index, quoted = match.groups()
+        if quoted is not None:
+            steps.append(quoted)
+        elif index is not None:
+            steps.append(WILDCARD if index == "*" else int(index))
+        elif key == "*":
+            steps.append(WILDCARD)
+        else:
+            # 点号写法的纯数字视为列表下标（data.list.0.id），字典中同名字符串键也能匹配
+            steps.append(int(key) if key.lstrip("-").isdigit() else key)
+        position = match.end()
+    return CompiledPath(expr, tuple(steps))
+
+
+def _literal(text):
+    """多字段写法中的预期值按JSON字面量解析（0、true、"abc"），解析失败按原字符串"""
+    text = text.strip()
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def parse_expectations(expect_key, expect_value):
+    """把expect_key/expect_value列解析成[(路径, 预期值)]，支持分号或换行分隔多个字段"""
+    key_text = str(expect_key)
+    if not MULTI_SEPARATOR.search(key_text):
+        return [(key_text.strip(), expect_value)]
+    keys = [key for key in MULTI_SEPARATOR.split(key_text) if key.strip()]
+    values = MULTI_SEPARATOR.split(str(expect_value))
+    if len(keys) != len(values):
+        raise ValueError(f"预期字段与预期值个数不一致：{len(keys)}个字段，{len(values)}个值")
+    return [(key.strip(), _literal(value)) for key, value in zip(keys, values)]
+
+
+def check_expectations(doc, expectations):
+    """一次遍历校验全部预期，返回(通过列表, 失败列表)，元素为(路径, 预期值, 实际值)"""
+    passed, failed = [], []
+    for expr, expect_value in expectations:
+        # 字段不存在按None处理（与原来resp_json.get(key)一致）
+        real_value = compile_path(expr).get(doc, None)
+        (passed if real_value == expect_value else failed).append((expr, expect_value, real_value))
+    return passed, failed
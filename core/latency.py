@@ -0,0 +1,147 @@
+import json
+import os
+import threading
+from config.env_config import BASE_DIR, ENV_WORKER, ENV_REPORT_DIR
+#无需修改：请求耗时分解（DNS/建连/TLS/首字节/总耗时）与分位数统计
+
+REPORT_DIR = os.environ.get(ENV_REPORT_DIR) or os.path.join(BASE_DIR, "reports")
+PHASES = ("dns", "connect", "tls", "ttfb", "total")
+BYTE_FIELDS = ("sent", "sent_wire", "received", "received_wire")
+
+_local = threading.local()
+
+
+class RequestTiming:
+    """单个请求的耗时记录（秒）；复用长连接时dns/connect/tls为0
+    以及正文字节数：sent/received为压缩前（解压后），sent_wire/received_wire为实际传输"""
+    __slots__ = ("method", "path", "case_name", "status", "dns", "connect", "tls", "ttfb", "total",
+                 "sent", "sent_wire", "received", "received_wire")
+
+    def __init__(self, method, path, case_name=None):
+        self.method = method
+        self.path = path
+        self.case_name = case_name
+        self.status = None
+        self.dns = self.connect = self.tls = self.ttfb = self.total = 0.0
+        self.sent = self.sent_wire = self.received = self.received_wire = 0
+
+    @property
+    def endpoint(self):
+        return f"{self.method} {self.path}"
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def start_timing(method, path, case_name=None):
+    """开始记录当前线程的请求耗时（连接池在建连时把DNS/TCP/TLS耗时记到这里）"""
+    _local.timing = RequestTiming(method, path, case_name)
+    return _local.timing
+
+
+def current_timing():
+    return getattr(_local, "timing", None)
+
+
+def finish_timing():
+    _local.timing = None
+
+
+def percentile(sorted_values, pct):
+    """最近秩法取分位数（sorted_values需已升序）"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class LatencyRecorder:
+    """汇总本次运行的请求耗时，输出各接口p50/p95/p99/max及超预算用例"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.records = []
+        self.flagged = []
+
+    def add(self, timing):
+        with self._lock:
+            self.records.append(timing.to_dict())
+
+    def flag(self, case_name, endpoint, total_ms, budget_ms):
+        """登记超出耗时预算的用例"""
+        with self._lock:
+            self.flagged.append({"case_name": case_name, "endpoint": endpoint,
+                                 "total_ms": round(total_ms, 1), "budget_ms": budget_ms})
+
+    def summary(self):
+        """按接口统计（毫秒）"""
+        endpoints = {}
+        with self._lock:
+            records = list(self.records)
+        for record in records:
+            endpoints.setdefault(f"{record['method']} {record['path']}", []).append(record)
+        result = {}
+        for endpoint, items in sorted(endpoints.items()):
+            totals = sorted(item["total"] * 1000 for item in items)
+            stats = {"count": len(items)}
+            for pct in (50, 95, 99):
+                stats[f"p{pct}"] = round(percentile(totals, pct), 1)
+            stats["max"] = round(totals[-1], 1)
+            for phase in PHASES[:-1]:
+                stats[f"{phase}_avg"] = round(sum(item[phase] for item in items) * 1000 / len(items), 1)
+            # 正文字节合计（旧版本工作进程的报告没有字节字段）
+            for field in BYTE_FIELDS:
+                stats[f"{field}_bytes"] = sum(item.get(field, 0) for item in items)
+            result[endpoint] = stats
+        return result
+
+    def report(self):
+        return {"summary": self.summary(), "over_budget": list(self.flagged), "records": list(self.records)}
+
+    def write_report(self, path=None):
+        """写出JSON报告（分片工作进程写各自的文件，由父进程合并）"""
+        if path is None:
+            worker = os.environ.get(ENV_WORKER)
+            path = os.path.join(REPORT_DIR, f"latency.worker-{worker}.json" if worker else "latency.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        report = self.report()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return path, report
+
+    def merge_file(self, path):
+        """合并其他进程写出的报告"""
+        with open(path, encoding="utf-8") as f:
+            report = json.load(f)
+        with self._lock:
+            self.records.extend(report["records"])
+            self.flagged.extend(report["over_budget"])
+
+
+def transfer_totals(summary):
+    """全部接口的正文字节合计：{sent: , sent_wire: , received: , received_wire: }"""
+    return {field: sum(stats.get(f"{field}_bytes", 0) for stats in summary.values()) for field in BYTE_FIELDS}
+
+
+def _kb(size):
+    return f"{size / 1024:.1f}KB"
+
+
+def environment_lines(summary):
+    """Allure环境信息（environment.properties）里的耗时分位数和传输字节"""
+    lines = [f"latency.{endpoint.replace(' ', '_')}=p50 {stats['p50']}ms / p95 {stats['p95']}ms / "
+             f"p99 {stats['p99']}ms / max {stats['max']}ms" for endpoint, stats in summary.items()]
+    totals = transfer_totals(summary)
+    lines.append(f"transfer.sent={_kb(totals['sent_wire'])}（压缩前{_kb(totals['sent'])}）")
+    lines.append(f"transfer.received={_kb(totals['received_wire'])}（解压后{_kb(totals['received'])}）")
+    return lines
+
+
+def write_allure_environment(results_dir, summary, extra_lines=()):
+    """把耗时分位数（及其他运行统计）写入Allure结果目录的environment.properties"""
+    os.makedirs(results_dir, exist_ok=True)
+    with open(os.path.join(results_dir, "environment.properties"), "w", encoding="utf-8") as f:
+        f.write("\n".join([*environment_lines(summary), *extra_lines]) + "\n")
+
+
+# 全局实例
+latency_recorder = LatencyRecorder()
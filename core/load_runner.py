@@ -0,0 +1,215 @@
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from config.env_config import BASE_DIR
+from core.case_flow import CaseGraph, FlowContext, FlowError
+from core.cassette import cassette
+from core.latency import percentile
+from core.logger import log
+#无需修改：压测模式（复用Excel用例作为流量模型）
+
+REPORT_PATH = os.path.join(BASE_DIR, "reports", "load-report.json")
+
+
+class WindowStats:
+    """单个时间窗口内的请求统计"""
+    __slots__ = ("count", "errors", "latencies")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.latencies = []
+
+
+class LoadRunner:
+    """虚拟用户模式：users个线程循环发请求；定速模式：按rps匀速发请求，users为最大并发
+    引用${var}的用例：压测前按依赖顺序把提取变量的用例各执行一次，替换变量后参与压测（取不到变量的排除）"""
+    def __init__(self, cases, client, users=10, rps=None, duration=30, window=1.0, seed=None):
+        self.all_cases = list(cases)
+        # weight列控制流量占比（默认1，0表示不参与压测，但仍可作为提取变量的上游用例）
+        self.cases = [case for case in self.all_cases if case.weight > 0]
+        if not self.cases:
+            raise Exception("没有可压测的用例（weight全部为0或用例为空）")
+        self.client = client
+        self.users = users
+        self.rps = rps
+        self.duration = duration
+        self.window = window
+        self.random = random.Random(seed)
+        self._cum_weights = []
+        self._lock = threading.Lock()
+        self._windows = {}
+        self._endpoints = {}
+        self.errors = {}           # {异常类型或"状态码xxx": 次数}
+        self.excluded = []         # 取不到变量、未参与压测的用例名
+        self.dropped = 0
+
+    def prepare(self):
+        """替换链路变量：被引用的提取者按依赖顺序各执行一次（不计入压测统计），返回参与压测的用例"""
+        if not any(case.references for case in self.cases):
+            return self.cases
+        graph = CaseGraph(self.all_cases)
+        needed = set()
+        pending = [index for index, case in enumerate(self.all_cases) if case.weight > 0 and case.references]
+        while pending:
+            for producer in graph.sources[pending.pop()].values():
+                if producer not in needed:
+                    needed.add(producer)
+                    pending.append(producer)
+        context = FlowContext(graph)
+        for index in graph.order:
+            if index not in needed:
+                continue
+            case = self.all_cases[index]
+            try:
+                request = context.prepare(case)
+                response = self.client.send_request(request.method, request.url, request.params, request.json,
+                                                    case.case_name, expect_code=request.expect_code)
+                context.collect(case, response)
+            except Exception as e:
+                log.warning(f"压测准备：提取变量的用例【{case.case_name}】执行失败：{str(e)}")
+        prepared = []
+        for case in self.cases:
+            try:
+                prepared.append(context.prepare(case))
+            except FlowError as e:
+                self.excluded.append(case.case_name)
+                log.warning(f"压测排除：{str(e)}")
+        if not prepared:
+            raise Exception("没有可压测的用例（引用的变量都没有取到值）")
+        log.info(f"压测准备：执行{len(needed)}条提取变量的用例，{len(prepared)}条用例参与压测，排除{len(self.excluded)}条")
+        return prepared
+
+    def _pick(self):
+        with self._lock:
+            return self.random.choices(self.cases, cum_weights=self._cum_weights)[0]
+
+    def _fire(self, case):
+        start = time.perf_counter()
+        error = None
+        try:
+            response = self.client.send_request(case.method, case.url, case.params, case.json, case.case_name)
+            if response.status_code != case.expect_code:
+                error = f"状态码{response.status_code}"
+        except Exception as e:
+            error = type(e).__name__
+        self._record(case, start, time.perf_counter() - start, error is None, error)
+
+    def _record(self, case, start, elapsed, ok, error=None):
+        index = int((start - self._t0) / self.window)
+        with self._lock:
+            if error is not None:
+                self.errors[error] = self.errors.get(error, 0) + 1
+            for stats in (self._windows.setdefault(index, WindowStats()),
+                          self._endpoints.setdefault(f"{case.method} {case.url}", WindowStats())):
+                stats.count += 1
+                stats.errors += 0 if ok else 1
+                stats.latencies.append(elapsed * 1000)
+
+    def _user_loop(self, deadline):
+        while time.perf_counter() < deadline:
+            self._fire(self._pick())
+
+    def _paced(self, deadline):
+        """定速发送：第i个请求在t0+i/rps发出，积压超过并发数10倍时丢弃并计数"""
+        interval = 1.0 / self.rps
+        pending = threading.BoundedSemaphore(self.users * 10)
+        with ThreadPoolExecutor(max_workers=self.users, thread_name_prefix="load") as executor:
+            sent = 0
+            while True:
+                due = self._t0 + sent * interval
+                if due >= deadline:
+                    break
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                sent += 1
+                if not pending.acquire(blocking=False):
+                    self.dropped += 1
+                    continue
+                future = executor.submit(self._fire, self._pick())
+                future.add_done_callback(lambda _: pending.release())
+
+    def run(self):
+        mode = f"定速{self.rps}rps（最大并发{self.users}）" if self.rps else f"{self.users}个虚拟用户"
+        if cassette.mode != "off":
+            # 压测要打到真实服务：回放测不出服务端性能，录制会把每个请求写进录制文件
+            log.warning(f"压测模式不使用录制/回放（当前模式：{cassette.mode}），本次请求全部发往真实环境")
+            cassette.mode = "off"
+        self.cases = self.prepare()
+        total = 0.0
+        for case in self.cases:
+            total += case.weight
+            self._cum_weights.append(total)
+        log.info(f"======= 压测开始：{mode}，持续{self.duration}秒，{len(self.cases)}条用例 =======")
+        self._t0 = time.perf_counter()
+        deadline = self._t0 + self.duration
+        if self.rps:
+            self._paced(deadline)
+        else:
+            threads = [threading.Thread(target=self._user_loop, args=(deadline,), daemon=True)
+                       for _ in range(self.users)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        report = self.report(time.perf_counter() - self._t0)
+        self.print_report(report)
+        return report
+
+    def _stats(self, stats, seconds):
+        latencies = sorted(stats.latencies)
+        return {
+            "requests": stats.count,
+            "throughput": round(stats.count / seconds, 1) if seconds else 0.0,
+            "error_rate": round(stats.errors / stats.count, 4) if stats.count else 0.0,
+            "p50": round(percentile(latencies, 50), 1),
+            "p95": round(percentile(latencies, 95), 1),
+            "p99": round(percentile(latencies, 99), 1),
+            "max": round(latencies[-1], 1) if latencies else 0.0,
+        }
+
+    def report(self, elapsed):
+        """汇总：整体、按时间窗口、按接口；写入reports/load-report.json"""
+        total = WindowStats()
+        for stats in self._windows.values():
+            total.count += stats.count
+            total.errors += stats.errors
+            total.latencies.extend(stats.latencies)
+        report = {
+            "mode": "rps" if self.rps else "users",
+            "users": self.users,
+            "rps": self.rps,
+            "duration": round(elapsed, 2),
+            "dropped": self.dropped,
+            "excluded": self.excluded,
+            "errors": dict(sorted(self.errors.items(), key=lambda item: item[1], reverse=True)),
+            "total": self._stats(total, elapsed),
+            "timeline": [dict(second=round(index * self.window, 1), **self._stats(stats, self.window))
+                         for index, stats in sorted(self._windows.items())],
+            "endpoints": {endpoint: self._stats(stats, elapsed) for endpoint, stats in sorted(self._endpoints.items())},
+        }
+        os.makedirs(os.path.dirname(REPORT_PATH), exist_ok=True)
+        with open(REPORT_PATH, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
+
+    @staticmethod
+    def print_report(report):
+        header = f"{'时间(s)':>8} {'请求数':>8} {'吞吐(rps)':>10} {'错误率':>8} {'p50(ms)':>9} {'p95(ms)':>9} {'p99(ms)':>9}"
+        print(f"\n{header}")
+        for row in report["timeline"]:
+            print(f"{row['second']:>8} {row['requests']:>8} {row['throughput']:>10} {row['error_rate']:>8.2%} "
+                  f"{row['p50']:>9} {row['p95']:>9} {row['p99']:>9}")
+        total = report["total"]
+        print(f"\n总计：{total['requests']}个请求，吞吐{total['throughput']}rps，错误率{total['error_rate']:.2%}，"
+              f"p50 {total['p50']}ms / p95 {total['p95']}ms / p99 {total['p99']}ms / max {total['max']}ms，"
+              f"丢弃{report['dropped']}个")
+        if report["errors"]:
+            print("错误分布：" + "，".join(f"{error} {count}次" for error, count in report["errors"].items()))
+        if report["excluded"]:
+            print(f"未参与压测（引用的变量没有取到值）：{'、'.join(report['excluded'])}")
+        print(f"压测报告已生成：{REPORT_PATH}")
@@ -0,0 +1,62 @@
+import hashlib
+import random
+from config.env_config import LOG_BODY_MAX, LOG_BODY_LIMITS, LOG_HASH_THRESHOLD, LOG_SUCCESS_SAMPLE
+#无需修改：请求/响应日志策略（截断、哈希、采样）
+
+# 按文本记录的Content-Type关键字，其余按二进制处理
+TEXT_TYPES = ("json", "text", "xml", "javascript", "x-www-form-urlencoded")
+
+
+def body_limit(path):
+    """接口对应的正文日志上限（未单独配置时用默认值）"""
+    return LOG_BODY_LIMITS.get(path, LOG_BODY_MAX)
+
+
+def truncate(text, limit):
+    """超出上限的文本截断并标注原长度"""
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}...<已截断，共{len(text)}字符>"
+
+
+def digest(data):
+    """只记录长度和哈希，不记录内容"""
+    return f"<{len(data)}字节 sha256={hashlib.sha256(data).hexdigest()[:16]}>"
+
+
+def is_binary(response):
+    content_type = response.headers.get("Content-Type", "").lower()
+    return bool(content_type) and not any(t in content_type for t in TEXT_TYPES)
+
+
+def describe_payload(value, path):
+    """请求参数的日志文本"""
+    return truncate(str(value), body_limit(path)) if value is not None else "None"
+
+
+def describe_body(response, path):
+    """响应正文的日志文本：失败完整记录，二进制/超大正文记哈希，成功响应按比例采样并截断"""
+    stream_body = getattr(response, "stream_body", None)
+    if stream_body is not None:
+        return stream_body.describe(response.encoding)
+    content = response.content or b""
+    if is_binary(response) or len(content) > LOG_HASH_THRESHOLD and response.ok:
+        return digest(content)
+    if not response.ok:
+        return response.text
+    if LOG_SUCCESS_SAMPLE < 1 and random.random() >= LOG_SUCCESS_SAMPLE:
+        return f"<未采样，{len(content)}字节>"
+    limit = body_limit(path)
+    # 只解码需要的部分，避免大列表接口每次整体解码（UTF-8每字符最多4字节）
+    text = content[:limit * 4].decode(response.encoding or "utf-8", errors="replace")
+    if len(content) > limit * 4:
+        return f"{text[:limit]}...<已截断，共{len(content)}字节>"
+    return truncate(text, limit)
+
+
+def full_body(response):
+    """断言失败时记录的完整正文（二进制仍只记哈希，流式响应只记摘要和开头片段）"""
+    stream_body = getattr(response, "stream_body", None)
+    if stream_body is not None:
+        return stream_body.describe(response.encoding)
+    return digest(response.content or b"") if is_binary(response) else response.text
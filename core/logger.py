@@ -1,9 +1,12 @@
 import os
 from loguru import logger
-from config.env_config import BASE_DIR, LOG_LEVEL
+from config.env_config import BASE_DIR, LOG_LEVEL, ENV_WORKER, ENV_LOG_DIR
 
-# 日志路径
-LOG_PATH = os.path.join(BASE_DIR, "logs", "api_auto.log")
+# 日志路径（多进程分片时每个工作进程写独立文件，结束后由父进程合并）
+WORKER_ID = os.environ.get(ENV_WORKER)
+LOG_NAME = f"api_auto.worker-{WORKER_ID}.log" if WORKER_ID else "api_auto.log"
+LOG_DIR = os.environ.get(ENV_LOG_DIR) or os.path.join(BASE_DIR, "logs")
+LOG_PATH = os.path.join(LOG_DIR, LOG_NAME)
 # 日志配置
 logger.add(
     LOG_PATH,
@@ -13,4 +16,4 @@ logger.add(
     level=LOG_LEVEL,
     enqueue=True            # 异步日志，不阻塞
 )
-log = logger
\ No newline at end of file
+log = logger
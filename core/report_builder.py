@@ -0,0 +1,194 @@
+import html
+import json
+import os
+import time
+from config.env_config import BASE_DIR
+from core.logger import log
+#无需修改：内置测试报告（不依赖Allure命令行，直接读取allure-results生成静态HTML/JSON）
+
+RESULTS_DIR = os.path.join(BASE_DIR, "reports", "allure-results")
+SUMMARY_DIR = os.path.join(BASE_DIR, "reports", "summary")
+STATUSES = ("passed", "failed", "broken", "skipped", "unknown")
+STATUS_COLORS = {"passed": "#97cc64", "failed": "#fd5a3e", "broken": "#ffd050", "skipped": "#aaaaaa", "unknown": "#d35ebe"}
+INDEX_VERSION = 1
+
+
+def compact_result(result):
+    """只保留报告需要的字段（原始结果含步骤、附件，体积大）"""
+    labels = {}
+    for label in result.get("labels") or []:
+        labels.setdefault(label.get("name"), label.get("value"))
+    start, stop = result.get("start") or 0, result.get("stop") or 0
+    details = result.get("statusDetails") or {}
+    return {
+        "name": result.get("name"),
+        "full_name": result.get("fullName"),
+        "status": result.get("status") if result.get("status") in STATUSES else "unknown",
+        "start": start,
+        "duration": max(stop - start, 0),
+        "suite": labels.get("story") or labels.get("suite") or labels.get("feature") or "",
+        "tags": [label.get("value") for label in result.get("labels") or [] if label.get("name") == "tag"],
+        "message": details.get("message") or "",
+    }
+
+
+class ReportBuilder:
+    """扫描一遍结果目录生成报告；已处理过且未修改的结果文件直接复用索引中的摘要"""
+    def __init__(self, results_dir=RESULTS_DIR, output_dir=SUMMARY_DIR):
+        self.results_dir = results_dir
+        self.output_dir = output_dir
+        self.index_path = os.path.join(output_dir, "index.json")
+        self.parsed = self.reused = 0
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") == INDEX_VERSION:
+                return index["files"]
+        except (OSError, ValueError, KeyError):
+            pass
+        return {}
+
+    def _scan(self, previous):
+        """逐个读取*-result.json：mtime和大小都没变的直接用旧摘要，其余重新解析"""
+        files, environment = {}, {}
+        for entry in os.scandir(self.results_dir):
+            if entry.name == "environment.properties":
+                environment = self._read_properties(entry.path)
+                continue
+            if not entry.name.endswith("-result.json"):
+                continue
+            stat = entry.stat()
+            cached = previous.get(entry.name)
+            if cached and cached["mtime_ns"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+                files[entry.name] = cached
+                self.reused += 1
+                continue
+            try:
+                with open(entry.path, encoding="utf-8") as f:
+                    record = compact_result(json.load(f))
+            except (OSError, ValueError) as e:
+                log.warning(f"跳过无法解析的结果文件：{entry.name}，{str(e)}")
+                continue
+            files[entry.name] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "record": record}
+            self.parsed += 1
+        return files, environment
+
+    @staticmethod
+    def _read_properties(path):
+        properties = {}
+        with open(path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                key, sep, value = line.strip().partition("=")
+                if sep and not key.startswith("#"):
+                    properties[key.strip()] = value.strip()
+        return properties
+
+    @staticmethod
+    def summarize(records, environment=None):
+        """汇总：按状态计数、总耗时、按模块统计、失败列表、最慢用例"""
+        counts = dict.fromkeys(STATUSES, 0)
+        suites = {}
+        for record in records:
+            counts[record["status"]] += 1
+            suite = suites.setdefault(record["suite"], dict.fromkeys(STATUSES, 0))
+            suite[record["status"]] += 1
+        starts = [r["start"] for r in records if r["start"]]
+        ends = [r["start"] + r["duration"] for r in records if r["start"]]
+        return {
+            "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "total": len(records),
+            "counts": counts,
+            "pass_rate": round(counts["passed"] / len(records), 4) if records else 0.0,
+            "wall_time_ms": max(ends) - min(starts) if starts else 0,
+            "case_time_ms": sum(r["duration"] for r in records),
+            "suites": suites,
+            "failures": [r for r in records if r["status"] in ("failed", "broken")],
+            "slowest": sorted(records, key=lambda r: r["duration"], reverse=True)[:10],
+            "environment": environment or {},
+        }
+
+    def build(self):
+        """生成reports/summary/summary.json和index.html，返回HTML路径"""
+        start = time.perf_counter()
+        self.parsed = self.reused = 0
+        if not os.path.isdir(self.results_dir):
+            raise Exception(f"结果目录不存在：{self.results_dir}")
+        files, environment = self._scan(self._load_index())
+        records = sorted((item["record"] for item in files.values()), key=lambda r: (r["start"], r["name"] or ""))
+        summary = self.summarize(records, environment)
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        self._write(self.index_path, json.dumps({"version": INDEX_VERSION, "files": files}, ensure_ascii=False))
+        self._write(os.path.join(self.output_dir, "summary.json"),
+                    json.dumps(dict(summary, cases=records), ensure_ascii=False, indent=2))
+        html_path = os.path.join(self.output_dir, "index.html")
+        self._write(html_path, render_html(summary, records))
+        log.info(f"内置报告已生成：{len(records)}条结果（新解析{self.parsed}，复用{self.reused}），"
+                 f"耗时{(time.perf_counter() - start) * 1000:.0f}ms")
+        return html_path
+
+    @staticmethod
+    def _write(path, text):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+
+def _ms(value):
+    return f"{value / 1000:.2f}s" if value >= 1000 else f"{value}ms"
+
+
+def render_html(summary, records):
+    """单文件静态页面（无外部依赖，浏览器直接打开）"""
+    e = html.escape
+    counts = summary["counts"]
+    parts = [
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>接口自动化测试报告</title><style>",
+        "body{font-family:sans-serif;margin:24px;color:#333}table{border-collapse:collapse;width:100%;margin:12px 0}"
+        "th,td{border:1px solid #ddd;padding:4px 8px;text-align:left;font-size:13px}th{background:#f5f5f5}"
+        ".badge{display:inline-block;padding:2px 8px;border-radius:3px;color:#fff}"
+        "pre{white-space:pre-wrap;margin:0;font-size:12px}",
+        "</style></head><body>",
+        f"<h2>接口自动化测试报告</h2><p>生成时间：{e(summary['generated_at'])} ｜ 用例数：{summary['total']} ｜ "
+        f"通过率：{summary['pass_rate']:.2%} ｜ 执行时长：{_ms(summary['wall_time_ms'])} ｜ "
+        f"用例累计耗时：{_ms(summary['case_time_ms'])}</p><p>",
+    ]
+    for status in STATUSES:
+        if counts[status]:
+            parts.append(f"<span class='badge' style='background:{STATUS_COLORS[status]}'>{status} {counts[status]}</span> ")
+    parts.append("</p>")
+
+    if summary["environment"]:
+        parts.append("<h3>环境信息</h3><table>")
+        parts.extend(f"<tr><th>{e(k)}</th><td>{e(v)}</td></tr>" for k, v in summary["environment"].items())
+        parts.append("</table>")
+
+    if summary["failures"]:
+        parts.append("<h3>失败用例</h3><table><tr><th>用例</th><th>状态</th><th>原因</th></tr>")
+        parts.extend(f"<tr><td>{e(r['name'] or '')}</td><td>{r['status']}</td><td><pre>{e(r['message'])}</pre></td></tr>"
+                     for r in summary["failures"])
+        parts.append("</table>")
+
+    parts.append("<h3>最慢用例</h3><table><tr><th>用例</th><th>耗时</th></tr>")
+    parts.extend(f"<tr><td>{e(r['name'] or '')}</td><td>{_ms(r['duration'])}</td></tr>" for r in summary["slowest"])
+    parts.append("</table>")
+
+    parts.append("<h3>按模块统计</h3><table><tr><th>模块</th>" + "".join(f"<th>{s}</th>" for s in STATUSES) + "</tr>")
+    for suite, suite_counts in sorted(summary["suites"].items()):
+        parts.append(f"<tr><td>{e(suite or '-')}</td>" + "".join(f"<td>{suite_counts[s]}</td>" for s in STATUSES) + "</tr>")
+    parts.append("</table>")
+
+    parts.append("<h3>全部用例</h3><table><tr><th>#</th><th>用例</th><th>模块</th><th>状态</th><th>耗时</th><th>标签</th></tr>")
+    for number, r in enumerate(records, 1):
+        parts.append(f"<tr><td>{number}</td><td>{e(r['name'] or '')}</td><td>{e(r['suite'])}</td>"
+                     f"<td style='color:{STATUS_COLORS[r['status']]}'>{r['status']}</td><td>{_ms(r['duration'])}</td>"
+                     f"<td>{e(', '.join(t for t in r['tags'] if t))}</td></tr>")
+    parts.append("</table></body></html>")
+    return "".join(parts)
+
+
+# 全局实例
+report_builder = ReportBuilder()
@@ -0,0 +1,212 @@
+import random
+import threading
+import time
+import requests
+from config.env_config import (RETRY_TIMES, RETRY_METHODS, RETRY_STATUS, RETRY_BACKOFF, RETRY_BACKOFF_MAX,
+                               RETRY_OVERRIDES, BREAKER_ENABLED, BREAKER_THRESHOLD, BREAKER_COOLDOWN, BREAKER_EXEMPT)
+from core.logger import log
+#无需修改：失败重试（指数退避+随机抖动）与按接口熔断
+
+# 可重试的异常：连不上、超时（请求可能没到服务端或没有响应）
+RETRY_ERRORS = (requests.ConnectionError, requests.Timeout)
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+# 合并多个进程的熔断状态时取最严重的
+STATE_SEVERITY = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """接口处于熔断状态，请求未发送"""
+
+
+class CircuitBreaker:
+    """单个接口的熔断器：连续失败threshold次后打开（直接失败），冷却cooldown秒后放行一个探测请求（半开），
+    探测成功则关闭，失败则重新打开"""
+    def __init__(self, endpoint, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.endpoint = endpoint
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.failures = 0          # 连续失败次数
+        self.opened = 0            # 打开次数
+        self.fast_failed = 0       # 熔断期间直接失败的请求数
+        self.failure_cost = 0.0    # 失败请求的累计耗时（用于估算熔断节省的时间）
+        self.failure_count = 0
+        self.saved = 0.0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """是否放行本次请求（半开状态只放行一个探测请求）"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = HALF_OPEN
+                self._probing = False
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                log.info(f"【熔断】{self.endpoint} 冷却结束，放行探测请求")
+                return True
+            self.fast_failed += 1
+            # 按该接口失败请求的平均耗时估算本次节省的时间
+            self.saved += self.failure_cost / self.failure_count if self.failure_count else 0.0
+            return False
+
+    def success(self):
+        with self._lock:
+            if self.state != CLOSED:
+                log.info(f"【熔断】{self.endpoint} 探测成功，恢复正常")
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def failure(self, elapsed):
+        with self._lock:
+            self.failures += 1
+            self.failure_cost += elapsed
+            self.failure_count += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.threshold):
+                self.state = OPEN
+                self.opened += 1
+                self._opened_at = time.monotonic()
+                self._probing = False
+                log.warning(f"【熔断】{self.endpoint} 连续失败{self.failures}次，{self.cooldown}秒内直接失败")
+
+    def snapshot(self):
+        return {"state": self.state, "failures": self.failures, "opened": self.opened,
+                "fast_failed": self.fast_failed, "saved_s": round(self.saved, 2)}
+
+
+class Resilience:
+    """请求保护：幂等方法失败重试 + 按接口熔断（重试次数可按接口路径单独配置，exempt中的路径不熔断）"""
+    def __init__(self, times=RETRY_TIMES, methods=RETRY_METHODS, status=RETRY_STATUS, backoff=RETRY_BACKOFF,
+                 backoff_max=RETRY_BACKOFF_MAX, overrides=RETRY_OVERRIDES, breaker=BREAKER_ENABLED,
+                 exempt=BREAKER_EXEMPT, seed=None):
+        self.times = times
+        self.methods = {method.upper() for method in methods}
+        self.status = set(status)
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.overrides = overrides or {}
+        self.breaker_enabled = breaker
+        self.exempt = set(exempt)
+        self.breakers = {}
+        self.retries = 0           # 重试总次数
+        self.recovered = 0         # 重试后成功的请求数
+        self.random = random.Random(seed)
+        self._merged = []          # 其他进程的熔断快照（分片执行时父进程合并）
+        self._merged_saved = 0.0
+        self._lock = threading.Lock()
+
+    def breaker(self, endpoint):
+        with self._lock:
+            if endpoint not in self.breakers:
+                self.breakers[endpoint] = CircuitBreaker(endpoint)
+            return self.breakers[endpoint]
+
+    def retry_times(self, method, path):
+        """该请求允许的重试次数（非幂等方法不重试，除非按接口单独配置）"""
+        override = self.overrides.get(path, {})
+        if "times" in override:
+            return override["times"]
+        return self.times if method.upper() in self.methods else 0
+
+    def delay(self, attempt, response=None):
+        """第attempt次重试前的等待秒数：指数退避+全抖动，服务端给了Retry-After时优先按它等待"""
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.backoff_max)
+        with self._lock:
+            return self.random.uniform(0, min(self.backoff_max, self.backoff * 2 ** attempt))
+
+    def _failed(self, response):
+        return response.status_code >= 500 or response.status_code in self.status
+
+    def call(self, method, path, send, endpoint=None, expect_code=None):
+        """按策略执行send()（发送一次请求并返回响应）；endpoint为熔断的统计单位（默认按路径，多环境时带上域名）
+        expect_code为用例预期的状态码：返回该状态码（如预期500的异常用例）时不重试，也不计为接口故障"""
+        breaker = self.breaker(endpoint or path) if self.breaker_enabled and path not in self.exempt else None
+        times = self.retry_times(method, path)
+        attempt = 0
+        while True:
+            if breaker is not None and not breaker.allow():
+                raise CircuitOpenError(f"接口熔断中，未发送请求：{method.upper()} {path}"
+                                       f"（连续失败{breaker.failures}次，{breaker.cooldown}秒后探测）")
+            start = time.perf_counter()
+            response = error = None
+            try:
+                response = send()
+            except RETRY_ERRORS as e:
+                error = e
+            except Exception:
+                # 不重试的异常（如ChunkedEncodingError）也计为接口故障，否则半开状态的探测名额一直被占用
+                if breaker is not None:
+                    breaker.failure(time.perf_counter() - start)
+                raise
+            elapsed = time.perf_counter() - start
+            expected = response is not None and response.status_code == expect_code
+            failed = error is not None or (not expected and self._failed(response))
+            if breaker is not None:
+                # 4xx（除429）是用例/参数问题，不算接口故障
+                if error is not None or (response.status_code >= 500 and not expected):
+                    breaker.failure(elapsed)
+                else:
+                    breaker.success()
+            if not failed or attempt >= times or (response is not None and response.status_code not in self.status):
+                if error is not None:
+                    raise error
+                if attempt and not failed:
+                    with self._lock:
+                        self.recovered += 1
+                return response
+            wait = self.delay(attempt, response)
+            if response is not None:
+                response.close()  # 流式响应未读取正文，先归还连接
+            attempt += 1
+            with self._lock:
+                self.retries += 1
+            reason = str(error) if error is not None else f"状态码{response.status_code}"
+            log.warning(f"【重试】{method.upper()} {path} 第{attempt}/{times}次，{wait:.2f}秒后重试（{reason}）")
+            time.sleep(wait)
+
+    def summary(self):
+        """运行汇总：重试次数、重试后成功数、各接口熔断状态和节省的时间"""
+        breakers = {endpoint: breaker.snapshot() for endpoint, breaker in self.breakers.items()
+                    if breaker.opened or breaker.failures}
+        for snapshots in self._merged:
+            for endpoint, stats in snapshots.items():
+                breakers[endpoint] = merge_snapshot(breakers.get(endpoint), stats)
+        saved = sum(breaker.saved for breaker in self.breakers.values()) + self._merged_saved
+        return {"retries": self.retries, "recovered": self.recovered, "saved_s": round(saved, 2), "breakers": breakers}
+
+    def merge(self, summary):
+        """合并其他进程的运行汇总（summary()的结果，分片执行时父进程汇总各工作进程）"""
+        with self._lock:
+            self.retries += summary["retries"]
+            self.recovered += summary["recovered"]
+            self._merged_saved += summary["saved_s"]
+            self._merged.append(summary["breakers"])
+
+    def environment_lines(self):
+        """Allure环境信息里的重试/熔断统计"""
+        summary = self.summary()
+        lines = [f"resilience.retries={summary['retries']}（重试后成功{summary['recovered']}）",
+                 f"resilience.saved={summary['saved_s']}s"]
+        lines += [f"breaker.{endpoint}={stats['state']} / 打开{stats['opened']}次 / 直接失败{stats['fast_failed']}次"
+                  for endpoint, stats in summary["breakers"].items()]
+        return lines
+
+
+def merge_snapshot(current, other):
+    """合并同一接口在两个进程里的熔断快照"""
+    if current is None:
+        return dict(other)
+    return {"state": max(current["state"], other["state"], key=STATE_SEVERITY.get),
+            "failures": max(current["failures"], other["failures"]), "opened": current["opened"] + other["opened"],
+            "fast_failed": current["fast_failed"] + other["fast_failed"],
+            "saved_s": round(current["saved_s"] + other["saved_s"], 2)}
+
+
+# 全局实例
+resilience = Resilience()
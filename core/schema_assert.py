@@ -0,0 +1,390 @@
+import json
+import os
+import re
+import threading
+import time
+import yaml
+from config.env_config import SCHEMA_DIR, SCHEMA_ENGINE, SCHEMA_MAX_ERRORS
+from core.latency import percentile
+from core.logger import log
+try:
+    import jsonschema  # 完整的JSON Schema实现（含format、跨文件引用等），未安装时退回内置校验
+except ImportError:
+    jsonschema = None
+#无需修改：响应结构校验（Schema文件每次运行只读取、编译一次，按文件缓存复用）
+
+# 内置校验支持的关键字
+KEYWORDS = {"$ref", "type", "enum", "const", "minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum",
+            "multipleOf", "minLength", "maxLength", "pattern", "items", "minItems", "maxItems", "uniqueItems",
+            "properties", "required", "additionalProperties", "minProperties", "maxProperties",
+            "allOf", "anyOf", "oneOf", "not"}
+# 不影响校验结果的关键字（说明、定义）
+ANNOTATIONS = {"$schema", "$id", "$comment", "title", "description", "default", "examples", "definitions", "$defs",
+               "format", "readOnly", "writeOnly", "deprecated"}
+# 最慢用例列出的条数
+SLOWEST_CASES = 5
+
+
+def type_name(value):
+    """值对应的JSON类型名"""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, int):
+        return "integer"
+    if isinstance(value, float):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, list):
+        return "array"
+    if isinstance(value, dict):
+        return "object"
+    return type(value).__name__
+
+
+def is_type(value, expected):
+    actual = type_name(value)
+    return (actual == expected or (expected == "number" and actual == "integer")
+            or (expected == "integer" and actual == "number" and value.is_integer()))
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _child(path, key):
+    return f"{path}[{key}]" if isinstance(key, int) else f"{path}.{key}"
+
+
+def json_equal(a, b):
+    """按JSON语义比较（enum/const）：true与1不相等，1与1.0相等"""
+    if _is_number(a) and _is_number(b):
+        return a == b
+    if type_name(a) != type_name(b):
+        return False
+    if isinstance(a, list):
+        return len(a) == len(b) and all(json_equal(x, y) for x, y in zip(a, b))
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(json_equal(a[key], b[key]) for key in a)
+    return a == b
+
+
+def _accept(value, path, errors):
+    pass
+
+
+def format_errors(errors):
+    """不符合项最多列出SCHEMA_MAX_ERRORS条"""
+    listed = "；".join(errors[:SCHEMA_MAX_ERRORS])
+    return listed + (f"……共{len(errors)}处" if len(errors) > SCHEMA_MAX_ERRORS else "")
+
+
+class BuiltinValidator:
+    """内置校验（JSON Schema常用关键字）：Schema预先编译成检查函数，校验时不再解析Schema
+    $ref只支持文件内引用（#/definitions/...）；含不支持的关键字时校验直接失败（不会因为忽略关键字而误判通过）"""
+    def __init__(self, schema, name=""):
+        self.root = schema
+        self.name = name
+        self.unsupported = set()
+        self._refs = {}
+        self._check = self._compile(schema)
+        if self.unsupported:
+            log.warning(f"Schema {name} 含内置校验不支持的关键字，使用它的用例将校验失败：{sorted(self.unsupported)}")
+
+    def errors(self, doc):
+        """返回全部不符合项（路径：原因）"""
+        if self.unsupported:
+            return [f"$：Schema {self.name} 含内置校验不支持的关键字{sorted(self.unsupported)}，"
+                    f"无法完整校验（pip install jsonschema）"]
+        errors = []
+        self._check(doc, "$", errors)
+        return errors
+
+    def _compile(self, schema):
+        if schema is True or schema == {}:
+            return _accept
+        if schema is False:
+            return lambda value, path, errors: errors.append(f"{path}：不允许出现")
+        if not isinstance(schema, dict):
+            raise ValueError(f"Schema应为对象或布尔值，实际为{type_name(schema)}")
+        self.unsupported.update(keyword for keyword in schema if keyword not in KEYWORDS | ANNOTATIONS)
+        checks = []
+        if "$ref" in schema:
+            checks.append(self._ref(schema["$ref"]))
+        if "type" in schema:
+            checks.append(self._type(schema["type"]))
+        if "enum" in schema:
+            enum = schema["enum"]
+            checks.append(lambda value, path, errors: any(json_equal(value, item) for item in enum)
+                          or errors.append(f"{path}：{value!r}不在{enum}中"))
+        if "const" in schema:
+            const = schema["const"]
+            checks.append(lambda value, path, errors: json_equal(value, const)
+                          or errors.append(f"{path}：应为{const!r}，实际为{value!r}"))
+        checks.extend(self._number(schema))
+        checks.extend(self._string(schema))
+        checks.extend(self._array(schema))
+        checks.extend(self._object(schema))
+        checks.extend(self._combine(schema))
+        if len(checks) == 1:
+            return checks[0]
+
+        def check(value, path, errors):
+            for item in checks:
+                item(value, path, errors)
+        return check
+
+    def _ref(self, ref):
+        """文件内引用：首次遇到时编译目标（先占位，自引用的Schema不会无限递归），校验时按引用取检查函数"""
+        if not isinstance(ref, str) or not ref.startswith("#"):
+            raise ValueError(f"内置校验只支持文件内引用（#/...）：{ref}，跨文件引用需安装jsonschema")
+        if ref not in self._refs:
+            self._refs[ref] = None
+            target = self.root
+            for part in ref[1:].split("/")[1:]:
+                part = part.replace("~1", "/").replace("~0", "~")
+                try:
+                    target = target[int(part)] if isinstance(target, list) else target[part]
+                except (KeyError, IndexError, ValueError, TypeError):
+                    raise ValueError(f"Schema引用不存在：{ref}")
+            self._refs[ref] = self._compile(target)
+        refs = self._refs
+        return lambda value, path, errors: refs[ref](value, path, errors)
+
+    @staticmethod
+    def _type(expected):
+        types = expected if isinstance(expected, list) else [expected]
+
+        def check(value, path, errors):
+            if not any(is_type(value, t) for t in types):
+                errors.append(f"{path}：类型应为{'/'.join(types)}，实际为{type_name(value)}")
+        return check
+
+    @staticmethod
+    def _number(schema):
+        rules = [(schema[k], test, message) for k, test, message in (
+            ("minimum", lambda v, limit: v >= limit, "应≥{}"), ("maximum", lambda v, limit: v <= limit, "应≤{}"),
+            ("exclusiveMinimum", lambda v, limit: v > limit, "应>{}"), ("exclusiveMaximum", lambda v, limit: v < limit, "应<{}"),
+            ("multipleOf", lambda v, limit: (v / limit).is_integer(), "应为{}的倍数"))
+            if _is_number(schema.get(k))]
+        if not rules:
+            return []
+
+        def check(value, path, errors):
+            if _is_number(value):
+                for limit, test, message in rules:
+                    if not test(value, limit):
+                        errors.append(f"{path}：{message.format(limit)}，实际为{value}")
+        return [check]
+
+    @staticmethod
+    def _string(schema):
+        min_length, max_length = schema.get("minLength"), schema.get("maxLength")
+        pattern = re.compile(schema["pattern"]) if "pattern" in schema else None
+        if min_length is None and max_length is None and pattern is None:
+            return []
+
+        def check(value, path, errors):
+            if not isinstance(value, str):
+                return
+            if min_length is not None and len(value) < min_length:
+                errors.append(f"{path}：长度应≥{min_length}，实际为{len(value)}")
+            if max_length is not None and len(value) > max_length:
+                errors.append(f"{path}：长度应≤{max_length}，实际为{len(value)}")
+            if pattern is not None and not pattern.search(value):
+                errors.append(f"{path}：{value!r}不匹配{pattern.pattern}")
+        return [check]
+
+    def _array(self, schema):
+        items = self._compile(schema["items"]) if isinstance(schema.get("items"), (dict, bool)) else None
+        if "items" in schema and items is None:
+            self.unsupported.add("items（数组形式）")
+        min_items, max_items, unique = schema.get("minItems"), schema.get("maxItems"), schema.get("uniqueItems")
+        if items in (None, _accept) and min_items is None and max_items is None and not unique:
+            return []
+
+        def check(value, path, errors):
+            if not isinstance(value, list):
+                return
+            if min_items is not None and len(value) < min_items:
+                errors.append(f"{path}：元素个数应≥{min_items}，实际为{len(value)}")
+            if max_items is not None and len(value) > max_items:
+                errors.append(f"{path}：元素个数应≤{max_items}，实际为{len(value)}")
+            if unique and len({json.dumps(item, sort_keys=True) for item in value}) < len(value):
+                errors.append(f"{path}：元素有重复")
+            if items not in (None, _accept):
+                for index, item in enumerate(value):
+                    items(item, _child(path, index), errors)
+        return [check]
+
+    def _object(self, schema):
+        properties = {key: self._compile(sub) for key, sub in (schema.get("properties") or {}).items()}
+        required = tuple(schema.get("required") or ())
+        additional = schema.get("additionalProperties", True)
+        additional = None if additional is True else self._compile(additional)
+        min_props, max_props = schema.get("minProperties"), schema.get("maxProperties")
+        if not (properties or required or additional or min_props is not None or max_props is not None):
+            return []
+
+        def check(value, path, errors):
+            if not isinstance(value, dict):
+                return
+            for key in required:
+                if key not in value:
+                    errors.append(f"{_child(path, key)}：缺少必填字段")
+            for key, item in value.items():
+                sub = properties.get(key, additional)
+                if sub is not None:
+                    sub(item, _child(path, key), errors)
+            if min_props is not None and len(value) < min_props:
+                errors.append(f"{path}：字段数应≥{min_props}，实际为{len(value)}")
+            if max_props is not None and len(value) > max_props:
+                errors.append(f"{path}：字段数应≤{max_props}，实际为{len(value)}")
+        return [check]
+
+    def _combine(self, schema):
+        checks = []
+        for sub in schema.get("allOf") or ():
+            checks.append(self._compile(sub))
+        if schema.get("anyOf"):
+            options = [self._compile(sub) for sub in schema["anyOf"]]
+            checks.append(lambda value, path, errors: any(not _errors(o, value, path) for o in options)
+                          or errors.append(f"{path}：不满足anyOf中任何一项"))
+        if schema.get("oneOf"):
+            options = [self._compile(sub) for sub in schema["oneOf"]]
+
+            def one_of(value, path, errors):
+                matched = sum(1 for option in options if not _errors(option, value, path))
+                if matched != 1:
+                    errors.append(f"{path}：应恰好满足oneOf中的一项，实际满足{matched}项")
+            checks.append(one_of)
+        if "not" in schema:
+            negated = self._compile(schema["not"])
+            checks.append(lambda value, path, errors: _errors(negated, value, path)
+                          or errors.append(f"{path}：不应满足not中的Schema"))
+        return checks
+
+
+def _errors(check, value, path):
+    errors = []
+    check(value, path, errors)
+    return errors
+
+
+class JsonSchemaValidator:
+    """jsonschema实现：按Schema声明的$schema版本选择校验器，编译一次后复用"""
+    def __init__(self, schema, name=""):
+        cls = jsonschema.validators.validator_for(schema)
+        try:
+            cls.check_schema(schema)
+        except jsonschema.SchemaError as e:
+            raise ValueError(f"Schema不合法（{name}）：{e.message}")
+        self._validator = cls(schema, format_checker=getattr(cls, "FORMAT_CHECKER", None))
+
+    def errors(self, doc):
+        errors = []
+        for error in self._validator.iter_errors(doc):
+            path = "$"
+            for key in error.absolute_path:
+                path = _child(path, key)
+            errors.append(f"{path}：{error.message}")
+        return errors
+
+
+class SchemaRegistry:
+    """Schema缓存：同一文件每次运行只读取、编译一次（加载用例时即编译，文件有误时随用例数据错误一起报出）；
+    记录每条用例的校验耗时，运行结束时汇总"""
+    def __init__(self, schema_dir=SCHEMA_DIR, engine=SCHEMA_ENGINE):
+        self.schema_dir = schema_dir
+        if engine == "auto":
+            engine = "jsonschema" if jsonschema is not None else "builtin"
+        self.engine = engine
+        self._validators = {}
+        self._compile_ms = {}
+        self._records = []         # (Schema, 用例名, 校验耗时ms, 是否通过)
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        """取编译好的校验器（首次使用时读取并编译）"""
+        name = os.path.normpath(str(name).strip())
+        validator = self._validators.get(name)
+        if validator is None:
+            with self._lock:
+                validator = self._validators.get(name)
+                if validator is None:
+                    validator = self._validators[name] = self._compile(name)
+        return validator
+
+    def _compile(self, name):
+        path = os.path.join(self.schema_dir, name)
+        if not os.path.isfile(path):
+            raise ValueError(f"Schema文件不存在：{path}")
+        if self.engine == "jsonschema" and jsonschema is None:
+            raise ValueError("SCHEMA_ENGINE为jsonschema，但未安装jsonschema（pip install jsonschema）")
+        start = time.perf_counter()
+        with open(path, encoding="utf-8") as f:
+            try:
+                schema = yaml.safe_load(f) if path.endswith((".yaml", ".yml")) else json.load(f)
+            except (ValueError, yaml.YAMLError) as e:
+                raise ValueError(f"Schema文件解析失败（{name}）：{str(e)}")
+        validator = (JsonSchemaValidator if self.engine == "jsonschema" else BuiltinValidator)(schema, name)
+        self._compile_ms[name] = (time.perf_counter() - start) * 1000
+        log.debug(f"已编译Schema：{name}（{self.engine}，{self._compile_ms[name]:.2f}ms）")
+        return validator
+
+    def validate(self, name, doc, case_name=None):
+        """校验文档，返回(不符合项列表, 校验耗时ms)"""
+        validator = self.get(name)
+        start = time.perf_counter()
+        errors = validator.errors(doc)
+        ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self._records.append((os.path.normpath(str(name).strip()), case_name, ms, not errors))
+        return errors, ms
+
+    def summary(self):
+        """按Schema统计编译耗时、校验次数/失败次数、校验耗时分布（毫秒），以及校验最慢的用例"""
+        with self._lock:
+            records = list(self._records)
+        grouped = {name: [] for name in self._compile_ms}
+        for name, _, ms, ok in records:
+            grouped.setdefault(name, []).append((ms, ok))
+        schemas = {}
+        for name, items in sorted(grouped.items()):
+            times = sorted(ms for ms, _ in items)
+            schemas[name] = {"compile_ms": round(self._compile_ms.get(name, 0.0), 2), "count": len(items),
+                             "failed": sum(1 for _, ok in items if not ok), "total_ms": round(sum(times), 2),
+                             "avg_ms": round(sum(times) / len(times), 3) if times else 0.0,
+                             "p95_ms": round(percentile(times, 95), 3), "max_ms": round(times[-1], 3) if times else 0.0}
+        slowest = sorted(records, key=lambda record: record[2], reverse=True)[:SLOWEST_CASES]
+        return {"engine": self.engine, "total_ms": round(sum(record[2] for record in records), 2), "schemas": schemas,
+                "slowest": [{"schema": name, "case_name": case_name, "ms": round(ms, 3)}
+                            for name, case_name, ms, _ in slowest]}
+
+    def state(self):
+        """编译耗时和校验记录（分片执行时工作进程写出，由父进程merge）"""
+        with self._lock:
+            return {"compile_ms": dict(self._compile_ms), "records": [list(record) for record in self._records]}
+
+    def merge(self, state):
+        """合并其他进程的编译耗时和校验记录（同一Schema的编译耗时取最大值）"""
+        with self._lock:
+            for name, ms in state["compile_ms"].items():
+                self._compile_ms[name] = max(ms, self._compile_ms.get(name, 0.0))
+            self._records.extend(tuple(record) for record in state["records"])
+
+    def environment_lines(self):
+        """Allure环境信息里的结构校验统计（没有用到Schema时为空）"""
+        summary = self.summary()
+        if not summary["schemas"]:
+            return []
+        lines = [f"schema.validate={summary['engine']} / 合计{summary['total_ms']}ms"]
+        lines += [f"schema.{name}=校验{stats['count']}次 / 失败{stats['failed']}次 / 平均{stats['avg_ms']}ms / "
+                  f"p95 {stats['p95_ms']}ms / 编译{stats['compile_ms']}ms" for name, stats in summary["schemas"].items()]
+        return lines
+
+
+# 全局实例
+schema_registry = SchemaRegistry()
@@ -0,0 +1,194 @@
+import glob
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+from config.env_config import BASE_DIR, ENV_TOKEN, ENV_WORKER, ENV_SHARD_PLAN, ENV_RUN_ID
+from core.case_flow import CaseGraph
+from core.case_history import case_history
+from core.latency import LatencyRecorder, REPORT_DIR, write_allure_environment
+from core.logger import LOG_DIR, log
+from core.resilience import resilience
+from core.schema_assert import schema_registry
+from core.trace import trace_sink
+#无需修改：多进程分片执行（父进程只登录一次，Token下发给所有工作进程）
+
+SHARD_DIR = os.path.join(BASE_DIR, "reports", "shards")
+RESULTS_DIR = os.path.join(BASE_DIR, "reports", "allure-results")
+# loguru默认格式的行首时间戳，用于合并日志时排序
+LOG_TIME_RE = re.compile(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3}")
+
+
+def select_shard(cases):
+    """工作进程中按分片计划筛选本进程要执行的用例（cases可以是流式读取的迭代器，只保留分到的用例）；
+    非分片执行时原样返回（不另复制一份列表）：依赖图排序和pytest参数化都需要全部用例，
+    此时内存仍随用例总数增长，流式读取只省去了原始行数据"""
+    plan_path = os.environ.get(ENV_SHARD_PLAN)
+    worker = os.environ.get(ENV_WORKER)
+    if not plan_path or worker is None:
+        return cases
+    with open(plan_path, encoding="utf-8") as f:
+        plan = json.load(f)
+    indices = plan["shards"][int(worker)]
+    selected = dict.fromkeys(indices)
+    total = 0
+    for index, case in enumerate(cases):
+        total = index + 1
+        if index in selected:
+            selected[index] = case
+    if plan["total"] != total:
+        raise Exception(f"分片计划与用例数不一致：计划{plan['total']}条，实际{total}条")
+    log.info(f"工作进程{worker}：分到{len(indices)}/{total}条用例")
+    return list(selected.values())
+
+
+def write_worker_stats():
+    """工作进程：把重试/熔断统计和结构校验统计写到reports/stats.worker-<编号>.json，由父进程合并到Allure环境信息"""
+    worker = os.environ.get(ENV_WORKER)
+    if worker is None:
+        return
+    path = os.path.join(REPORT_DIR, f"stats.worker-{worker}.json")
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"resilience": resilience.summary(), "schema": schema_registry.state()}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+class ShardRunner:
+    """把用例均衡分配到多个pytest工作进程，结束后合并Allure结果和日志"""
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+
+    def plan(self, cases):
+        """按历史耗时分配用例下标：有依赖的用例链整体分到同一进程，
+        链路按预估耗时从长到短依次分给当前总耗时最少的进程（没有历史时等同于按用例数均分）"""
+        groups = CaseGraph(cases).groups()
+        estimates = case_history.estimate(cases)
+        count = max(1, min(self.workers, len(groups)))
+        shards = [[] for _ in range(count)]
+        loads = [0.0] * count
+        for cost, group in sorted(((sum(estimates[i] for i in group), group) for group in groups),
+                                  key=lambda item: item[0], reverse=True):
+            worker = loads.index(min(loads))
+            shards[worker].extend(group)
+            loads[worker] += cost
+        log.info("分片预估耗时：" + "，".join(f"进程{i} {load:.1f}秒" for i, load in enumerate(loads)))
+        return [sorted(shard) for shard in shards]
+
+    def run(self, pytest_args=()):
+        """执行分片用例，返回合并后的退出码"""
+        # 延迟导入：工作进程不需要父进程的登录和用例读取
+        from core.auth import TokenManager
+        from core.case_source import case_source
+        from core.http_client import HttpClient
+
+        try:
+            client = HttpClient()
+            token = TokenManager(client.base_url).get(client)
+        except Exception as e:
+            log.error(f"分片执行终止：{str(e)}")
+            return 1
+        cases = case_source.get_cases()
+        shards = self.plan(cases)
+
+        if os.path.exists(SHARD_DIR):
+            shutil.rmtree(SHARD_DIR)
+        # 上次异常中断时残留的工作进程报告不参与本次合并
+        for path in glob.glob(os.path.join(REPORT_DIR, "*.worker-*.json")):
+            os.remove(path)
+        os.makedirs(SHARD_DIR)
+        plan_path = os.path.join(SHARD_DIR, "plan.json")
+        with open(plan_path, "w", encoding="utf-8") as f:
+            json.dump({"total": len(cases), "shards": shards}, f)
+
+        log.info(f"======= 分片执行：{len(cases)}条用例，{len(shards)}个工作进程 =======")
+        # 父进程Token命中缓存时不发请求、不写追踪日志，由它先记录本次运行ID（查询工具默认查它）
+        trace_sink.mark_latest()
+        processes = []
+        for worker in range(len(shards)):
+            env = dict(os.environ)
+            env.update({ENV_TOKEN: token, ENV_WORKER: str(worker), ENV_SHARD_PLAN: plan_path, ENV_RUN_ID: trace_sink.run_id})
+            out = open(os.path.join(SHARD_DIR, f"worker-{worker}.txt"), "w", encoding="utf-8")
+            cmd = [sys.executable, "-m", "pytest", *pytest_args,
+                   f"--alluredir={self._results_dir(worker)}", "--clean-alluredir"]
+            processes.append((subprocess.Popen(cmd, cwd=BASE_DIR, env=env, stdout=out, stderr=subprocess.STDOUT), out))
+
+        exit_code = 0
+        for worker, (process, out) in enumerate(processes):
+            code = process.wait()
+            out.close()
+            log.info(f"工作进程{worker}结束，退出码：{code}")
+            # 5：该进程没有收集到用例，不算失败
+            if code not in (0, 5):
+                exit_code = max(exit_code, code)
+
+        self.merge_results(len(shards))
+        self.merge_latency()
+        self.merge_logs(len(shards))
+        # 追踪日志各进程分文件写在同一个运行目录下，查询工具按索引合并，不需要搬运
+        trace_sink.close()
+        if os.path.isdir(trace_sink.run_dir):
+            log.info(f"追踪日志：{trace_sink.run_dir}（查询：python -m core.trace_query）")
+        return exit_code
+
+    @staticmethod
+    def _results_dir(worker):
+        return os.path.join(SHARD_DIR, f"allure-results-{worker}")
+
+    def merge_results(self, count):
+        """把各工作进程的allure-results合并到reports/allure-results（结果文件名是uuid，不会冲突；
+        各进程的environment.properties不搬运，由merge_latency按合并后的统计重新生成）"""
+        if os.path.exists(RESULTS_DIR):
+            shutil.rmtree(RESULTS_DIR)
+        os.makedirs(RESULTS_DIR)
+        merged = 0
+        for worker in range(count):
+            worker_dir = self._results_dir(worker)
+            if not os.path.isdir(worker_dir):
+                continue
+            for name in os.listdir(worker_dir):
+                if name == "environment.properties":
+                    continue
+                shutil.move(os.path.join(worker_dir, name), os.path.join(RESULTS_DIR, name))
+                merged += 1
+        log.info(f"已合并{merged}个Allure结果文件到：{RESULTS_DIR}")
+
+    def merge_latency(self):
+        """合并各工作进程的耗时报告（重新计算分位数）和重试/熔断、结构校验统计，写入Allure环境信息"""
+        recorder = LatencyRecorder()
+        for path in glob.glob(os.path.join(REPORT_DIR, "latency.worker-*.json")):
+            recorder.merge_file(path)
+            os.remove(path)
+        for path in glob.glob(os.path.join(REPORT_DIR, "stats.worker-*.json")):
+            with open(path, encoding="utf-8") as f:
+                stats = json.load(f)
+            resilience.merge(stats["resilience"])
+            schema_registry.merge(stats["schema"])
+            os.remove(path)
+        _, report = recorder.write_report(os.path.join(REPORT_DIR, "latency.json"))
+        write_allure_environment(RESULTS_DIR, report["summary"],
+                                 [*resilience.environment_lines(), *schema_registry.environment_lines()])
+        log.info(f"已合并耗时报告：{len(report['records'])}条请求记录")
+
+    def merge_logs(self, count):
+        """按时间戳合并各工作进程日志，追加到主日志后删除工作进程日志"""
+        records = []
+        for worker in range(count):
+            for path in sorted(glob.glob(os.path.join(LOG_DIR, f"api_auto.worker-{worker}*.log"))):
+                with open(path, encoding="utf-8", errors="replace") as f:
+                    for line in f:
+                        # 没有时间戳的行（如异常堆栈）属于上一条日志
+                        if LOG_TIME_RE.match(line) or not records:
+                            records.append([line[:23], worker, line])
+                        else:
+                            records[-1][2] += line
+                os.remove(path)
+        records.sort(key=lambda record: (record[0], record[1]))
+        log.complete()
+        with open(os.path.join(LOG_DIR, "api_auto.log"), "a", encoding="utf-8") as f:
+            for _, worker, text in records:
+                f.write(f"[worker-{worker}] {text}")
+        log.info(f"已合并{count}个工作进程的日志，共{len(records)}条")
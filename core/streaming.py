@@ -0,0 +1,186 @@
+import codecs
+import hashlib
+import json
+import re
+import tempfile
+from config.env_config import STREAM_CHUNK_SIZE, STREAM_MEMORY_MAX, STREAM_HEAD_BYTES
+from core.json_assert import WILDCARD, compile_path, loads
+#无需修改：流式响应（分块读取，只保留大小/哈希/前N条记录，必要时落临时文件）
+
+# JSON词法单元：字符串 / 结构符号 / 数字、true、false、null
+TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"|[{}\[\]:,]|[^\s{}\[\]:,"]+')
+WHITESPACE_RE = re.compile(r"\s*")
+TRUE_VALUES = ("1", "true", "yes", "y", "是")
+
+
+class StreamSpec:
+    """流式读取选项：records="data.list:5"表示增量解析data.list数组的前5条；keep_body为True时保留完整正文
+    （超过STREAM_MEMORY_MAX落临时文件），供整体JSON断言或失败时排查使用"""
+    __slots__ = ("records_path", "records", "keep_body")
+
+    def __init__(self, records=None, keep_body=False):
+        self.records_path, self.records = None, 0
+        if records:
+            path, _, count = str(records).rpartition(":")
+            if not count.strip().isdigit():
+                path, count = str(records), "10"
+            self.records_path, self.records = path.strip(), int(count)
+        self.keep_body = keep_body
+
+    @classmethod
+    def from_case(cls, case):
+        """从Excel行解析：stream列开启；stream_records列指定增量解析的记录；有expect_key但没指定记录时保留完整正文"""
+        if str(case.get("stream") or "").strip().lower() not in TRUE_VALUES:
+            return None
+        records = case.get("stream_records")
+        return cls(records=records, keep_body=bool(case.get("expect_key")) and not records)
+
+
+class JsonRecordReader:
+    """增量解析JSON中指定路径数组的前N条记录：只缓存尚未解析完的片段，拿够N条后不再解析"""
+    def __init__(self, path, limit):
+        steps = compile_path(path).steps if path else ()
+        if WILDCARD in steps:
+            raise ValueError(f"流式记录路径不支持通配符：{path}")
+        self.steps = list(steps)
+        self.limit = limit
+        self.records = []
+        self.done = limit <= 0
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._buffer = ""
+        self._frames = []          # 每层容器：[类型, 当前key或下标, 是否已读到冒号]
+        self._in_target = False
+
+    def _path(self):
+        return [frame[1] for frame in self._frames]
+
+    def feed(self, chunk):
+        if self.done:
+            return
+        self._buffer += self._text_decoder.decode(chunk)
+        position = self._records(0) if self._in_target else self._scan(0)
+        self._buffer = self._buffer[position:]
+
+    def _scan(self, position):
+        """在找到目标数组之前按词法单元跟踪当前所在路径"""
+        buffer = self._buffer
+        while not self.done:
+            position = WHITESPACE_RE.match(buffer, position).end()
+            match = TOKEN_RE.match(buffer, position)
+            # 末尾的字符串/数字可能还没读完，等下一块
+            if match is None or (match.end() == len(buffer) and match.group() not in "{}[]:,"):
+                return position
+            token = match.group()
+            frame = self._frames[-1] if self._frames else None
+            if token in "{[":
+                if token == "[" and self._path() == self.steps and (frame is None or frame[0] == "[" or frame[2]):
+                    self._in_target = True
+                    return self._records(match.end())
+                self._frames.append([token, None if token == "{" else 0, False])
+            elif token in "}]":
+                if self._frames:
+                    self._frames.pop()
+                if not self._frames:
+                    self.done = True
+            elif token == ":":
+                frame[2] = True
+            elif token == ",":
+                if frame[0] == "{":
+                    frame[1], frame[2] = None, False
+                else:
+                    frame[1] += 1
+            elif frame is not None and frame[0] == "{" and not frame[2]:
+                frame[1] = json.loads(token)
+            position = match.end()
+        return position
+
+    def _records(self, position):
+        """在目标数组内逐条解析记录"""
+        buffer = self._buffer
+        while len(self.records) < self.limit:
+            position = WHITESPACE_RE.match(buffer, position).end()
+            if position >= len(buffer):
+                return position
+            if buffer[position] == ",":
+                position += 1
+                continue
+            if buffer[position] == "]":
+                break
+            try:
+                record, end = self._decoder.raw_decode(buffer, position)
+            except ValueError:
+                return position
+            # 数字可能被分块截断（如"12"后面还有"3"），后面必须还有字符才算完整
+            if end == len(buffer):
+                return position
+            self.records.append(record)
+            position = end
+        self.done = True
+        return len(buffer)
+
+
+class StreamBody:
+    """分块读取响应正文：统计字节数和sha256，保留开头一小段用于日志，按需解析记录或保留完整正文"""
+    def __init__(self, spec=None):
+        self.spec = spec or StreamSpec()
+        self.size = 0
+        self.head = b""
+        self._hash = hashlib.sha256()
+        self.reader = JsonRecordReader(self.spec.records_path, self.spec.records) if self.spec.records else None
+        # 完整正文：不超过STREAM_MEMORY_MAX时在内存，超过后自动转存到临时文件
+        self.file = tempfile.SpooledTemporaryFile(max_size=STREAM_MEMORY_MAX) if self.spec.keep_body else None
+
+    def consume(self, response):
+        """读取全部正文（读完后连接归还连接池）"""
+        try:
+            for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+                self.size += len(chunk)
+                self._hash.update(chunk)
+                if len(self.head) < STREAM_HEAD_BYTES:
+                    self.head += chunk[:STREAM_HEAD_BYTES - len(self.head)]
+                if self.reader is not None:
+                    self.reader.feed(chunk)
+                if self.file is not None:
+                    self.file.write(chunk)
+        finally:
+            response.close()
+        if self.file is not None:
+            self.file.seek(0)
+        return self
+
+    @property
+    def sha256(self):
+        return self._hash.hexdigest()
+
+    @property
+    def records(self):
+        return self.reader.records if self.reader is not None else None
+
+    @property
+    def spilled(self):
+        """完整正文是否已落到临时文件"""
+        return self.file is not None and getattr(self.file, "_rolled", False)
+
+    def read(self):
+        """读取完整正文（未保留时抛出异常）"""
+        if self.file is None:
+            raise Exception("流式响应未保留完整正文（用例需设置expect_key或不指定stream_records）")
+        self.file.seek(0)
+        return self.file.read()
+
+    def json(self):
+        """断言用的JSON：指定了记录时返回记录列表，否则解析完整正文"""
+        if self.reader is not None:
+            return self.records
+        return loads(self.read())
+
+    def describe(self, encoding="utf-8"):
+        """日志文本：大小、哈希、开头片段"""
+        head = self.head.decode(encoding or "utf-8", errors="replace")
+        summary = f"<流式正文 {self.size}字节 sha256={self.sha256[:16]}"
+        if self.records is not None:
+            summary += f" 已解析{len(self.records)}条记录"
+        if self.spilled:
+            summary += " 已落临时文件"
+        return f"{summary}> {head}{'...' if self.size > len(self.head) else ''}"
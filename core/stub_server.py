@@ -0,0 +1,273 @@
+import json
+import math
+import os
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+import yaml
+from config.env_config import STUB_HOST, STUB_PORT, STUB_FIXTURES, LOGIN_URL, COMPRESS_MIN_BYTES
+from core.cassette import cassette_key
+from core.compression import compress, decompress
+from core.json_assert import parse_expectations
+from core.logger import log
+#无需修改：本地替身接口服务（延迟分布、错误率、429限流、大报文注入）
+
+
+def sample_latency(spec, rng):
+    """按配置的分布采样延迟（秒）
+    fixed：ms；uniform：min_ms/max_ms；normal：mean_ms/std_ms；
+    lognormal：median_ms/sigma（长尾）；exponential：mean_ms"""
+    if not spec:
+        return 0.0
+    dist = spec.get("dist", "fixed")
+    if dist == "fixed":
+        ms = spec.get("ms", 0)
+    elif dist == "uniform":
+        ms = rng.uniform(spec.get("min_ms", 0), spec.get("max_ms", 0))
+    elif dist == "normal":
+        ms = rng.gauss(spec.get("mean_ms", 0), spec.get("std_ms", 0))
+    elif dist == "lognormal":
+        ms = rng.lognormvariate(math.log(max(spec.get("median_ms", 1), 1e-3)), spec.get("sigma", 0.5))
+    elif dist == "exponential":
+        ms = rng.expovariate(1.0 / spec["mean_ms"]) if spec.get("mean_ms") else 0
+    else:
+        raise ValueError(f"不支持的延迟分布：{dist}")
+    return max(ms, 0) / 1000
+
+
+class TokenBucket:
+    """令牌桶限流：超出rate（每秒请求数）时返回False，由服务端回429"""
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+def build_payload(size):
+    """生成约size字节的JSON列表报文"""
+    item = {"id": 0, "name": "stub-record", "value": "x" * 64}
+    per_item = len(json.dumps(item)) + 2
+    count = max(1, size // per_item)
+    return json.dumps({"code": 0, "msg": 0, "data": {"total": count, "list": [
+        dict(item, id=i) for i in range(count)]}}).encode("utf-8")
+
+
+def body_from_expect(expect_key, expect_value):
+    """根据用例预期字段生成响应体（支持data.token这类多层路径和分号分隔的多个字段）"""
+    body = {"code": 0, "msg": "success", "data": {}}
+    if expect_key:
+        for path, value in parse_expectations(expect_key, expect_value):
+            node = body
+            keys = path.lstrip("$.").split(".")
+            for key in keys[:-1]:
+                if not isinstance(node.get(key), dict):
+                    node[key] = {}
+                node = node[key]
+            node[keys[-1]] = value
+    return body
+
+
+class StubRoute:
+    """一条接口替身规则（字段均可在fixtures中配置，未配置时取defaults）"""
+    def __init__(self, spec, defaults):
+        merged = dict(defaults, **spec)
+        self.method = str(merged.get("method", "GET")).upper()
+        self.path = merged["path"]
+        self.status = int(merged.get("status", 200))
+        self.latency = merged.get("latency")
+        self.error_rate = float(merged.get("error_rate", 0))
+        self.error_status = int(merged.get("error_status", 500))
+        rate_limit = merged.get("rate_limit")
+        self.bucket = TokenBucket(rate_limit, merged.get("burst")) if rate_limit else None
+        self.headers = merged.get("headers") or {}
+        if merged.get("payload_size"):
+            self.body = build_payload(int(merged["payload_size"]))
+        else:
+            body = merged.get("body", {"code": 0, "msg": "success", "data": {}})
+            self.body = body.encode("utf-8") if isinstance(body, str) else json.dumps(body, ensure_ascii=False).encode("utf-8")
+
+
+class StubServer:
+    """本地替身服务：路由优先级 fixtures声明 > 录制文件(cassette) > Excel用例自动生成 > 404
+    按用例生成的路由先按完整请求（方法、路径、参数、正文）匹配，同一接口的正向/异常用例各自返回预期结果；
+    匹配不到（如参数含链路变量）时按方法+路径匹配该接口最后一条用例"""
+    def __init__(self, fixtures=STUB_FIXTURES, cases=None, cassette=None, host=STUB_HOST, port=STUB_PORT, seed=None):
+        self.host = host
+        self.port = port
+        self.cassette = cassette
+        self.rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self.routes = {}        # fixtures声明的路由
+        self.case_routes = {}   # 由Excel用例生成的路由（方法+路径）
+        self.signature_routes = {}  # 由Excel用例生成的路由（按请求签名，与录制文件的索引键一致）
+        self.stats = {}
+        self._stats_lock = threading.Lock()
+        config = {}
+        if fixtures and os.path.exists(fixtures):
+            with open(fixtures, encoding="utf-8") as f:
+                config = yaml.safe_load(f) or {}
+        self.defaults = config.get("defaults") or {}
+        global_limit = self.defaults.get("global_rate_limit")
+        self.global_bucket = TokenBucket(global_limit, self.defaults.get("global_burst")) if global_limit else None
+        for spec in config.get("routes") or []:
+            self._add(self.routes, spec)
+        for case in cases or []:
+            route = self._add(self.case_routes, {
+                "method": case.method, "path": case.url, "status": case.expect_code,
+                "body": body_from_expect(case.expect_key, case.expect_value)})
+            self.signature_routes[cassette_key(case.method, case.url, case.params, case.json)] = route
+        # 登录接口保证可用
+        if ("POST", LOGIN_URL) not in self.routes and ("POST", LOGIN_URL) not in self.case_routes:
+            self._add(self.case_routes, {"method": "POST", "path": LOGIN_URL,
+                                         "body": {"code": 0, "msg": 0, "data": {"token": "stub-token"}}})
+        self._httpd = None
+        self._thread = None
+
+    def _add(self, routes, spec):
+        route = StubRoute(spec, {k: v for k, v in self.defaults.items() if not k.startswith("global_")})
+        routes[(route.method, route.path)] = route
+        return route
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def random(self):
+        with self._rng_lock:
+            return self.rng.random()
+
+    def latency(self, spec):
+        with self._rng_lock:
+            return sample_latency(spec, self.rng)
+
+    def count(self, key, status):
+        with self._stats_lock:
+            endpoint = self.stats.setdefault(key, {})
+            endpoint[status] = endpoint.get(status, 0) + 1
+
+    def start(self):
+        """后台线程启动（port为0时自动分配空闲端口）"""
+        self._httpd = _StubHTTPServer((self.host, self.port), _StubHandler)
+        self._httpd.stub = self
+        self.port = self._httpd.server_address[1]
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True, name="stub-server")
+        self._thread.start()
+        log.info(f"本地替身服务已启动：{self.base_url}，{len(self.routes) + len(self.case_routes)}条路由")
+        return self
+
+    def serve_forever(self):
+        """前台运行（run.py --stub）"""
+        self.start()
+        try:
+            self._thread.join()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def stop(self):
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+            log.info(f"本地替身服务已停止，请求统计：{self.stats}")
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # 默认5，高并发建连时会被丢SYN导致1秒重传
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 响应头和正文分两次写出，开启Nagle时第二次写要等客户端的延迟ACK（约40ms）
+    disable_nagle_algorithm = True
+
+    def _handle(self):
+        stub = self.server.stub
+        parts = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        method = self.command.upper()
+        if raw and self.headers.get("Content-Encoding"):
+            # 压缩的请求正文（compress列）：解压失败按服务端常见行为回400
+            try:
+                raw = decompress(raw, self.headers["Content-Encoding"])
+            except (OSError, EOFError, zlib.error):
+                stub.count(f"{method} {parts.path}", 400)
+                return self._send(400, b'{"code":400,"msg":"bad request encoding"}')
+
+        if parts.path == "/__stub__/stats":
+            return self._send(200, json.dumps(stub.stats, ensure_ascii=False).encode("utf-8"))
+
+        route = stub.routes.get((method, parts.path))
+        params = dict(parse_qsl(parts.query, keep_blank_values=True))
+        try:
+            json_data = json.loads(raw) if raw else None
+        except ValueError:
+            json_data = None
+        if route is None and stub.cassette is not None:
+            # 录制文件按完整请求匹配，优先于按用例生成的路由
+            recorded = stub.cassette.lookup(method, parts.path, params, json_data)
+            if recorded is not None:
+                status, _, headers, body = recorded
+                stub.count(f"{method} {parts.path}", status)
+                return self._send(status, body, headers)
+        if route is None:
+            route = (stub.signature_routes.get(cassette_key(method, parts.path, params, json_data))
+                     or stub.case_routes.get((method, parts.path)))
+        if route is None:
+            stub.count(f"{method} {parts.path}", 404)
+            return self._send(404, b'{"code":404,"msg":"stub route not found"}')
+
+        key = f"{route.method} {route.path}"
+        # 限流：全局和单接口任一超限都回429
+        for bucket in (stub.global_bucket, route.bucket):
+            if bucket is not None and not bucket.take():
+                stub.count(key, 429)
+                return self._send(429, b'{"code":429,"msg":"too many requests"}', {"Retry-After": "1"})
+        delay = stub.latency(route.latency)
+        if delay:
+            time.sleep(delay)
+        if route.error_rate and stub.random() < route.error_rate:
+            stub.count(key, route.error_status)
+            return self._send(route.error_status, b'{"code":500,"msg":"stub injected error"}')
+        stub.count(key, route.status)
+        self._send(route.status, route.body, route.headers)
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        headers = dict(headers or {})
+        headers.setdefault("Content-Type", "application/json;charset=UTF-8")
+        # 客户端接受gzip且正文较大时压缩响应（与常见网关行为一致）
+        accept = self.headers.get("Accept-Encoding") or ""
+        if len(body) >= COMPRESS_MIN_BYTES and "gzip" in accept and not any(
+                name.lower() == "content-encoding" for name in headers):
+            body = compress(body, "gzip")
+            headers["Content-Encoding"] = "gzip"
+        for name, value in headers.items():
+            if name.lower() not in ("content-length", "transfer-encoding", "connection"):
+                self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = do_DELETE = do_PATCH = _handle
+
+    def log_message(self, format, *args):
+        pass
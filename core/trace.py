@@ -0,0 +1,179 @@
+import atexit
+import contextvars
+import gzip
+import heapq
+import json
+import os
+import shutil
+import threading
+import time
+from config.env_config import (TRACE_ENABLED, TRACE_DIR, TRACE_BATCH, TRACE_FLUSH_INTERVAL, TRACE_ROTATE_MB,
+                               TRACE_INDEX_TOP, TRACE_KEEP_RUNS, ENV_RUN_ID, ENV_WORKER, ENV_TRACE_DIR)
+#无需修改：结构化追踪日志（JSONL，按用例ID/工作进程关联，批量写入，轮转时压缩）
+
+# 记录最近一次运行ID的文件（查询工具默认查它）
+LATEST_FILE = "LATEST"
+# 索引里最多保留的失败记录数（超出只计数）
+MAX_INDEXED_FAILURES = 1000
+# 当前执行的用例ID：串行时由pytest钩子设置，异步时每个协程任务各自设置（提交到线程池时随上下文复制）
+current_case = contextvars.ContextVar("trace_case", default=None)
+
+
+def new_run_id():
+    """运行ID：时间+进程号（按名称排序即按时间排序）"""
+    return time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}"
+
+
+def is_failure(record):
+    """请求异常/4xx/5xx，或用例未通过"""
+    if record["event"] == "request":
+        return bool(record.get("error")) or (record.get("status") or 0) >= 400
+    return record.get("outcome") not in (None, "passed", "skipped")
+
+
+class TraceSink:
+    """本进程的追踪日志：<运行ID>/<工作进程>-<pid>.<序号>.jsonl，超过TRACE_ROTATE_MB后压缩成.jsonl.gz；
+    同时维护索引（<工作进程>-<pid>.index.json：事件计数、最慢的请求、失败记录），查询最慢/失败时不用扫描日志"""
+    def __init__(self, root=None, enabled=TRACE_ENABLED):
+        self.root = root or os.environ.get(ENV_TRACE_DIR) or TRACE_DIR
+        self.enabled = enabled
+        self.worker = os.environ.get(ENV_WORKER) or "main"
+        self.run_id = os.environ.get(ENV_RUN_ID) or new_run_id()
+        self.name = f"{self.worker}-{os.getpid()}"
+        self._buffer = []
+        self._file = None
+        self._segment = 0
+        self._last_flush = time.monotonic()
+        self._counts = {}
+        self._slowest = []         # 小顶堆：(耗时, 序号, 记录)
+        self._failures = []
+        self._failure_total = 0
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._started = False
+        self._marked = False
+
+    @property
+    def run_dir(self):
+        return os.path.join(self.root, self.run_id)
+
+    @property
+    def started(self):
+        """本进程是否已写出追踪日志"""
+        return self._started
+
+    def _segment_path(self, segment):
+        return os.path.join(self.run_dir, f"{self.name}.{segment:03d}.jsonl")
+
+    def emit(self, event, **fields):
+        """记录一条事件（先缓存，满TRACE_BATCH条或距上次写入超过TRACE_FLUSH_INTERVAL秒时批量写入）"""
+        if not self.enabled:
+            return
+        record = {"ts": round(time.time(), 3), "event": event, "worker": self.worker,
+                  "case_id": fields.pop("case_id", None) or current_case.get(), **fields}
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._lock:
+            self._index(record)
+            self._buffer.append(line)
+            if len(self._buffer) >= TRACE_BATCH or time.monotonic() - self._last_flush >= TRACE_FLUSH_INTERVAL:
+                self._flush()
+
+    def request(self, timing, error=None):
+        """记录一次请求（耗时毫秒、状态码、正文字节数）"""
+        ms = lambda seconds: round(seconds * 1000, 2)
+        self.emit("request", case_name=timing.case_name, method=timing.method, path=timing.path,
+                  status=timing.status, total_ms=ms(timing.total), ttfb_ms=ms(timing.ttfb), dns_ms=ms(timing.dns),
+                  connect_ms=ms(timing.connect), tls_ms=ms(timing.tls), sent=timing.sent_wire,
+                  received=timing.received, received_wire=timing.received_wire, error=error)
+
+    def _index(self, record):
+        self._counts[record["event"]] = self._counts.get(record["event"], 0) + 1
+        record = dict(record, segment=self._segment)
+        if record["event"] == "request":
+            self._seq += 1
+            item = (record["total_ms"], self._seq, record)
+            if len(self._slowest) < TRACE_INDEX_TOP:
+                heapq.heappush(self._slowest, item)
+            elif item[0] > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, item)
+        if is_failure(record):
+            self._failure_total += 1
+            if len(self._failures) < MAX_INDEXED_FAILURES:
+                self._failures.append(record)
+
+    def _start(self):
+        """首次写入时创建运行目录；主进程记录最近一次运行ID并清理过旧的运行"""
+        os.makedirs(self.run_dir, exist_ok=True)
+        self._started = True
+        atexit.register(self.close)
+        if self.worker == "main":
+            self.mark_latest()
+
+    def mark_latest(self):
+        """记录最近一次运行ID并清理过旧的运行（分片执行时父进程在启动工作进程前调用：父进程可能不发任何请求）"""
+        if not self.enabled or self._marked:
+            return
+        self._marked = True
+        os.makedirs(self.root, exist_ok=True)
+        self._write_json(os.path.join(self.root, LATEST_FILE), self.run_id, raw=True)
+        if not TRACE_KEEP_RUNS:
+            return
+        # 本次运行的目录可能还没创建，不参与排序：之前的运行保留最近TRACE_KEEP_RUNS-1次
+        older = sorted(name for name in os.listdir(self.root)
+                       if os.path.isdir(os.path.join(self.root, name)) and name != self.run_id)
+        for name in older[:max(len(older) - (TRACE_KEEP_RUNS - 1), 0)]:
+            shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+
+    def _flush(self):
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        if not self._started:
+            self._start()
+        if self._file is None:
+            self._file = open(self._segment_path(self._segment), "a", encoding="utf-8")
+        self._file.write("\n".join(self._buffer) + "\n")
+        self._file.flush()
+        self._buffer = []
+        if self._file.tell() >= TRACE_ROTATE_MB * 1024 * 1024:
+            self._rotate()
+
+    def _rotate(self):
+        """当前文件压缩成.gz，之后写新文件"""
+        self._file.close()
+        self._file = None
+        path = self._segment_path(self._segment)
+        with open(path, "rb") as src, gzip.open(f"{path}.gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(path)
+        self._segment += 1
+        self._write_index(complete=False)
+
+    def _write_index(self, complete):
+        slowest = [record for _, _, record in sorted(self._slowest, key=lambda item: item[0], reverse=True)]
+        self._write_json(os.path.join(self.run_dir, f"{self.name}.index.json"), {
+            "run_id": self.run_id, "worker": self.worker, "pid": os.getpid(), "complete": complete,
+            "segments": self._segment + 1, "counts": self._counts, "slowest": slowest,
+            "failures": self._failures, "failure_total": self._failure_total})
+
+    @staticmethod
+    def _write_json(path, data, raw=False):
+        """先写临时文件再替换"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data if raw else json.dumps(data, ensure_ascii=False))
+        os.replace(tmp_path, path)
+
+    def close(self):
+        """写入剩余记录和最终索引（会话结束和进程退出时调用，重复调用无影响）"""
+        with self._lock:
+            self._flush()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if self._started:
+                self._write_index(complete=True)
+
+
+# 全局实例
+trace_sink = TraceSink()
@@ -0,0 +1,167 @@
+"""追踪日志查询（默认查最近一次运行）
+
+用法（项目根目录执行）：
+    python -m core.trace_query                        # 各进程请求/用例数、最慢的20个请求、失败记录
+    python -m core.trace_query --slowest 50           # 最慢的50个请求
+    python -m core.trace_query --failed               # 只看失败的请求和用例
+    python -m core.trace_query --case <case_id>       # 某条用例的全部记录（需要扫描日志）
+    python -m core.trace_query --run 20261018-101500-1234 --json
+
+最慢/失败记录直接读各进程的索引文件；进程异常退出没写索引时，只扫描该进程的日志
+"""
+import argparse
+import glob
+import gzip
+import heapq
+import json
+import os
+import re
+import sys
+from config.env_config import TRACE_DIR, TRACE_INDEX_TOP, ENV_TRACE_DIR
+from core.trace import LATEST_FILE, MAX_INDEXED_FAILURES, is_failure
+#无需修改：追踪日志查询工具
+
+# 日志分段文件名：<工作进程>-<pid>.<序号>.jsonl[.gz]
+SEGMENT_RE = re.compile(r"^(?P<name>.+)\.(?P<segment>\d{3})\.jsonl(?:\.gz)?$")
+
+
+def resolve_run(run=None, root=None):
+    """运行目录（run为空或latest时取最近一次运行）"""
+    root = root or os.environ.get(ENV_TRACE_DIR) or TRACE_DIR
+    if not run or run == "latest":
+        latest = os.path.join(root, LATEST_FILE)
+        if not os.path.exists(latest):
+            raise FileNotFoundError(f"没有追踪日志：{root}")
+        with open(latest, encoding="utf-8") as f:
+            run = f.read().strip()
+    path = os.path.join(root, run)
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"运行不存在：{path}")
+    return path
+
+
+def segments(run_dir):
+    """{进程名: [按序号排列的日志文件]}"""
+    result = {}
+    for path in glob.glob(os.path.join(run_dir, "*.jsonl*")):
+        match = SEGMENT_RE.match(os.path.basename(path))
+        if match:
+            result.setdefault(match["name"], []).append((int(match["segment"]), path))
+    return {name: [path for _, path in sorted(items)] for name, items in result.items()}
+
+
+def iter_records(paths):
+    """逐行读取日志文件（.gz按压缩文件读取），跳过进程中断时写了一半的行"""
+    for path in paths:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def scan_index(paths):
+    """扫描日志生成与TraceSink相同结构的索引（进程没写索引时使用）"""
+    counts, slowest, failures, failure_total = {}, [], [], 0
+    for seq, record in enumerate(iter_records(paths)):
+        counts[record["event"]] = counts.get(record["event"], 0) + 1
+        if record["event"] == "request":
+            item = (record.get("total_ms") or 0, seq, record)
+            if len(slowest) < TRACE_INDEX_TOP:
+                heapq.heappush(slowest, item)
+            elif item[0] > slowest[0][0]:
+                heapq.heapreplace(slowest, item)
+        if is_failure(record):
+            failure_total += 1
+            if len(failures) < MAX_INDEXED_FAILURES:
+                failures.append(record)
+    return {"counts": counts, "slowest": [record for _, _, record in sorted(slowest, key=lambda i: i[0], reverse=True)],
+            "failures": failures, "failure_total": failure_total, "complete": False}
+
+
+def load_indexes(run_dir):
+    """{进程名: 索引}；没有完整索引的进程扫描它的日志"""
+    indexes = {}
+    for name, paths in segments(run_dir).items():
+        index_path = os.path.join(run_dir, f"{name}.index.json")
+        index = None
+        if os.path.exists(index_path):
+            with open(index_path, encoding="utf-8") as f:
+                index = json.load(f)
+        if index is None or not index.get("complete"):
+            index = dict(scan_index(paths), scanned=True)
+        indexes[name] = index
+    return indexes
+
+
+def summarize(run_dir, slowest=20):
+    """合并各进程索引：计数、最慢的请求、失败记录（按时间排序）"""
+    indexes = load_indexes(run_dir)
+    counts = {}
+    for index in indexes.values():
+        for event, count in index["counts"].items():
+            counts[event] = counts.get(event, 0) + count
+    top = heapq.nlargest(slowest, (r for index in indexes.values() for r in index["slowest"]),
+                         key=lambda r: r.get("total_ms") or 0)
+    failures = sorted((r for index in indexes.values() for r in index["failures"]), key=lambda r: r["ts"])
+    return {"run": os.path.basename(run_dir), "processes": {name: index["counts"] for name, index in indexes.items()},
+            "scanned": sorted(name for name, index in indexes.items() if index.get("scanned")),
+            "counts": counts, "failure_total": sum(index["failure_total"] for index in indexes.values()),
+            "slowest": top, "failures": failures}
+
+
+def case_records(run_dir, case_id):
+    """某条用例在各进程中的全部记录（按时间排序）"""
+    records = [record for paths in segments(run_dir).values() for record in iter_records(paths)
+               if record.get("case_id") == case_id]
+    return sorted(records, key=lambda r: r["ts"])
+
+
+def format_record(record):
+    if record["event"] == "request":
+        status = record.get("status") or "ERR"
+        line = (f"{record.get('total_ms', 0):>9.1f}ms  {status:<4} {record.get('method')} {record.get('path')}"
+                f"  用例={record.get('case_name')}  进程={record.get('worker')}")
+        return line + (f"  错误={record['error']}" if record.get("error") else "")
+    return (f"{record.get('duration_ms', 0):>9.1f}ms  {record.get('outcome')}  用例={record.get('case_name')}"
+            f"  进程={record.get('worker')}" + (f"  {record['message']}" if record.get("message") else ""))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="追踪日志查询")
+    parser.add_argument("--run", default="latest", help="运行ID（logs/trace下的目录名），默认最近一次")
+    parser.add_argument("--slowest", type=int, default=20, help="列出最慢的N个请求（不超过索引保留的条数）")
+    parser.add_argument("--failed", action="store_true", help="只列出失败的请求和用例")
+    parser.add_argument("--case", help="列出某条用例（case_id）的全部记录")
+    parser.add_argument("--json", action="store_true", help="输出JSON")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    run_dir = resolve_run(args.run)
+    if args.case:
+        records = case_records(run_dir, args.case)
+        print(json.dumps(records, ensure_ascii=False, indent=2) if args.json else
+              "\n".join(format_record(r) for r in records) or f"没有用例{args.case}的记录")
+        return 0
+    summary = summarize(run_dir, 0 if args.failed else args.slowest)
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        return 0
+    print(f"运行：{summary['run']}  事件数：{summary['counts']}  失败：{summary['failure_total']}")
+    for name, counts in sorted(summary["processes"].items()):
+        print(f"  进程{name}：{counts}{'（无索引，已扫描日志）' if name in summary['scanned'] else ''}")
+    if summary["slowest"]:
+        print(f"\n最慢的{len(summary['slowest'])}个请求：")
+        print("\n".join(format_record(r) for r in summary["slowest"]))
+    if summary["failures"]:
+        print(f"\n失败记录（{summary['failure_total']}条）：")
+        print("\n".join(format_record(r) for r in summary["failures"]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import time
+from config.env_config import WATCH_INTERVAL, WATCH_RUN_ALL, CASE_FILES, ENV_CASE_FILE
+from core.assert_utils import assert_utils
+from core.case_flow import CaseGraph, FlowContext, FlowError
+from core.case_history import case_history, iter_case_ids
+from core.case_model import CaseError, compile_case
+from core.case_source import CaseSources, resolve_files
+from core.db_pool import db_pool
+from core.logger import log
+from core.trace import current_case, trace_sink
+#无需修改：监听模式（进程常驻，用例文件保存后按行内容哈希找出新增/修改的用例，只执行这些用例）
+
+
+def row_hash(row):
+    """用例行内容哈希（与列顺序无关）"""
+    text = json.dumps(row, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class WatchRunner:
+    """复用同一个客户端（会话、Token、长连接都保持），链路变量在整个监听期间保留：
+    修改的用例引用的变量已由之前的执行提取过时直接使用，缺少时连同上游用例一起执行"""
+    def __init__(self, client, patterns=None, interval=WATCH_INTERVAL, run_all=WATCH_RUN_ALL):
+        self.client = client
+        self.patterns = patterns or os.environ.get(ENV_CASE_FILE) or CASE_FILES
+        self.interval = interval
+        self.run_all = run_all
+        self.context = FlowContext()
+        self.hashes = {}           # {case_id: 行内容哈希}
+
+    def snapshot(self):
+        """用例文件的(修改时间, 大小)；通配符新匹配到的文件也算修改"""
+        try:
+            files = resolve_files(self.patterns)
+        except FileNotFoundError:
+            return {}
+        result = {}
+        for path in files:
+            try:
+                stat = os.stat(path)
+                result[path] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                result[path] = None
+        return result
+
+    def load(self):
+        """读取全部用例，返回([(Case, 行哈希)], 数据错误列表)；有错误的行跳过，不影响其他用例"""
+        rows, errors = [], []
+        for number, row in enumerate(iter_case_ids(CaseSources(self.patterns).iter_cases()), 1):
+            digest = row_hash(row)
+            try:
+                rows.append((compile_case(row), digest))
+            except CaseError as e:
+                errors.append(f"第{number}条【{row.get('case_name')}】：{str(e)}")
+        return rows, errors
+
+    def select(self, cases, changed):
+        """按依赖顺序取出要执行的用例：changed中的用例，以及它们引用但上下文里还没有的变量的上游用例"""
+        graph = CaseGraph(cases)
+        self.context.bind(graph)
+        selected = {index for index, case in enumerate(cases) if case.case_id in changed}
+        pending = list(selected)
+        while pending:
+            index = pending.pop()
+            for name, producer in graph.sources[index].items():
+                produced = self.context.produced.get(cases[producer].case_id, {})
+                if name not in produced and producer not in selected:
+                    selected.add(producer)
+                    pending.append(producer)
+        return [cases[index] for index in graph.order if index in selected]
+
+    def run_case(self, case):
+        """执行单条用例（断言与test_runner一致），返回(结果, 耗时秒, 失败原因)"""
+        token = current_case.set(case.case_id)
+        start = time.perf_counter()
+        outcome, message = "passed", ""
+        try:
+            request = self.context.prepare(case)
+            response = self.client.send_request(request.method, request.url, request.params, request.json,
+                                                case.case_name, case.stream, case.compress, request.expect_code)
+            self.context.collect(case, response)
+            assert_utils.assert_code(response, request.expect_code)
+            if request.expectations:
+                assert_utils.assert_json(response, request.expect_key, request.expect_value, request.expectations)
+            if request.expect_schema:
+                assert_utils.assert_schema(response, request.expect_schema, case.case_name)
+            if getattr(response, "stream_body", None) is not None:
+                assert_utils.assert_stream(response, request.expect_size, request.expect_hash)
+            if request.db_sql and request.db_expect:
+                assert_utils.assert_db(request.db_sql, request.db_expect, case.case_name)
+        except Exception as e:
+            outcome, message = "failed", str(e)
+        finally:
+            current_case.reset(token)
+        duration = time.perf_counter() - start
+        case_history.add(case.case_id, duration, outcome)
+        trace_sink.emit("case", case_id=case.case_id, case_name=case.case_name, outcome=outcome,
+                        duration_ms=round(duration * 1000, 2), message=message[:500] or None)
+        return outcome, duration, message
+
+    def run_batch(self, cases):
+        """依次执行并逐条打印结果，返回失败条数"""
+        failed = 0
+        for case in cases:
+            outcome, duration, message = self.run_case(case)
+            failed += outcome != "passed"
+            mark = "✅" if outcome == "passed" else "❌"
+            print(f"  {mark} {case.case_name}  {case.method} {case.url}  {duration * 1000:.0f}ms"
+                  + (f"\n     {message}" if message else ""))
+        for case_id, case_name, message in assert_utils.db_deferred_failures():
+            failed += 1
+            case_history.mark_failed(case_id)
+            trace_sink.emit("db_assert", case_id=case_id, case_name=case_name, outcome="failed", message=message[:500])
+            print(f"  ❌ {message}")
+        case_history.flush()
+        return failed
+
+    def refresh(self, started):
+        """重新读取用例，执行新增和修改的用例"""
+        try:
+            rows, errors = self.load()
+        except Exception as e:
+            # 保存过程中读到不完整的文件等：等下次保存再读
+            print(f"\n⚠️ 读取用例失败（保存后重试）：{str(e)}")
+            return
+        for error in errors:
+            print(f"⚠️ 用例数据错误，已跳过：{error}")
+        hashes = {case.case_id: digest for case, digest in rows}
+        added = [case_id for case_id in hashes if case_id not in self.hashes]
+        modified = [case_id for case_id in hashes if case_id in self.hashes and hashes[case_id] != self.hashes[case_id]]
+        removed = [case_id for case_id in self.hashes if case_id not in hashes]
+        if not (added or modified):
+            print(f"\n用例文件已保存：没有新增或修改的用例（删除{len(removed)}条）")
+            self.hashes = hashes
+            return
+        try:
+            cases = self.select([case for case, _ in rows], set(added) | set(modified))
+        except FlowError as e:
+            print(f"\n⚠️ {str(e)}")
+            return
+        # 执行前就更新：执行失败的用例不会在下次保存时重复执行，需要时再次修改或重启
+        self.hashes = hashes
+        upstream = len(cases) - len(added) - len(modified)
+        print(f"\n用例文件已保存：新增{len(added)}条，修改{len(modified)}条，删除{len(removed)}条"
+              + (f"，另执行{upstream}条上游用例（提取引用的变量）" if upstream else ""))
+        failed = self.run_batch(cases)
+        print(f"完成：{len(cases) - failed}条通过，{failed}条失败，用时{time.perf_counter() - started:.2f}秒（从检测到保存算起）")
+
+    def watch(self):
+        """启动监听（Ctrl+C退出）"""
+        rows, errors = self.load()
+        for error in errors:
+            print(f"⚠️ 用例数据错误，已跳过：{error}")
+        self.hashes = {case.case_id: digest for case, digest in rows}
+        if self.run_all and rows:
+            print(f"首次完整执行：{len(rows)}条用例")
+            try:
+                graph = CaseGraph([case for case, _ in rows])
+                self.context.bind(graph)
+                cases = graph.ordered_cases()
+            except FlowError as e:
+                # 依赖有误时先不执行，修改保存后按变更执行
+                print(f"⚠️ {str(e)}")
+            else:
+                failed = self.run_batch(cases)
+                print(f"完成：{len(cases) - failed}条通过，{failed}条失败")
+        snapshot = self.snapshot()
+        print(f"\n监听中：{', '.join(os.path.basename(path) for path in snapshot)}（保存后自动执行修改的用例，Ctrl+C退出）")
+        try:
+            while True:
+                time.sleep(self.interval)
+                current = self.snapshot()
+                if current == snapshot:
+                    continue
+                started = time.perf_counter()
+                # 等文件写完：连续两次检查结果一致再读取
+                while True:
+                    time.sleep(self.interval)
+                    latest = self.snapshot()
+                    if latest == current:
+                        break
+                    current = latest
+                snapshot = current
+                self.refresh(started)
+        except KeyboardInterrupt:
+            print("\n监听结束")
+        finally:
+            case_history.flush()
+            case_history.close()
+            trace_sink.close()
+            db_pool.close()
+            log.info("======= 监听模式结束 =======")
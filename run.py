@@ -1,8 +1,10 @@
+import argparse
 import pytest
 import os
 import platform
 import shutil
-from config.env_config import BASE_DIR
+import sys
+from config.env_config import BASE_DIR, SHARD_WORKERS, POOL_MAXSIZE, ENV_CASSETTE, STUB_PORT, REPORT_ENGINE
 
 def generate_allure_report():
     """生成Allure报告（兼容多系统）"""
@@ -23,15 +25,139 @@ def generate_allure_report():
         print(f"\n✅ Allure报告已生成：{os.path.join(report_dir, 'index.html')}")
     except Exception as e:
         print(f"\n⚠️ 生成Allure报告失败（需安装Allure）：{e}")
+    return os.path.join(report_dir, "index.html")
+
+def generate_native_report():
+    """生成内置报告（无需Allure命令行，只重新解析新增/修改的结果文件）"""
+    from core.report_builder import report_builder
+    try:
+        report_index = report_builder.build()
+        print(f"\n✅ 测试报告已生成：{report_index}")
+        return report_index
+    except Exception as e:
+        print(f"\n⚠️ 生成测试报告失败：{e}")
+
+def generate_report(engine):
+    """按配置选择报告生成方式，返回报告首页路径"""
+    if engine == "auto":
+        engine = "allure" if shutil.which("allure") else "native"
+    if engine == "allure":
+        return generate_allure_report()
+    if engine == "native":
+        return generate_native_report()
+
+def run_load(args):
+    """压测模式：复用Excel用例和登录流程，按虚拟用户数或目标rps持续施压"""
+    from core.auth import TokenManager, apply_token
+    from core.case_source import case_source
+    from core.http_client import HttpClient
+    from core.http_pool import PooledAdapter
+    from core.load_runner import LoadRunner
+
+    client = HttpClient(base_url=args.base_url, quiet=True)
+    # 压测不重试不熔断，如实统计错误率
+    client.resilience = None
+    # 连接池容量不小于并发数，避免压测时反复建连
+    adapter = PooledAdapter(pool_maxsize=max(args.users, POOL_MAXSIZE))
+    client.session.mount("http://", adapter)
+    client.session.mount("https://", adapter)
+    client.token_manager = TokenManager(client.base_url)
+    apply_token(client, client.token_manager.get(client))
+    report = LoadRunner(case_source.get_cases(), client, users=args.users, rps=args.rps,
+                        duration=args.duration, window=args.window).run()
+    return 1 if report["total"]["error_rate"] > args.max_error_rate else 0
+
+def run_compare(args):
+    """多环境对比：同一批用例并发请求多个环境，有结果不一致的用例或环境登录失败时退出码为1"""
+    from core.case_source import case_source
+    from core.env_compare import EnvCompareRunner, resolve_environments
+
+    report = EnvCompareRunner(case_source.get_cases(), resolve_environments(args.envs)).run()
+    failed_login = any(env["login_error"] for env in report["environments"].values())
+    return 1 if report["differences"] or failed_login else 0
+
+def run_watch(args):
+    """监听模式：登录一次后常驻，用例文件保存后只执行新增/修改的用例（控制台只显示警告和逐条结果）"""
+    from core.auth import TokenManager, apply_token
+    from core.http_client import HttpClient, http_client
+    from core.logger import log
+    from core.watch_runner import WatchRunner
+
+    try:
+        log.remove(0)  # loguru默认的控制台输出
+        log.add(sys.stderr, level="WARNING")
+    except ValueError:
+        pass
+    client = HttpClient(base_url=args.base_url) if args.base_url else http_client
+    client.token_manager = TokenManager(client.base_url)
+    apply_token(client, client.token_manager.get(client))
+    WatchRunner(client).watch()
+    return 0
+
+def run_stub(args):
+    """前台启动本地替身服务（有录制文件时按录制内容回放）"""
+    from core.cassette import Cassette
+    from core.case_source import case_source
+    from core.stub_server import StubServer
+
+    cassette = Cassette(mode="replay")
+    server = StubServer(cases=case_source.get_cases(), port=args.stub_port,
+                        cassette=cassette if os.path.exists(cassette.path) else None, seed=args.seed)
+    print(f"本地替身服务：{server.base_url}（Ctrl+C 停止）")
+    server.serve_forever()
+
+def parse_args():
+    """命令行参数"""
+    parser = argparse.ArgumentParser(description="接口自动化测试入口")
+    parser.add_argument("--workers", type=int, default=SHARD_WORKERS,
+                        help="多进程分片执行的工作进程数（只登录一次，Token下发给各进程）")
+    parser.add_argument("--base-url", default=None, help="压测/监听模式的目标域名（默认env_config的BASE_URL）")
+    parser.add_argument("--cassette", choices=["off", "record", "replay"], default=None,
+                        help="录制/回放模式（默认env_config的CASSETTE_MODE）")
+    stub = parser.add_argument_group("本地替身服务")
+    stub.add_argument("--stub", action="store_true", help="启动本地替身服务（接口声明见test_data/stub_fixtures.yaml）")
+    stub.add_argument("--stub-port", type=int, default=STUB_PORT, help="替身服务端口")
+    stub.add_argument("--seed", type=int, default=None, help="随机种子（延迟/错误注入可复现）")
+    parser.add_argument("--envs", nargs="?", const="all", default=None,
+                        help="多环境对比：逗号分隔的环境名称（见env_config的ENVIRONMENTS）或域名，第一个为基准；不带值为全部环境")
+    parser.add_argument("--watch", action="store_true",
+                        help="监听模式：进程常驻，用例文件保存后只执行新增/修改的用例（不生成报告）")
+    parser.add_argument("--report", choices=["auto", "allure", "native", "off"], default=REPORT_ENGINE,
+                        help="报告生成方式（auto：有Allure命令行用Allure，否则用内置报告）")
+    parser.add_argument("--report-only", action="store_true", help="不执行用例，只根据已有结果重新生成报告")
+    load = parser.add_argument_group("压测模式")
+    load.add_argument("--load", action="store_true", help="压测模式：用Excel用例作为流量模型（weight列控制占比）")
+    load.add_argument("--users", type=int, default=10, help="虚拟用户数（定速模式下为最大并发数）")
+    load.add_argument("--rps", type=float, default=None, help="目标每秒请求数（不传则虚拟用户全速循环）")
+    load.add_argument("--duration", type=float, default=30, help="压测时长（秒）")
+    load.add_argument("--window", type=float, default=1.0, help="统计时间窗口（秒）")
+    load.add_argument("--max-error-rate", type=float, default=0.01, help="错误率超过该值时退出码为1")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    # 执行用例
-    pytest.main()
+    args = parse_args()
+    if args.cassette:
+        # 通过环境变量传给用例执行（含分片工作进程）
+        os.environ[ENV_CASSETTE] = args.cassette
+    if args.stub:
+        sys.exit(run_stub(args))
+    if args.load:
+        sys.exit(run_load(args))
+    if args.envs:
+        sys.exit(run_compare(args))
+    if args.watch:
+        sys.exit(run_watch(args))
+    # 执行用例（--report-only时跳过）
+    if not args.report_only:
+        if args.workers > 1:
+            from core.shard_runner import ShardRunner
+            ShardRunner(args.workers).run()
+        else:
+            pytest.main()
     # 生成报告
-    generate_allure_report()
+    report_index = generate_report(args.report)
     # 自动打开报告（Windows）
     try:
-        report_index = os.path.join(BASE_DIR, "reports", "allure-report", "index.html")
         os.startfile(report_index)
     except:
-        pass
\ No newline at end of file
+        pass
@@ -1,60 +1,84 @@
 import pytest
-import json
 import allure
-from core.excel_reader import excel_reader
-from core import http_client
+from config.env_config import BASE_URL, ASYNC_MODE, ASYNC_CONCURRENCY, LATENCY_BUDGET_MS
+from core.case_source import case_source
+from core.http_client import http_client
+from core.async_runner import AsyncCaseRunner
+from core.case_flow import CaseGraph, FlowContext, render_case
+from core.case_history import case_history
+from core.shard_runner import select_shard
 from core.assert_utils import assert_utils
+from core.log_policy import full_body
+from core.latency import latency_recorder
 from core.logger import log
 #无需改：用例执行
-# 读取Excel用例
-test_cases = excel_reader.get_cases()
+# 读取用例：分片执行时边读边筛选，工作进程只保留分到的用例；不分片时依赖图持有全部编译后的用例（原始行数据不常驻）
+# 按extract/${var}依赖关系排序，最近失败的链路优先
+case_graph = CaseGraph(select_shard(case_source.stream()))
+test_cases = case_history.prioritize(case_graph)
+# 串行执行时的链路变量（按依赖图取值）
+flow_context = FlowContext(case_graph)
 
-@allure.epic(f"【{http_client.session.base_url}】接口自动化测试")
+
+@pytest.fixture(scope="session")
+def prefetched_results():
+    """异步模式：并发预先发送全部用例请求，单条用例只做断言"""
+    if not ASYNC_MODE:
+        return {}
+    results = AsyncCaseRunner(http_client, ASYNC_CONCURRENCY).run(test_cases)
+    return {id(result.case): result for result in results}
+
+
+@allure.epic(f"【{BASE_URL}】接口自动化测试")
 class TestApiAuto:
     @pytest.mark.parametrize("case", test_cases)
-    def test_run_case(self, case):
+    def test_run_case(self, case, prefetched_results):
         """执行单条用例"""
-        # 解析用例
-        case_name = case.get("case_name")
-        method = case.get("method")
-        url = case.get("url")
-        params = case.get("params")
-        json_data = case.get("json")
-        expect_code = case.get("expect_code")
-        expect_key = case.get("expect_key")
-        expect_value = case.get("expect_value")
-        db_sql = case.get("db_sql")
-        db_expect = case.get("db_expect")
-
-        log.info(f"========== 执行用例：{case_name} ==========")
-        # 转换参数格式
-        params = json.loads(params) if params else None
-        json_data = json.loads(json_data) if json_data else None
-        expect_code = int(expect_code) if expect_code else 200
-
-        # Allure报告定制
-        allure.dynamic.feature(case.get("module", "默认模块"))  # 接口模块
-        allure.dynamic.story(case_name)                       # 用例名
-        allure.dynamic.severity(case.get("level", "normal"))  # 优先级
-        allure.dynamic.description(f"""
-        <h3>接口信息</h3>
-        <p>请求方法：{method}</p>
-        <p>接口路径：{url}</p>
-        <p>请求参数：params={params} | json={json_data}</p>
-        <h3>断言信息</h3>
-        <p>预期状态码：{expect_code}</p>
-        <p>预期字段：{expect_key} = {expect_value}</p>
-        <p>数据库校验：{db_sql} → {db_expect}</p>
-        """, escape=False)
-
-        # 发送请求
-        response = http_client.send_request(method, url, params, json_data)
-
-        # 执行断言
-        assert_utils.assert_code(response, expect_code)
-        if expect_key and expect_value:
-            assert_utils.assert_json(response, expect_key, expect_value)
-        if db_sql and db_expect:
-            assert_utils.assert_db(db_sql, db_expect)
-
-        log.info(f"========== 用例{case_name}执行成功 ==========")
\ No newline at end of file
+        # 替换${var}变量（异步模式取预先执行时该用例拿到的变量；请求失败时保留原用例，下面取响应时抛出原异常）
+        source_case = case
+        result = prefetched_results.get(id(case))
+        if result is None:
+            case = flow_context.prepare(case)
+        elif result.error is None:
+            case = render_case(case, result.context)
+        log.info(f"========== 执行用例：{case.case_name} ==========")
+
+        # Allure报告定制（描述在加载用例时已生成）
+        allure.dynamic.feature(case.module)       # 接口模块
+        allure.dynamic.story(case.case_name)      # 用例名
+        allure.dynamic.severity(case.level)       # 优先级
+        allure.dynamic.description_html(case.description)
+
+        # 发送请求（异步模式下直接取预先并发请求的结果）
+        if result is not None:
+            response = result.get_response()
+        else:
+            response = http_client.send_request(case.method, case.url, case.params, case.json, case.case_name,
+                                                case.stream, case.compress, case.expect_code)
+            # 提取变量供后续用例引用
+            flow_context.collect(source_case, response)
+
+        # 耗时预算检查（超出只标记，不影响用例结果）
+        budget = case.latency_budget_ms or LATENCY_BUDGET_MS
+        timing = getattr(response, "timing", None)
+        if budget and timing is not None and timing.total * 1000 > float(budget):
+            latency_recorder.flag(case.case_name, timing.endpoint, timing.total * 1000, budget)
+            allure.dynamic.tag("超出耗时预算")
+            log.warning(f"用例{case.case_name}耗时{timing.total * 1000:.1f}ms，超出预算{budget}ms")
+
+        # 执行断言（失败时完整记录响应正文，便于排查）
+        try:
+            assert_utils.assert_code(response, case.expect_code)
+            if case.expectations:
+                assert_utils.assert_json(response, case.expect_key, case.expect_value, case.expectations)
+            if case.expect_schema:
+                assert_utils.assert_schema(response, case.expect_schema, case.case_name)
+            if getattr(response, "stream_body", None) is not None:
+                assert_utils.assert_stream(response, case.expect_size, case.expect_hash)
+            if case.db_sql and case.db_expect:
+                assert_utils.assert_db(case.db_sql, case.db_expect, case.case_name)
+        except Exception:
+            log.opt(lazy=True).error("【断言失败响应】{}", lambda: full_body(response))
+            raise
+
+        log.info(f"========== 用例{case.case_name}执行成功 ==========")
\ No newline at end of file
@@ -0,0 +1,20 @@
+import pytest
+#无需修改：框架自身的单元测试（python -m pytest tests），不登录、不启动替身服务、不写报告
+
+
+@pytest.fixture(scope="session", autouse=True)
+def stub_server():
+    """覆盖根目录的同名夹具：单元测试不启动替身服务"""
+    return None
+
+
+@pytest.fixture(scope="session", autouse=True)
+def get_global_token():
+    """覆盖根目录的同名夹具：单元测试不登录"""
+    return None
+
+
+@pytest.fixture(scope="session", autouse=True)
+def session_fixture():
+    """覆盖根目录的同名夹具：单元测试不输出耗时报告、执行历史和追踪日志"""
+    return None
@@ -0,0 +1,81 @@
+import json
+import pytest
+from core.case_flow import CaseGraph, FlowContext, FlowError
+from core.case_model import compile_case
+#无需修改：用例链路（依赖图、变量绑定、串行上下文）
+
+
+class FakeResponse:
+    def __init__(self, doc):
+        self.content = json.dumps(doc).encode("utf-8")
+
+
+def case(name, url="/x", extract=None):
+    return compile_case({"case_id": name, "case_name": name, "method": "GET", "url": url, "extract": extract})
+
+
+def names(cases):
+    return [item.case_name for item in cases]
+
+
+def test_dependencies_run_first():
+    """引用变量的用例排在提取者之后，没有依赖的用例保持表格顺序"""
+    graph = CaseGraph([case("详情", "/user/${uid}"), case("其他"), case("登录", extract="uid=data.id")])
+    assert names(graph.ordered_cases()) == ["其他", "登录", "详情"]
+    assert graph.sources[0] == {"uid": 2}
+    # 分组内按执行顺序排列
+    assert graph.groups() == [[2, 0], [1]]
+
+
+def test_cycle_is_reported():
+    """循环依赖报出环上的用例"""
+    with pytest.raises(FlowError, match="循环依赖：【A】 → 【B】 → 【A】"):
+        CaseGraph([case("A", "/a/${b}", extract="a=data.a"), case("B", "/b/${a}", extract="b=data.b")])
+
+
+def test_undefined_variable():
+    with pytest.raises(FlowError, match=r"\$\{token\}未定义"):
+        CaseGraph([case("详情", "/user/${token}")])
+
+
+def test_binds_nearest_earlier_producer():
+    """同名变量有多个提取者时绑定表格中位置最近的前一个，前面没有时取后面第一个"""
+    cases = [case("P1", extract="id=data.id"), case("C1", "/c/${id}"), case("P2", extract="id=data.id"),
+             case("C2", "/c/${id}")]
+    graph = CaseGraph(cases)
+    assert [graph.sources[1], graph.sources[3]] == [{"id": 0}, {"id": 2}]
+    assert CaseGraph([case("C", "/c/${id}"), case("P", extract="id=data.id")]).sources[0] == {"id": 1}
+
+
+def test_serial_context_uses_bound_producer():
+    """串行执行时同名变量被后执行的其他用例再次提取，不影响已绑定到前一个提取者的用例"""
+    cases = [case("X", extract="id=data.id"), case("C", "/c/${id}/${v}"), case("P2", extract="id=data.id"),
+             case("D", extract="v=data.v")]
+    graph = CaseGraph(cases)
+    context = FlowContext(graph)
+    rendered = {}
+    for item in graph.ordered_cases():
+        if item.case_name == "C":
+            rendered["C"] = context.prepare(item).url
+            continue
+        context.collect(item, FakeResponse({"data": {"id": item.case_name, "v": item.case_name}}))
+    assert names(graph.ordered_cases()) == ["X", "P2", "D", "C"]
+    assert rendered["C"] == "/c/X/D"
+
+
+def test_failed_producer_leaves_variable_unset():
+    """绑定的提取者未执行时报变量没有值，不取其他用例提取的同名变量"""
+    cases = [case("X", extract="id=data.id"), case("C", "/c/${id}"), case("P2", extract="id=data.id")]
+    graph = CaseGraph(cases)
+    context = FlowContext(graph)
+    context.collect(cases[2], FakeResponse({"data": {"id": 2}}))
+    with pytest.raises(FlowError, match="没有值"):
+        context.prepare(cases[1])
+
+
+def test_render_keeps_value_type():
+    """整个值就是一个变量时保留原类型"""
+    item = compile_case({"case_id": "C", "case_name": "C", "method": "POST", "url": "/c",
+                         "json": {"id": "${id}", "name": "n-${id}"}})
+    context = FlowContext(initial={"id": 7})
+    assert context.prepare(item).json == {"id": 7, "name": "n-7"}
@@ -0,0 +1,51 @@
+import pytest
+from core.case_source import CsvCaseSource, JsonlCaseSource, open_source
+#无需修改：用例来源（流式读取JSONL/CSV）
+
+
+def test_jsonl_source(tmp_path):
+    """每行一条用例，空行和#注释跳过，params/json文本预先解析"""
+    path = tmp_path / "cases.jsonl"
+    path.write_text('# 注释\n{"case_name": "a", "method": "GET", "url": "/a", "params": "{\\"id\\": 1}"}\n\n'
+                    '{"case_name": "b", "method": "POST", "url": "/b", "json": {"x": 1}, "expect_code": 201}\n',
+                    encoding="utf-8")
+    source = open_source(str(path))
+    assert isinstance(source, JsonlCaseSource)
+    rows = list(source.iter_cases())
+    assert [row["case_name"] for row in rows] == ["a", "b"]
+    assert rows[0]["params"] == {"id": 1}
+    cases = source.get_cases()
+    assert cases[1].json == {"x": 1} and cases[1].expect_code == 201
+
+
+def test_jsonl_is_streamed(tmp_path):
+    """逐行读取：后面的坏行不影响已经产出的用例"""
+    path = tmp_path / "cases.jsonl"
+    path.write_text('{"case_name": "a"}\nnot json\n', encoding="utf-8")
+    rows = JsonlCaseSource(str(path)).iter_cases()
+    assert next(rows)["case_name"] == "a"
+    with pytest.raises(ValueError, match="第2行不是合法的JSON"):
+        next(rows)
+
+
+def test_csv_source(tmp_path):
+    """CSV：首行表头，空单元格为None，数字按数字处理（前导0保留文本），兼容BOM"""
+    path = tmp_path / "cases.csv"
+    path.write_text('﻿case_name,method,url,params,expect_code,expect_value\n'
+                    'a,GET,/a,"{""id"": 1}",200,007\n'
+                    ',,,,,\n'
+                    'b,POST,/b,,400,1.5\n', encoding="utf-8")
+    source = open_source(str(path))
+    assert isinstance(source, CsvCaseSource)
+    rows = list(source.iter_cases())
+    assert len(rows) == 2
+    assert rows[0] == {"case_name": "a", "method": "GET", "url": "/a", "params": {"id": 1},
+                       "expect_code": 200, "expect_value": "007"}
+    assert rows[1]["params"] is None and rows[1]["expect_value"] == 1.5
+
+
+def test_unknown_extension(tmp_path):
+    path = tmp_path / "cases.txt"
+    path.write_text("", encoding="utf-8")
+    with pytest.raises(ValueError, match="不支持的用例文件类型"):
+        open_source(str(path))
@@ -0,0 +1,52 @@
+import pytest
+from core.db_pool import DBChecker, DBPool, SQLiteAdapter, prepare
+#无需修改：数据库连接池（占位符转换）
+
+
+@pytest.fixture
+def sqlite_pool(tmp_path):
+    pool = DBPool(SQLiteAdapter(str(tmp_path / "db.sqlite3")), size=2)
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE user (name TEXT, note TEXT)")
+        conn.executemany("INSERT INTO user VALUES (?, ?)", [("ab1", "%s"), ("ab2", "100%"), ("cd", "x")])
+        conn.commit()
+    yield pool
+    pool.close()
+
+
+def test_prepare_converts_only_bare_markers():
+    """只转换引号外的%s，引号内的%s和%%原样保留"""
+    sql = "SELECT * FROM t WHERE a=%s AND b LIKE 'x%s' AND c='it''s %s' AND d=\"%s\" AND e LIKE '100%%' AND f=%s;"
+    assert prepare(sql, "?") == ("SELECT * FROM t WHERE a=? AND b LIKE 'x%s' AND c='it''s %s' AND d=\"%s\" "
+                                 "AND e LIKE '100%%' AND f=?")
+    assert prepare("SELECT %%s, %s", "?") == "SELECT %%s, ?"
+
+
+def test_prepare_keeps_mysql_statement():
+    """MySQL占位符就是%s，只去掉首尾空白和分号"""
+    assert prepare("  SELECT 'a%' , %s ;  ") == "SELECT 'a%' , %s"
+
+
+def test_literal_percent_without_args(sqlite_pool):
+    """不带参数的语句中%不需要转义"""
+    assert sqlite_pool.query_one("SELECT count(*) FROM user WHERE name LIKE 'ab%'") == (2,)
+    assert sqlite_pool.query_scalars(["SELECT count(*) FROM user WHERE note LIKE '%!%' ESCAPE '!'",
+                                      "SELECT count(*) FROM user WHERE name LIKE 'c%'"]) == [1, 1]
+
+
+def test_quoted_marker_with_args(sqlite_pool):
+    """引号内的%s是普通文本，引号外的%s是参数"""
+    assert sqlite_pool.query_one("SELECT name FROM user WHERE note = '%s' AND name LIKE %s", ("ab%",)) == ("ab1",)
+
+
+def test_deferred_failures_keep_case_id(sqlite_pool):
+    """延迟校验的失败带上所属用例，合并查询失败时逐条定位"""
+    checker = DBChecker(sqlite_pool, batch_size=2)
+    checker.defer("SELECT count(*) FROM user", 3, "总数", "c1")
+    checker.defer("SELECT count(*) FROM user WHERE name LIKE 'ab%'", 1, "前缀", "c2")
+    checker.defer("SELECT name FROM user", "ab1", "多行", "c3")
+    failures = checker.flush()
+    assert [(case_id, real) for case_id, _, _, _, real in failures] == [("c2", 2)]
+    checker.defer("SELECT * FROM missing", 1, "表不存在", "c4")
+    (case_id, case_name, _, _, real), = checker.flush()
+    assert (case_id, case_name) == ("c4", "表不存在") and isinstance(real, Exception)
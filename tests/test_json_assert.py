@@ -0,0 +1,50 @@
+import pytest
+from core.json_assert import MISSING, check_expectations, compile_path, parse_expectations
+#无需修改：字段路径与多字段断言
+
+DOC = {"code": 0, "data": {"list": [{"id": 1, "tags": ["a"]}, {"id": 2, "tags": []}], "0": "zero", "a.b": 3}}
+
+
+@pytest.mark.parametrize("expr, expected", [
+    ("code", 0),
+    ("data.list.0.id", 1),
+    ("data.list[1].id", 2),
+    ("$.data.list[-1].id", 2),
+    ("data.list[*].id", [1, 2]),
+    ("data.list.*.tags", [["a"], []]),
+    ("data.0", "zero"),
+    ("data['a.b']", 3),
+])
+def test_compile_path(expr, expected):
+    assert compile_path(expr).get(DOC) == expected
+
+
+def test_missing_path():
+    assert compile_path("data.list.5.id").get(DOC) is MISSING
+    assert compile_path("data.list[*].missing").get(DOC) == []
+    assert compile_path("code.x").get(DOC, None) is None
+
+
+def test_numeric_step_matches_string_key():
+    """点号写法的数字也能匹配字典里同名的字符串键"""
+    assert compile_path("a.0").get({"a": {"0": 1}}) == 1
+    assert compile_path("a[1]").get({"a": {"1": 2}}) == 2
+
+
+def test_compile_is_cached():
+    assert compile_path("data.list.0.id") is compile_path("data.list.0.id")
+
+
+def test_invalid_path():
+    with pytest.raises(ValueError, match="无法解析的字段路径"):
+        compile_path("data[")
+
+
+def test_multi_expectations():
+    """多字段写法按JSON字面量解析预期值"""
+    expectations = parse_expectations("code;data.list.0.id\ndata.0", '0;1;"zero"')
+    assert expectations == [("code", 0), ("data.list.0.id", 1), ("data.0", "zero")]
+    passed, failed = check_expectations(DOC, expectations + [("data.list.1.id", 3)])
+    assert len(passed) == 3 and failed == [("data.list.1.id", 3, 2)]
+    with pytest.raises(ValueError, match="个数不一致"):
+        parse_expectations("a;b", "1")
@@ -0,0 +1,49 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from core.case_model import compile_case
+from core.http_client import HttpClient
+from core.load_runner import LoadRunner
+#无需修改：压测模式（链路变量替换、错误分类）
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        status = 200 if self.path in ("/login", "/user/42") else 404
+        body = json.dumps({"data": {"id": 42}}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def client():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client = HttpClient(base_url=f"http://127.0.0.1:{server.server_address[1]}", quiet=True)
+    client.resilience = None
+    yield client
+    server.shutdown()
+    server.server_close()
+
+
+def case(name, url, **columns):
+    return compile_case({"case_id": name, "case_name": name, "method": "GET", "url": url, "expect_code": 200, **columns})
+
+
+def test_chained_cases_are_rendered(client, monkeypatch, tmp_path):
+    """提取者（weight为0也可以）先执行一次，引用变量的用例替换后参与压测；取不到变量的排除；错误按类型计数"""
+    monkeypatch.setattr("core.load_runner.REPORT_PATH", str(tmp_path / "load-report.json"))
+    cases = [case("登录", "/login", extract="uid=data.id", weight=0), case("详情", "/user/${uid}"),
+             case("不存在", "/missing"), case("提取失败", "/missing", extract="x=data.x", weight=0),
+             case("引用失败", "/x/${x}")]
+    report = LoadRunner(cases, client, users=2, duration=0.3, seed=1).run()
+    assert set(report["endpoints"]) == {"GET /user/42", "GET /missing"}
+    assert report["endpoints"]["GET /user/42"]["error_rate"] == 0.0
+    assert report["excluded"] == ["引用失败"]
+    assert set(report["errors"]) == {"状态码404"}
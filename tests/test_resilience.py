@@ -0,0 +1,60 @@
+import pytest
+import requests
+from config.env_config import LOGIN_URL
+from core.resilience import Resilience, CLOSED, OPEN
+#无需修改：失败重试与熔断
+
+
+class FakeResponse:
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+        self.headers = {}
+
+    def close(self):
+        pass
+
+
+def open_breaker(resilience, path):
+    breaker = resilience.breaker(path)
+    breaker.cooldown = 0
+    for _ in range(breaker.threshold):
+        breaker.failure(0.1)
+    assert breaker.state == OPEN
+    return breaker
+
+
+def test_probe_exception_reopens_breaker():
+    """探测请求抛出不重试的异常时重新熔断，下一次冷却后仍能放行探测"""
+    resilience = Resilience(times=0)
+    breaker = open_breaker(resilience, "/x")
+
+    def broken():
+        raise requests.exceptions.ChunkedEncodingError("连接中断")
+
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        resilience.call("GET", "/x", broken)
+    assert breaker.state == OPEN
+    assert resilience.call("GET", "/x", FakeResponse).status_code == 200
+    assert breaker.state == CLOSED
+
+
+def test_expected_status_is_not_a_failure():
+    """用例预期的5xx不重试、不计入熔断"""
+    resilience = Resilience(times=2)
+    calls = []
+    response = resilience.call("GET", "/x", lambda: calls.append(1) or FakeResponse(503), expect_code=503)
+    assert response.status_code == 503 and len(calls) == 1
+    assert resilience.breaker("/x").failures == 0
+
+
+def test_login_is_exempt_from_breaker():
+    """登录接口连续失败也不熔断"""
+    resilience = Resilience(times=0)
+
+    def down():
+        raise requests.ConnectionError("连不上")
+
+    for _ in range(5):
+        with pytest.raises(requests.ConnectionError):
+            resilience.call("POST", LOGIN_URL, down)
+    assert not resilience.breakers
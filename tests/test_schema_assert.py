@@ -0,0 +1,24 @@
+from core.schema_assert import BuiltinValidator
+#无需修改：内置结构校验
+
+
+def test_unsupported_keyword_fails():
+    """含不支持的关键字时校验失败，不会误判通过"""
+    validator = BuiltinValidator({"type": "object", "patternProperties": {"^x": {"type": "string"}}}, "demo.json")
+    assert validator.unsupported == {"patternProperties"}
+    errors = validator.errors({"x1": 1})
+    assert len(errors) == 1 and "patternProperties" in errors[0]
+
+
+def test_enum_and_const_follow_json_types():
+    """true与1不相等，1与1.0相等"""
+    validator = BuiltinValidator({"properties": {"flag": {"const": True}, "code": {"enum": [0, 1]}}})
+    assert validator.errors({"flag": True, "code": 1.0}) == []
+    assert len(validator.errors({"flag": 1, "code": True})) == 2
+
+
+def test_nested_errors_have_paths():
+    validator = BuiltinValidator({"type": "object", "required": ["data"],
+                                  "properties": {"data": {"type": "array", "items": {"type": "integer"}}}})
+    assert validator.errors({"data": [1, "a"]}) == ["$.data[1]：类型应为integer，实际为string"]
+    assert validator.errors({}) == ["$.data：缺少必填字段"]
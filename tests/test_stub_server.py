@@ -0,0 +1,28 @@
+import requests
+from core.case_model import compile_case
+from core.stub_server import StubServer
+#无需修改：本地替身服务（按用例生成路由）
+
+
+def test_cases_on_same_endpoint_get_their_own_response():
+    """同一接口的正向/异常用例按请求参数和正文各自返回预期结果，匹配不到时按路径取最后一条"""
+    cases = [compile_case({"case_name": "查询成功", "method": "GET", "url": "/user", "params": '{"id": 1}',
+                           "expect_code": 200, "expect_key": "data.name", "expect_value": "tom"}),
+             compile_case({"case_name": "用户不存在", "method": "GET", "url": "/user", "params": '{"id": 0}',
+                           "expect_code": 404, "expect_key": "code", "expect_value": "404"}),
+             compile_case({"case_name": "创建", "method": "POST", "url": "/user", "json": '{"name": "tom"}',
+                           "expect_code": 200}),
+             compile_case({"case_name": "缺少参数", "method": "POST", "url": "/user", "json": "{}",
+                           "expect_code": 400})]
+    server = StubServer(fixtures=None, cases=cases, port=0).start()
+    try:
+        url = server.base_url + "/user"
+        found = requests.get(url, params={"id": 1})
+        assert found.status_code == 200 and found.json()["data"]["name"] == "tom"
+        assert requests.get(url, params={"id": 0}).status_code == 404
+        assert requests.post(url, json={"name": "tom"}).status_code == 200
+        assert requests.post(url, json={}).status_code == 400
+        # 没有对应用例的参数：按路径匹配最后一条
+        assert requests.get(url, params={"id": 2}).status_code == 404
+    finally:
+        server.stop()